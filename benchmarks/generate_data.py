@@ -0,0 +1,232 @@
+"""
+Seeded generator for large synthetic catalogs.
+
+Writes the four CSV files the server reads, with the same columns as
+``data/``. Consumers pick capabilities with a Zipf-like skew, so a few
+shared platform capabilities have very high fan-in. The number of
+capabilities each application consumes is log-normal, so a few integration
+hubs have very high fan-out. A few capability-rich applications provide
+most capabilities, some capabilities have several providers and a small
+share have none.
+
+Usage:
+    python benchmarks/generate_data.py --output-dir bench_data --applications 100000 \\
+        --capabilities 20000 --consumes-per-app 20
+"""
+import argparse
+import os
+import time
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+APP_COLUMNS = ["application_id", "Application name", "Type", "Platform", "Disposition",
+               "System architect", "Delivery lead", "service owner"]
+CAP_COLUMNS = ["capability_id", "name", "context", "status", "description", "aliases", "notes"]
+MAPPING_COLUMNS = ["Application Name", "application_id", "capability Name", "capability_id"]
+
+APP_TYPES = ["Web Application", "Microservice", "Legacy", "Database", "Mobile Application", "Batch Job"]
+APP_TYPE_WEIGHTS = [0.25, 0.4, 0.12, 0.08, 0.1, 0.05]
+PLATFORMS = ["Cloud", "On-Premise", "Hybrid"]
+DISPOSITIONS = ["Production", "Development", "Retiring", "Planned"]
+DISPOSITION_WEIGHTS = [0.75, 0.12, 0.08, 0.05]
+STATUSES = ["Active", "Deprecated", "Planned"]
+STATUS_WEIGHTS = [0.85, 0.1, 0.05]
+
+DOMAINS = ["Customer", "Payment", "Order", "Inventory", "Billing", "Shipping", "Identity", "Ledger",
+           "Pricing", "Catalog", "Claims", "Policy", "Fraud", "Loyalty", "Partner", "Supplier",
+           "Employee", "Document", "Notification", "Reporting", "Analytics", "Search", "Contract", "Asset"]
+APP_SUFFIXES = ["Portal", "Service", "Gateway", "Engine", "Hub", "Manager", "System", "Platform",
+                "Tracker", "Console", "Worker", "Store"]
+CAP_ACTIONS = ["Management", "Processing", "Validation", "Reconciliation", "Authorization", "Lookup",
+               "Reporting", "Scheduling", "Routing", "Enrichment", "Archiving", "Monitoring"]
+CONTEXTS = ["Identity Management", "Financial Services", "Supply Chain", "Business Intelligence",
+            "Communication", "Integration", "Data Management", "Customer Experience", "Risk and Compliance",
+            "Human Resources"]
+NOTES = ["SSO enabled", "PCI compliant", "Real-time updates", "Multi-channel support", "High availability",
+         "Rate limiting enabled", "Customizable templates", "Role-based access", "Batch only", ""]
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn",
+               "Robin", "Drew", "Kai", "Noor", "Ravi", "Mei", "Lena", "Omar", "Ines", "Tariq"]
+LAST_NAMES = ["Smith", "Garcia", "Chen", "Okafor", "Novak", "Patel", "Kim", "Silva", "Müller", "Haddad",
+              "Nguyen", "Rossi", "Kowalski", "Andersen", "Ito", "Mensah", "Dubois", "Reyes", "Ali", "Brown"]
+
+
+def _ids(prefix: str, count: int) -> np.ndarray:
+    width = max(3, len(str(count)))
+    return np.array([f"{prefix}{i:0{width}d}" for i in range(1, count + 1)], dtype=object)
+
+
+def _pick(rng: np.random.Generator, values, count: int, weights=None) -> np.ndarray:
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=count, p=weights)]
+
+
+def _people(rng: np.random.Generator, count: int) -> np.ndarray:
+    return _pick(rng, FIRST_NAMES, count) + " " + _pick(rng, LAST_NAMES, count)
+
+
+def zipf_weights(rng: np.random.Generator, count: int, skew: float) -> np.ndarray:
+    """Selection probabilities proportional to 1/rank**skew, with ranks assigned at random"""
+    ranks = rng.permutation(count) + 1
+    weights = ranks.astype(np.float64) ** -skew
+    return weights / weights.sum()
+
+
+def generate_catalogs(rng: np.random.Generator, applications: int, capabilities: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    app_names = (_pick(rng, DOMAINS, applications) + " " + _pick(rng, DOMAINS, applications) + " "
+                 + _pick(rng, APP_SUFFIXES, applications))
+    app_types = _pick(rng, APP_TYPES, applications, APP_TYPE_WEIGHTS)
+    platforms = _pick(rng, PLATFORMS, applications, [0.65, 0.2, 0.15])
+    # Legacy applications mostly run on premise
+    legacy = (app_types == "Legacy") & (rng.random(applications) < 0.8)
+    platforms[legacy] = "On-Premise"
+    apps = pd.DataFrame({
+        "application_id": _ids("APP", applications),
+        # Numbered so names stay unique at any catalog size
+        "Application name": app_names + " " + np.arange(1, applications + 1).astype(str).astype(object),
+        "Type": app_types,
+        "Platform": platforms,
+        "Disposition": _pick(rng, DISPOSITIONS, applications, DISPOSITION_WEIGHTS),
+        "System architect": _people(rng, applications),
+        "Delivery lead": _people(rng, applications),
+        "service owner": _people(rng, applications),
+    }, columns=APP_COLUMNS)
+
+    domains = _pick(rng, DOMAINS, capabilities)
+    actions = _pick(rng, CAP_ACTIONS, capabilities)
+    cap_names = domains + " " + actions + " " + np.arange(1, capabilities + 1).astype(str).astype(object)
+    caps = pd.DataFrame({
+        "capability_id": _ids("CAP", capabilities),
+        "name": cap_names,
+        "context": _pick(rng, CONTEXTS, capabilities),
+        "status": _pick(rng, STATUSES, capabilities, STATUS_WEIGHTS),
+        "description": "Provides " + np.char.lower(actions.astype(str)).astype(object) + " of "
+                       + np.char.lower(domains.astype(str)).astype(object) + " data for dependent applications",
+        "aliases": domains + " " + _pick(rng, APP_SUFFIXES, capabilities),
+        "notes": _pick(rng, NOTES, capabilities),
+    }, columns=CAP_COLUMNS)
+    return apps, caps
+
+
+def generate_mappings(rng: np.random.Generator,
+                      applications: int,
+                      capabilities: int,
+                      consumes_per_app: float,
+                      fan_in_skew: float,
+                      fan_out_sigma: float,
+                      providers_per_capability: float,
+                      provider_skew: float,
+                      unprovided_ratio: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Unique (application, capability) index pairs for both mappings
+
+    Returns:
+        Tuple of consumer app indexes, consumed capability indexes, provider
+        app indexes and provided capability indexes
+    """
+    # Log-normal fan-out with the requested mean
+    mu = np.log(max(consumes_per_app, 1e-9)) - fan_out_sigma ** 2 / 2
+    fan_out = np.minimum(np.rint(rng.lognormal(mu, fan_out_sigma, applications)).astype(np.int64), capabilities)
+    consumer = np.repeat(np.arange(applications, dtype=np.int64), fan_out)
+    consumed = rng.choice(capabilities, size=consumer.size, p=zipf_weights(rng, capabilities, fan_in_skew))
+    pairs = np.unique(consumer * capabilities + consumed)
+    consumer, consumed = pairs // capabilities, pairs % capabilities
+
+    provided_count = 1 + rng.poisson(max(providers_per_capability - 1, 0), capabilities)
+    provided_count[rng.random(capabilities) < unprovided_ratio] = 0
+    provided = np.repeat(np.arange(capabilities, dtype=np.int64), provided_count)
+    provider = rng.choice(applications, size=provided.size, p=zipf_weights(rng, applications, provider_skew))
+    pairs = np.unique(provider * capabilities + provided)
+    provider, provided = pairs // capabilities, pairs % capabilities
+    return consumer, consumed, provider, provided
+
+
+def _write_mapping(path: str, apps: pd.DataFrame, caps: pd.DataFrame,
+                   app_index: np.ndarray, cap_index: np.ndarray, chunksize: int = 500000) -> None:
+    app_ids = apps["application_id"].to_numpy()
+    app_names = apps["Application name"].to_numpy()
+    cap_ids = caps["capability_id"].to_numpy()
+    cap_names = caps["name"].to_numpy()
+    for start in range(0, max(len(app_index), 1), chunksize):
+        a = app_index[start:start + chunksize]
+        c = cap_index[start:start + chunksize]
+        chunk = pd.DataFrame({
+            "Application Name": app_names[a],
+            "application_id": app_ids[a],
+            "capability Name": cap_names[c],
+            "capability_id": cap_ids[c],
+        }, columns=MAPPING_COLUMNS)
+        chunk.to_csv(path, mode="w" if start == 0 else "a", header=start == 0, index=False)
+
+
+def generate(output_dir: str,
+             applications: int = 10000,
+             capabilities: int = 2000,
+             consumes_per_app: float = 20.0,
+             fan_in_skew: float = 1.1,
+             fan_out_sigma: float = 1.0,
+             providers_per_capability: float = 1.2,
+             provider_skew: float = 1.2,
+             unprovided_ratio: float = 0.02,
+             seed: int = 42) -> dict:
+    """
+    Write a synthetic catalog to output_dir
+
+    The same arguments and seed always produce the same files.
+
+    Returns:
+        dict: Row counts per file
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(output_dir, exist_ok=True)
+    apps, caps = generate_catalogs(rng, applications, capabilities)
+    consumer, consumed, provider, provided = generate_mappings(
+        rng, applications, capabilities, consumes_per_app, fan_in_skew, fan_out_sigma,
+        providers_per_capability, provider_skew, unprovided_ratio)
+
+    apps.to_csv(os.path.join(output_dir, "application_catalog.csv"), index=False)
+    caps.to_csv(os.path.join(output_dir, "capability_catalog.csv"), index=False)
+    _write_mapping(os.path.join(output_dir, "application_consumes_capability_mapping.csv"),
+                   apps, caps, consumer, consumed)
+    _write_mapping(os.path.join(output_dir, "application_provides_capability_mapping.csv"),
+                   apps, caps, provider, provided)
+    return {
+        "applications": len(apps),
+        "capabilities": len(caps),
+        "consumes": int(consumer.size),
+        "provides": int(provider.size),
+        "max_fan_in": int(np.bincount(consumed, minlength=capabilities).max()) if consumed.size else 0,
+        "max_fan_out": int(np.bincount(consumer, minlength=applications).max()) if consumer.size else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic application-capability catalog")
+    parser.add_argument("--output-dir", required=True, help="Directory for the four CSV files")
+    parser.add_argument("--applications", type=int, default=10000)
+    parser.add_argument("--capabilities", type=int, default=2000)
+    parser.add_argument("--consumes-per-app", type=float, default=20.0,
+                        help="Mean number of capabilities each application consumes")
+    parser.add_argument("--fan-in-skew", type=float, default=1.1,
+                        help="Zipf exponent of capability popularity among consumers (0 = uniform)")
+    parser.add_argument("--fan-out-sigma", type=float, default=1.0,
+                        help="Log-normal sigma of consumed capabilities per application (0 = all equal)")
+    parser.add_argument("--providers-per-capability", type=float, default=1.2,
+                        help="Mean providers per provided capability")
+    parser.add_argument("--provider-skew", type=float, default=1.2,
+                        help="Zipf exponent of how many capabilities each application provides")
+    parser.add_argument("--unprovided-ratio", type=float, default=0.02,
+                        help="Share of capabilities with no provider")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = generate(args.output_dir, args.applications, args.capabilities, args.consumes_per_app,
+                      args.fan_in_skew, args.fan_out_sigma, args.providers_per_capability,
+                      args.provider_skew, args.unprovided_ratio, args.seed)
+    print(f"Wrote {args.output_dir} in {time.perf_counter() - start:.1f}s: "
+          + ", ".join(f"{name}={value}" for name, value in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
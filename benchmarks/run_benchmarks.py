@@ -0,0 +1,311 @@
+"""
+Reproducible benchmark suite for the catalog, the prompt builder and the API.
+
+Covers CSV loading and snapshot indexing, every lookup method, prompt
+construction, each FastAPI endpoint through an in-process ASGI client (no
+sockets), and /analyze against a stub model with a configurable latency.
+Reports throughput and p50/p95/p99 latency, and compares them with a saved
+baseline so regressions fail the run.
+
+Needs the development requirements (``pip install -r requirements-dev.txt``).
+
+Usage:
+    python benchmarks/generate_data.py --output-dir bench_data
+    python benchmarks/run_benchmarks.py --data-dir bench_data --save-baseline benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --data-dir bench_data --baseline benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+
+from benchmarks import stub_llm  # noqa: E402
+
+GROUPS = ("load", "lookup", "prompt", "endpoints", "analyze")
+
+QUESTION_TEMPLATES = [
+    "Which applications consume {cap}?",
+    "What does {app} depend on and who provides it?",
+    "Which capabilities does {app} provide?",
+    "Who provides {cap} and which applications would be affected if it failed?",
+]
+
+
+def summarize(durations: List[float], wall: Optional[float] = None) -> Dict:
+    """
+    Latency percentiles and throughput for one benchmark
+
+    Args:
+        durations (List[float]): Seconds per operation
+        wall (float, optional): Elapsed seconds for all operations; the sum of
+            durations when they ran one after another
+
+    Returns:
+        Dict: count, ops_per_sec and mean/p50/p95/p99 in milliseconds
+    """
+    values = np.asarray(durations, dtype=np.float64) * 1000
+    wall = wall if wall is not None else float(values.sum()) / 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": int(values.size),
+        "ops_per_sec": round(values.size / wall, 2) if wall > 0 else None,
+        "mean_ms": round(float(values.mean()), 4),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+    }
+
+
+def time_calls(func: Callable, arguments: List) -> List[float]:
+    durations = []
+    for argument in arguments:
+        start = time.perf_counter()
+        func(argument)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+async def time_requests(client, method: str, make_url: Callable[[int], str], count: int,
+                        concurrency: int = 1, body: Optional[Callable[[int], Dict]] = None,
+                        headers: Optional[Dict] = None, expect: int = 200) -> Dict:
+    """Issue count requests, at most concurrency at a time, and summarize their latency"""
+    semaphore = asyncio.Semaphore(concurrency)
+    durations: List[float] = []
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(method, make_url(i), json=body(i) if body else None, headers=headers)
+            durations.append(time.perf_counter() - start)
+            if response.status_code != expect:
+                raise RuntimeError(f"{method} {make_url(i)} returned {response.status_code}: {response.text[:200]}")
+
+    # Untimed first request, so lazily built per-version structures are not measured
+    await client.request(method, make_url(0), json=body(0) if body else None, headers=headers)
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return summarize(durations, time.perf_counter() - start)
+
+
+def bench_load(data_dir: str, iterations: int) -> Dict[str, Dict]:
+    from utils.catalog_store import CatalogSnapshot
+    from utils.data_processor import DataProcessor
+
+    processor = DataProcessor(data_dir)
+    tables = None
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        tables = processor.load_data()
+        durations.append(time.perf_counter() - start)
+    results = {"load_data": summarize(durations)}
+    results["snapshot_build"] = summarize(time_calls(lambda _: CatalogSnapshot(*tables, version="benchmark"),
+                                                     range(iterations)))
+    return results
+
+
+def bench_lookups(snapshot, rng: random.Random, iterations: int) -> Dict[str, Dict]:
+    app_ids = [app["application_id"] for app in snapshot.app_catalog]
+    cap_ids = [cap["capability_id"] for cap in snapshot.cap_catalog]
+    results = {}
+    for method, ids in (("get_application_details", app_ids),
+                        ("get_capability_details", cap_ids),
+                        ("get_consumed_capabilities", app_ids),
+                        ("get_provided_capabilities", app_ids),
+                        ("get_consuming_applications", cap_ids),
+                        ("get_providing_applications", cap_ids)):
+        sample = [rng.choice(ids) for _ in range(iterations)]
+        results[f"lookup.{method}"] = summarize(time_calls(getattr(snapshot, method), sample))
+    return results
+
+
+def _questions(snapshot, rng: random.Random, count: int) -> List[str]:
+    apps = [app["Application name"] for app in snapshot.app_catalog]
+    caps = [cap["name"] for cap in snapshot.cap_catalog]
+    # Numbered so no two questions share an LLM cache entry
+    return [f"{rng.choice(QUESTION_TEMPLATES).format(app=rng.choice(apps), cap=rng.choice(caps))} (#{i})"
+            for i in range(count)]
+
+
+def bench_prompt(snapshot, rng: random.Random, iterations: int) -> Dict[str, Dict]:
+    from llm_chat.context_builder import build_context
+
+    questions = _questions(snapshot, rng, iterations)
+    return {"build_context": summarize(time_calls(lambda question: build_context(snapshot, question), questions))}
+
+
+async def bench_endpoints(server, snapshot, rng: random.Random, iterations: int, concurrency: int) -> Dict[str, Dict]:
+    import httpx
+
+    app_ids = [app["application_id"] for app in snapshot.app_catalog]
+    cap_ids = [cap["capability_id"] for cap in snapshot.cap_catalog]
+    app_sample = [rng.choice(app_ids) for _ in range(iterations)]
+    cap_sample = [rng.choice(cap_ids) for _ in range(iterations)]
+    terms = [rng.choice(snapshot.cap_catalog)["name"][:rng.randint(3, 8)] for _ in range(iterations)]
+    batches = [rng.sample(app_ids, min(100, len(app_ids))) for _ in range(iterations)]
+
+    results = {}
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        etag = (await client.get("/applications", params={"limit": 500})).headers.get("ETag")
+        cases = [
+            ("GET /", "GET", lambda i: "/", None, None),
+            ("GET /applications", "GET", lambda i: "/applications?limit=500", None, None),
+            ("GET /applications (304)", "GET", lambda i: "/applications?limit=500", None, {"If-None-Match": etag}),
+            ("GET /capabilities", "GET", lambda i: "/capabilities?limit=500", None, None),
+            ("GET /application/{id}", "GET", lambda i: f"/application/{app_sample[i]}", None, None),
+            ("GET /capability/{id}", "GET", lambda i: f"/capability/{cap_sample[i]}", None, None),
+            ("POST /applications/batch", "POST", lambda i: "/applications/batch", lambda i: {"ids": batches[i]}, None),
+            ("GET /search", "GET", lambda i: f"/search?q={terms[i]}", None, None),
+            ("GET /graph/impact/{id}", "GET", lambda i: f"/graph/impact/{app_sample[i]}", None, None),
+            ("GET /graph/dependencies/{id}", "GET", lambda i: f"/graph/dependencies/{app_sample[i]}", None, None),
+            ("GET /analytics/summary", "GET", lambda i: "/analytics/summary", None, None),
+            ("GET /analytics/fan-in", "GET", lambda i: "/analytics/fan-in", None, None),
+        ]
+        for name, method, make_url, body, headers in cases:
+            expect = 304 if headers else 200
+            results[name] = await time_requests(client, method, make_url, iterations, 1, body, headers, expect)
+        results["GET /application/{id} (concurrent)"] = await time_requests(
+            client, "GET", lambda i: f"/application/{app_sample[i]}", iterations, concurrency)
+    return results
+
+
+async def bench_analyze(server, snapshot, rng: random.Random, iterations: int, concurrency: int) -> Dict[str, Dict]:
+    import httpx
+
+    questions = _questions(snapshot, rng, iterations * 2)
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        return {
+            "POST /analyze": await time_requests(
+                client, "POST", lambda i: "/analyze", iterations, 1, lambda i: {"question": questions[i]}),
+            "POST /analyze (concurrent)": await time_requests(
+                client, "POST", lambda i: "/analyze", iterations, concurrency,
+                lambda i: {"question": questions[iterations + i]}),
+        }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], metric: str,
+            tolerance: float, min_delta_ms: float) -> List[str]:
+    """
+    Names of benchmarks whose metric regressed beyond the tolerance
+
+    Differences below min_delta_ms are ignored, so sub-millisecond timer
+    noise on very fast operations does not fail the run.
+    """
+    regressions = []
+    print(f"\nComparison with baseline ({metric}, tolerance {tolerance:.0%}):")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None or not previous.get(metric):
+            print(f"  {name:<40} new")
+            continue
+        change = current[metric] / previous[metric] - 1
+        regressed = change > tolerance and current[metric] - previous[metric] > min_delta_ms
+        print(f"  {name:<40} {previous[metric]:>10.3f} -> {current[metric]:>10.3f} ms  {change:+7.1%}"
+              + ("  REGRESSION" if regressed else ""))
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def print_results(results: Dict[str, Dict]) -> None:
+    print(f"{'benchmark':<40} {'count':>6} {'ops/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for name, stats in results.items():
+        print(f"{name:<40} {stats['count']:>6} {stats['ops_per_sec'] or 0:>10.1f} "
+              f"{stats['p50_ms']:>10.3f} {stats['p95_ms']:>10.3f} {stats['p99_ms']:>10.3f}")
+
+
+async def run(args) -> Dict[str, Dict]:
+    groups = set(args.only.split(",")) if args.only else set(GROUPS)
+    # Seeded per group so samples do not depend on which other groups run
+    rng = {group: random.Random(f"{args.seed}:{group}") for group in GROUPS}
+    results: Dict[str, Dict] = {}
+
+    if "load" in groups:
+        results.update(bench_load(args.data_dir, args.load_iterations))
+
+    # The server reads CATALOG_DATA_DIR at import time and the model SDK when the client is built
+    os.environ["CATALOG_DATA_DIR"] = args.data_dir
+    stub_llm.install(args.llm_latency)
+    from mcp_server import server
+
+    await server.app.router.startup()
+    # The LLM client initializes in the background; /analyze answers 503 until it is ready
+    await asyncio.to_thread(server.vertex_client.wait, 60)
+    try:
+        snapshot = server.data_processor.snapshot()
+        if "lookup" in groups:
+            results.update(bench_lookups(snapshot, rng["lookup"], args.iterations * 10))
+        if "prompt" in groups:
+            results.update(bench_prompt(snapshot, rng["prompt"], args.iterations))
+        if "endpoints" in groups:
+            results.update(await bench_endpoints(server, snapshot, rng["endpoints"], args.iterations, args.concurrency))
+        if "analyze" in groups:
+            results.update(await bench_analyze(server, snapshot, rng["analyze"], args.analyze_iterations, args.concurrency))
+    finally:
+        await server.app.router.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark catalog loading, lookups, prompts and API endpoints")
+    parser.add_argument("--data-dir", default=os.path.join(REPO_ROOT, "data"),
+                        help="Catalog CSV directory (see generate_data.py)")
+    parser.add_argument("--iterations", type=int, default=200, help="Requests per endpoint benchmark")
+    parser.add_argument("--load-iterations", type=int, default=3, help="Repetitions of the full catalog load")
+    parser.add_argument("--analyze-iterations", type=int, default=20, help="Requests per /analyze benchmark")
+    parser.add_argument("--concurrency", type=int, default=16, help="In-flight requests for concurrent benchmarks")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds the stub model takes per call")
+    parser.add_argument("--only", help=f"Comma-separated groups to run: {','.join(GROUPS)}")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against results saved with --save-baseline")
+    parser.add_argument("--save-baseline", help="Save the results as a new baseline to this file")
+    parser.add_argument("--metric", default="p95_ms", choices=["mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before failing, as a fraction")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args()
+    args.data_dir = os.path.abspath(args.data_dir)
+
+    results = asyncio.run(run(args))
+    print_results(results)
+
+    report = {
+        "metadata": {
+            "data_dir": args.data_dir,
+            "iterations": args.iterations,
+            "llm_latency": args.llm_latency,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.metric, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
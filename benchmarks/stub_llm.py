@@ -0,0 +1,58 @@
+"""
+Stand-in for the Vertex AI SDK so /analyze can be benchmarked offline.
+
+``install()`` registers a fake ``google.cloud.aiplatform`` module whose text
+model sleeps for a fixed latency and then answers directly, so /analyze
+latency measures the server's own overhead plus the configured model time.
+It must be called before the server module is imported.
+"""
+import os
+import sys
+import time
+import types
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubTextModel:
+    """Text model that answers after a fixed delay"""
+
+    latency = 0.0
+    calls = 0
+
+    @classmethod
+    def from_pretrained(cls, model_name: str) -> "StubTextModel":
+        return cls()
+
+    def predict(self, prompt: str, **kwargs) -> StubResponse:
+        StubTextModel.calls += 1
+        time.sleep(self.latency)
+        return StubResponse('{"answer": "Benchmark answer"}')
+
+    def predict_streaming(self, prompt: str, **kwargs):
+        StubTextModel.calls += 1
+        time.sleep(self.latency)
+        for chunk in ('{"answer": ', '"Benchmark ', 'answer"}'):
+            yield StubResponse(chunk)
+
+
+def install(latency: float = 0.0) -> None:
+    """
+    Replace the Vertex AI SDK with the stub model
+
+    Args:
+        latency (float): Seconds each model call takes
+    """
+    StubTextModel.latency = latency
+    aiplatform = types.ModuleType("google.cloud.aiplatform")
+    aiplatform.init = lambda **kwargs: None
+    aiplatform.TextGenerationModel = StubTextModel
+    google = sys.modules.get("google") or types.ModuleType("google")
+    cloud = sys.modules.get("google.cloud") or types.ModuleType("google.cloud")
+    google.cloud = cloud
+    cloud.aiplatform = aiplatform
+    sys.modules.update({"google": google, "google.cloud": cloud, "google.cloud.aiplatform": aiplatform})
+    os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "benchmark")
@@ -0,0 +1,321 @@
+"""
+Batch analysis of many questions against one catalog snapshot.
+
+A batch is deduplicated by normalized question and pinned to a single
+catalog snapshot. Questions are grouped by the catalog entity they are
+most about, and each group gets one analysis context, built once for all
+of its questions; details missing from that context are fetched by the
+model through the usual tools. Questions then fan out to the model client
+under a concurrency bound and a token-bucket rate limit.
+
+Each job lives in ``BATCH_DIR`` as ``<job_id>.json`` (questions and status)
+plus ``<job_id>.jsonl``, to which every result is appended as soon as it
+arrives. Model failures are recorded as errors and leave the job
+"incomplete". Running a job again skips the questions that already have
+an answer there, so an interrupted or partly failed run resumes where it
+stopped. Without an
+explicit id, the job id is derived from the questions, so resubmitting the
+same batch resumes it too.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from llm_chat.concurrency import RateLimiter
+from llm_chat.response_cache import normalize_question
+from utils.retrieval import retriever_for
+
+BATCH_DIR = os.getenv("BATCH_DIR", "batch_jobs")
+# Questions in flight at once and the rate they are started at
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_RATE_PER_SECOND = float(os.getenv("BATCH_RATE_PER_SECOND", "5"))
+BATCH_RATE_BURST = int(os.getenv("BATCH_RATE_BURST", "10"))
+MAX_BATCH_QUESTIONS = int(os.getenv("MAX_BATCH_QUESTIONS", "10000"))
+
+_JOB_ID = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+logger = logging.getLogger(__name__)
+
+
+def dedupe_questions(questions: Iterable[str]) -> List[str]:
+    """Drop blank questions and repeats (compared normalized), keeping first occurrences in order"""
+    unique: Dict[str, str] = {}
+    for question in questions:
+        key = normalize_question(question)
+        if key and key not in unique:
+            unique[key] = question.strip()
+    return list(unique.values())
+
+
+def group_questions(questions: List[str], snapshot) -> List[List[str]]:
+    """
+    Group questions by the catalog entity that ranks first for each
+
+    Questions about the same application or capability then share one
+    context, built under the usual per-question token budget, instead of
+    the whole batch competing for a single one. Questions that match no
+    entity form a group of their own.
+
+    Templated questions that each name a different entity ("Summarize
+    dependencies of APP001", "... of APP002", ...) end up one per group, so
+    they get one context each, as if asked separately; sharing only pays
+    off for questions about the same entity.
+    """
+    retriever = retriever_for(snapshot)
+    groups: Dict[Optional[tuple], List[str]] = {}
+    for question in questions:
+        hits = retriever.search(question, limit=1)
+        key = hits[0][:2] if hits else None
+        groups.setdefault(key, []).append(question)
+    return list(groups.values())
+
+
+def job_id_for(questions: List[str]) -> str:
+    """Stable job id for a deduplicated list of questions"""
+    digest = hashlib.sha1("\n".join(normalize_question(q) for q in questions).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class BatchJob:
+    """A batch of questions and the results recorded for it so far"""
+
+    def __init__(self, job_id: str, questions: List[str], output_dir: str):
+        self.job_id = job_id
+        self.questions = questions
+        self.manifest_path = os.path.join(output_dir, f"{job_id}.json")
+        self.results_path = os.path.join(output_dir, f"{job_id}.jsonl")
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # Normalized question -> latest result line
+        self.results: Dict[str, Dict] = {}
+        self.task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def load(cls, job_id: str, output_dir: str) -> Optional["BatchJob"]:
+        """Read a job and its recorded results back from disk, or None if unknown"""
+        try:
+            with open(os.path.join(output_dir, f"{job_id}.json"), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        job = cls(job_id, manifest["questions"], output_dir)
+        for name in ("status", "error", "created_at", "started_at", "finished_at"):
+            setattr(job, name, manifest.get(name))
+        job._load_results()
+        return job
+
+    def _load_results(self) -> None:
+        try:
+            with open(self.results_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        result = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash; that question is simply asked again
+                        continue
+                    self.results[normalize_question(result["question"])] = result
+        except FileNotFoundError:
+            pass
+
+    def _answered(self, question: str) -> bool:
+        result = self.results.get(normalize_question(question))
+        return result is not None and result.get("error") is None
+
+    def pending_questions(self) -> List[str]:
+        """Questions without a successful result yet; failed ones are asked again"""
+        return [question for question in self.questions if not self._answered(question)]
+
+    def save(self) -> None:
+        manifest = {
+            "job_id": self.job_id,
+            "questions": self.questions,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        tmp_path = f"{self.manifest_path}.tmp.{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def to_dict(self, include_results: bool = False) -> Dict:
+        failed = sum(1 for result in self.results.values() if result.get("error") is not None)
+        body = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "error": self.error,
+            "total": len(self.questions),
+            "completed": len(self.results) - failed,
+            "failed": failed,
+            "pending": len(self.pending_questions()),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if include_results:
+            body["results"] = [self.results[normalize_question(q)] for q in self.questions
+                               if normalize_question(q) in self.results]
+        return body
+
+
+class BatchRunner:
+    """
+    Runs batch jobs on the event loop and keeps track of them.
+
+    Args:
+        client_provider: Returns the model client (VertexClient or GeminiClient)
+        snapshot_provider: Returns the current catalog snapshot
+        output_dir (str): Where job manifests and results are written
+    """
+
+    def __init__(self,
+                 client_provider: Callable,
+                 snapshot_provider: Callable,
+                 output_dir: str = BATCH_DIR,
+                 concurrency: int = BATCH_CONCURRENCY,
+                 rate_per_second: float = BATCH_RATE_PER_SECOND,
+                 burst: int = BATCH_RATE_BURST):
+        self.client_provider = client_provider
+        self.snapshot_provider = snapshot_provider
+        self.output_dir = output_dir
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate_per_second, burst)
+        self.jobs: Dict[str, BatchJob] = {}
+
+    def create(self, questions: Iterable[str], job_id: Optional[str] = None) -> BatchJob:
+        """
+        Create a job, or reopen the existing job with the same id
+
+        Raises:
+            ValueError: If there are no questions, too many, or the job id is invalid
+        """
+        unique = dedupe_questions(questions)
+        if not unique:
+            raise ValueError("No questions given")
+        if len(unique) > MAX_BATCH_QUESTIONS:
+            raise ValueError(f"At most {MAX_BATCH_QUESTIONS} questions per batch")
+        job_id = job_id or job_id_for(unique)
+        if not _JOB_ID.match(job_id):
+            raise ValueError("job_id may only contain letters, digits, '.', '_' and '-' (at most 64)")
+
+        job = self.get(job_id)
+        if job is None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            job = BatchJob(job_id, unique, self.output_dir)
+            job.save()
+        elif job.questions != unique:
+            # Same id, new questions: answer those too, keeping earlier results
+            job.questions = dedupe_questions(job.questions + unique)
+            job.save()
+        self.jobs[job_id] = job
+        return job
+
+    def submit(self, questions: Iterable[str], job_id: Optional[str] = None) -> BatchJob:
+        """Create or reopen a job and run it in the background unless it is already running"""
+        job = self.create(questions, job_id)
+        if job.task is None or job.task.done():
+            job.task = asyncio.get_running_loop().create_task(self.run(job))
+        return job
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        """A job started by this process, or one recorded on disk"""
+        if not _JOB_ID.match(job_id):
+            return None
+        return self.jobs.get(job_id) or BatchJob.load(job_id, self.output_dir)
+
+    @staticmethod
+    def _group_contexts(client, questions: List[str], snapshot) -> List[Tuple[List[str], str]]:
+        """One context per group of related questions instead of one per question"""
+        return [(group, client.analysis_context("\n".join(group), snapshot))
+                for group in group_questions(questions, snapshot)]
+
+    async def run(self, job: BatchJob) -> BatchJob:
+        """
+        Answer every pending question of a job, appending each result as it completes
+
+        Questions added to the job while it runs are answered by the same run.
+        """
+        job.status = "running"
+        job.error = None
+        job.started_at = time.time()
+        job.finished_at = None
+        job.save()
+        try:
+            client = self.client_provider()
+            snapshot = self.snapshot_provider()
+            semaphore = asyncio.Semaphore(self.concurrency)
+            write_lock = asyncio.Lock()
+            attempted = set()
+            with open(job.results_path, "a", encoding="utf-8") as out:
+                def append(line: str) -> None:
+                    out.write(line)
+                    out.flush()
+
+                async def answer(question: str, context: str) -> None:
+                    async with semaphore:
+                        await self.limiter.acquire()
+                        started = time.perf_counter()
+                        result = {"question": question, "response": None, "error": None}
+                        try:
+                            result["response"] = await client.analyze_application_capability(
+                                question, snapshot, context=context, raise_errors=True)
+                        except Exception as e:
+                            result["error"] = str(e)
+                        result["data_version"] = snapshot.version
+                        result["seconds"] = round(time.perf_counter() - started, 3)
+                        job.results[normalize_question(question)] = result
+                        # One append at a time, off the event loop
+                        async with write_lock:
+                            await asyncio.to_thread(append, json.dumps(result) + "\n")
+
+                # Questions added by a resubmission while this run is going are
+                # picked up by the next round; each question is asked once per run
+                while True:
+                    pending = [question for question in job.pending_questions()
+                               if normalize_question(question) not in attempted]
+                    if not pending:
+                        break
+                    attempted.update(normalize_question(question) for question in pending)
+                    # Retrieval over thousands of questions would stall the event loop
+                    contexts = await asyncio.to_thread(self._group_contexts, client, pending, snapshot)
+                    await asyncio.gather(*(answer(question, context)
+                                           for group, context in contexts for question in group))
+            # Failed questions stay pending; running the job again retries them
+            job.status = "incomplete" if job.pending_questions() else "completed"
+        except Exception as e:
+            logger.exception("Batch job %s failed", job.job_id)
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            job.save()
+        return job
+
+
+if __name__ == "__main__":
+    # Usage: python -m llm_chat.batch_runner questions.txt [job_id]
+    from utils.data_processor import DataProcessor
+    from llm_chat.vertex_client import VertexClient
+
+    logging.basicConfig(level=logging.INFO)
+    with open(sys.argv[1], encoding="utf-8") as f:
+        questions = f.read().splitlines()
+    data_processor = DataProcessor()
+    vertex_client = VertexClient(data_processor)
+    runner = BatchRunner(lambda: vertex_client, data_processor.snapshot)
+    job = runner.create(questions, sys.argv[2] if len(sys.argv) > 2 else None)
+    print(f"Job {job.job_id}: {len(job.pending_questions())} of {len(job.questions)} questions to answer")
+    started = time.perf_counter()
+    asyncio.run(runner.run(job))
+    print(json.dumps(job.to_dict()), f"in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,249 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional
+
+
+class LLMTimeoutError(Exception):
+    """Raised when an LLM call exceeds its time limit"""
+
+
+class LLMCallGate:
+    """
+    Admission control for upstream LLM calls.
+
+    - At most ``max_concurrency`` calls run at once; the rest wait.
+    - Each call is bounded by ``timeout_seconds``. A blocking call that
+      times out keeps its slot until its thread actually returns, so the
+      pool never holds more than ``max_concurrency`` calls.
+    - Calls sharing a key while one is in flight await that call instead
+      of issuing their own (request coalescing).
+    - Blocking SDK calls run on a dedicated thread pool so they never
+      stall the event loop.
+
+    Streamed calls hold a concurrency slot until the stream ends (for
+    blocking streams, until their thread returns) and are never coalesced,
+    since each caller consumes its own stream.
+    """
+
+    def __init__(self, max_concurrency: int = 8, timeout_seconds: float = 60.0):
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.coalesced = 0
+        # Calls holding a slot, including timed-out ones still running
+        self.running = 0
+
+    @classmethod
+    def from_env(cls) -> "LLMCallGate":
+        """Configure from LLM_MAX_CONCURRENCY and LLM_TIMEOUT_SECONDS"""
+        return cls(
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+            timeout_seconds=float(os.getenv("LLM_TIMEOUT_SECONDS", "60")),
+        )
+
+    def warm(self) -> None:
+        """Start every worker thread of the pool now rather than on the first calls"""
+        barrier = threading.Barrier(self.max_concurrency)
+        futures = [self.executor.submit(barrier.wait, 5) for _ in range(self.max_concurrency)]
+        for future in futures:
+            try:
+                future.result()
+            except threading.BrokenBarrierError:
+                # Some threads were busy; the pool is warm enough
+                pass
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def run_blocking(self, func: Callable, *args, key: Optional[str] = None):
+        """Run a blocking function on the LLM thread pool under the gate"""
+        loop = asyncio.get_running_loop()
+        # A thread cannot be cancelled: on timeout the call runs on in its slot
+        return await self.run(lambda: loop.run_in_executor(self.executor, lambda: func(*args)), key=key,
+                              cancel_on_timeout=False)
+
+    async def run(self, call: Callable[[], Awaitable], key: Optional[str] = None, cancel_on_timeout: bool = True):
+        """
+        Await ``call()`` under the concurrency limit and timeout
+
+        Args:
+            call: Zero-argument callable returning an awaitable
+            key (str, optional): Identical in-flight keys share one call
+            cancel_on_timeout (bool): Cancel the call when it times out; either
+                way its slot is only freed once the call has ended
+
+        Returns:
+            The call's result
+        """
+        if key is not None:
+            pending = self._in_flight.get(key)
+            if pending is not None:
+                self.coalesced += 1
+                # shield: one waiter being cancelled must not cancel the shared call
+                return await asyncio.shield(pending)
+            future = asyncio.ensure_future(self._run_limited(call, cancel_on_timeout))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+            return await asyncio.shield(future)
+        return await self._run_limited(call, cancel_on_timeout)
+
+    def _forget(self, key: str, future: asyncio.Future) -> None:
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+
+    def _release(self, work: asyncio.Future) -> None:
+        self.running -= 1
+        self.semaphore.release()
+        if not work.cancelled():
+            # Retrieve the outcome of calls nobody awaits any more
+            work.exception()
+
+    async def _run_limited(self, call: Callable[[], Awaitable], cancel_on_timeout: bool = True):
+        await self.semaphore.acquire()
+        try:
+            work = asyncio.ensure_future(call())
+        except BaseException:
+            self.semaphore.release()
+            raise
+        self.running += 1
+        # The slot follows the call itself, not the caller waiting on it
+        work.add_done_callback(self._release)
+        try:
+            return await asyncio.wait_for(asyncio.shield(work), timeout=self.timeout_seconds)
+        except asyncio.TimeoutError:
+            if cancel_on_timeout:
+                work.cancel()
+            raise LLMTimeoutError(f"LLM call timed out after {self.timeout_seconds:.0f}s")
+        except asyncio.CancelledError:
+            if cancel_on_timeout:
+                work.cancel()
+            raise
+
+    async def stream(self, open_stream: Callable[[], AsyncIterator]) -> AsyncIterator:
+        """
+        Relay the chunks of ``open_stream()`` under the concurrency limit
+
+        The timeout applies to the whole stream.
+        """
+        async with self.semaphore:
+            async for chunk in self._relay(open_stream()):
+                yield chunk
+
+    async def _relay(self, stream: AsyncIterator) -> AsyncIterator:
+        deadline = time.monotonic() + self.timeout_seconds
+        iterator = stream.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(iterator.__anext__(), timeout=max(deadline - time.monotonic(), 0))
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                raise LLMTimeoutError(f"LLM stream timed out after {self.timeout_seconds:.0f}s")
+            yield chunk
+
+    async def stream_blocking(self, func: Callable[..., Iterable], *args) -> AsyncIterator:
+        """
+        Relay a blocking iterator (e.g. an SDK streaming call) from the LLM thread pool
+
+        Chunks are handed to the event loop as they arrive. If the consumer
+        stops early or the stream times out, the worker thread stops at the
+        next chunk; like a timed-out blocking call, the stream keeps its
+        slot until that thread has returned.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        done = object()
+
+        def release() -> None:
+            self.running -= 1
+            self.semaphore.release()
+
+        def pump():
+            try:
+                for chunk in func(*args):
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, (chunk, None))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, (done, e))
+            else:
+                loop.call_soon_threadsafe(queue.put_nowait, (done, None))
+            finally:
+                # The slot follows the thread, not the consumer
+                try:
+                    loop.call_soon_threadsafe(release)
+                except RuntimeError:
+                    # The event loop is gone, and its semaphore with it
+                    pass
+
+        async def relay():
+            while True:
+                chunk, error = await queue.get()
+                if chunk is done:
+                    if error is not None:
+                        raise error
+                    return
+                yield chunk
+
+        await self.semaphore.acquire()
+        self.running += 1
+        try:
+            loop.run_in_executor(self.executor, pump)
+        except BaseException:
+            release()
+            raise
+        try:
+            async for chunk in self._relay(relay()):
+                yield chunk
+        finally:
+            stop.set()
+
+    def stats(self) -> Dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": len(self._in_flight),
+            "running": self.running,
+            "coalesced": self.coalesced,
+            "timeout_seconds": self.timeout_seconds,
+        }
+
+
+class RateLimiter:
+    """
+    Token bucket: on average ``rate`` acquisitions per second, bursts up to ``burst``
+
+    A rate of 0 or less disables the limit.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
@@ -0,0 +1,110 @@
+import os
+from typing import Dict, List, Optional
+
+from llm_chat.prompt_encoding import SEPARATOR, encode_catalog, estimate_tokens, cell_text
+from utils.retrieval import retriever_for
+
+# Approximate prompt tokens allowed for catalog data
+DEFAULT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+# Entities considered from the retrieval ranking
+MAX_RETRIEVED_ENTITIES = int(os.getenv("PROMPT_MAX_ENTITIES", "25"))
+# Mapping rows included per entity and direction
+MAX_MAPPINGS_PER_ENTITY = 50
+# Every catalog row costs at least this many tokens when encoded
+_MIN_ROW_TOKENS = 3
+
+
+def _render(apps: List[Dict], caps: List[Dict], consumes: List[Dict], provides: List[Dict], note: str = "") -> str:
+    context = "\n" + encode_catalog(apps, caps, consumes, provides) + "\n"
+    if note:
+        context += f"\n{note}\n"
+    return context
+
+
+def _row_tokens(table: str, row: Dict) -> int:
+    """Encoded size of a row: mappings only cost their ids"""
+    if table in ("consumes", "provides"):
+        return estimate_tokens(f"{row['application_id']},{row['capability_id']}")
+    return estimate_tokens(SEPARATOR.join(cell_text(value) for value in row.values()))
+
+
+class _Selection:
+    """Rows picked for the prompt, de-duplicated and costed as they are added"""
+
+    def __init__(self, token_budget: int):
+        self.token_budget = token_budget
+        self.tokens = 0
+        self.tables = {name: {} for name in ("apps", "caps", "consumes", "provides")}
+
+    def add(self, table: str, key, row: Dict) -> bool:
+        rows = self.tables[table]
+        if key in rows:
+            return True
+        cost = _row_tokens(table, row)
+        if self.tokens + cost > self.token_budget:
+            return False
+        rows[key] = row
+        self.tokens += cost
+        return True
+
+    def rows(self, table: str) -> List[Dict]:
+        return list(self.tables[table].values())
+
+
+def build_context(snapshot, question: str, token_budget: Optional[int] = None) -> str:
+    """
+    Build the catalog context for a question under a token budget
+
+    Small catalogs are sent whole. Otherwise the question is matched against
+    a BM25 index over application and capability text (plus any ids it
+    mentions) and only the best-ranked entities, their mapping rows and the
+    entities on the other side of those mappings are included, in rank
+    order, until the budget is spent.
+
+    Args:
+        snapshot: Catalog snapshot to draw rows from
+        question (str): User's question
+        token_budget (int, optional): Approximate token limit for the data
+
+    Returns:
+        str: Context text to place before the question
+    """
+    budget = token_budget or DEFAULT_TOKEN_BUDGET
+    counts = {table: snapshot.row_count(table) for table in ("applications", "capabilities", "consumes", "provides")}
+    if sum(counts.values()) * _MIN_ROW_TOKENS <= budget:
+        full = _render(*snapshot.as_tuple())
+        if estimate_tokens(full) <= budget:
+            return full
+
+    selection = _Selection(budget)
+    hits = retriever_for(snapshot).search(question, limit=MAX_RETRIEVED_ENTITIES)
+    for kind, entity_id, _ in hits:
+        if kind == "application":
+            if not selection.add("apps", entity_id, snapshot.get_application_details(entity_id)):
+                break
+            related = [("consumes", row) for row in snapshot.get_consumed_capabilities(entity_id)[:MAX_MAPPINGS_PER_ENTITY]]
+            related += [("provides", row) for row in snapshot.get_provided_capabilities(entity_id)[:MAX_MAPPINGS_PER_ENTITY]]
+        else:
+            if not selection.add("caps", entity_id, snapshot.get_capability_details(entity_id)):
+                break
+            related = [("consumes", row) for row in snapshot.get_consuming_applications(entity_id)[:MAX_MAPPINGS_PER_ENTITY]]
+            related += [("provides", row) for row in snapshot.get_providing_applications(entity_id)[:MAX_MAPPINGS_PER_ENTITY]]
+        for table, row in related:
+            if not selection.add(table, (row['application_id'], row['capability_id']), row):
+                break
+
+    # Spend what is left on the entities at the other end of those mappings
+    for table in ("consumes", "provides"):
+        for row in selection.rows(table):
+            app = snapshot.get_application_details(row['application_id'])
+            if app:
+                selection.add("apps", row['application_id'], app)
+            cap = snapshot.get_capability_details(row['capability_id'])
+            if cap:
+                selection.add("caps", row['capability_id'], cap)
+
+    note = (f"Only the {len(selection.tables['apps'])} of {counts['applications']} applications and "
+            f"{len(selection.tables['caps'])} of {counts['capabilities']} capabilities most relevant "
+            f"to the question are shown.")
+    return _render(selection.rows("apps"), selection.rows("caps"),
+                   selection.rows("consumes"), selection.rows("provides"), note)
@@ -1,6 +1,13 @@
 import os
-import google.generativeai as genai
+import hashlib
+import time
+from typing import AsyncIterator, Optional
 from dotenv import load_dotenv
+from llm_chat.context_builder import build_context
+from llm_chat.prompt_encoding import estimate_tokens
+from llm_chat.response_cache import ResponseCache
+from llm_chat.concurrency import LLMCallGate
+from utils.metrics import LLM_FIRST_TOKEN_SECONDS, LLM_PROMPT_TOKENS, LLM_TOKENS, stage
 
 class GeminiClient:
     def __init__(self):
@@ -9,6 +16,9 @@ class GeminiClient:
         if not api_key:
             raise ValueError("GOOGLE_API_KEY not found in environment variables")
         
+        # Imported here: the SDK is slow to import and only needed once a client is built
+        import google.generativeai as genai
+
         genai.configure(api_key=api_key)
         # List available models
         try:
@@ -16,54 +26,135 @@ class GeminiClient:
             if not models:
                 raise ValueError("No suitable models found")
             # Use the first available model that supports generateContent
-            self.model = genai.GenerativeModel(models[0].name)
+            self.model_name = models[0].name
+            self.model = genai.GenerativeModel(self.model_name)
         except Exception as e:
             raise ValueError(f"Error initializing Gemini model: {str(e)}")
+        # Answers keyed on question, model and catalog data version
+        self.cache = ResponseCache.from_env()
+        # Bounded, coalesced upstream calls
+        self.gate = LLMCallGate.from_env()
+        # Estimated prompt tokens sent upstream
+        self.prompt_tokens = 0
         
-    async def get_response(self, prompt: str, context: str = None) -> str:
+    async def get_response(self, prompt: str, context: str = None, data_version: str = None) -> str:
         """
         Get a response from Gemini model
         
         Args:
             prompt (str): The user's question or prompt
             context (str, optional): Additional context for the model
+            data_version (str, optional): Catalog version the context was built from;
+                when given, the response is cached under it
             
         Returns:
             str: The model's response
         """
         try:
-            full_prompt = f"{context}\n\n{prompt}" if context else prompt
-            response = await self.model.generate_content_async(full_prompt)
-            return response.text
+            return await self.fetch_response(prompt, context, data_version)
         except Exception as e:
             return f"Error getting response from Gemini: {str(e)}"
     
-    async def analyze_application_capability(self, 
-                                          application_data: dict,
-                                          capability_data: dict,
-                                          consumes_mapping: dict,
-                                          provides_mapping: dict,
-                                          question: str) -> str:
+    async def fetch_response(self, prompt: str, context: str = None, data_version: str = None) -> str:
+        """Like get_response, but upstream failures are raised instead of returned as text"""
+        full_prompt = f"{context}\n\n{prompt}" if context else prompt
+        
+        cache_key = None
+        if data_version is not None:
+            cache_key = self.cache.make_key(prompt, self.model_name, data_version, context or "")
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        self._count_prompt_tokens(full_prompt)
+        flight_key = cache_key or hashlib.sha256(full_prompt.encode("utf-8")).hexdigest()
+        with stage("llm_call"):
+            response = await self.gate.run(lambda: self.model.generate_content_async(full_prompt), key=flight_key)
+        LLM_TOKENS.inc(estimate_tokens(response.text), model=self.model_name, direction="response")
+        if cache_key is not None:
+            self.cache.set(cache_key, response.text)
+        return response.text
+    
+    def _count_prompt_tokens(self, full_prompt: str) -> None:
+        prompt_tokens = estimate_tokens(full_prompt)
+        self.prompt_tokens += prompt_tokens
+        LLM_PROMPT_TOKENS.observe(prompt_tokens, model=self.model_name)
+        LLM_TOKENS.inc(prompt_tokens, model=self.model_name, direction="prompt")
+    
+    async def stream_response(self, prompt: str, context: str = None, data_version: str = None) -> AsyncIterator[str]:
+        """
+        Like get_response, but yield the model's reply as it is generated
+        
+        A cached reply is yielded in one piece. Errors are raised rather than
+        returned as text, since part of the reply may already have been sent.
+        """
+        full_prompt = f"{context}\n\n{prompt}" if context else prompt
+        
+        cache_key = None
+        if data_version is not None:
+            cache_key = self.cache.make_key(prompt, self.model_name, data_version, context or "")
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        self._count_prompt_tokens(full_prompt)
+        
+        async def chunks():
+            response = await self.model.generate_content_async(full_prompt, stream=True)
+            async for chunk in response:
+                yield chunk.text
+        
+        parts = []
+        start = time.perf_counter()
+        with stage("llm_call"):
+            async for text in self.gate.stream(chunks):
+                if not parts:
+                    LLM_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - start, model=self.model_name)
+                parts.append(text)
+                yield text
+        text = "".join(parts)
+        LLM_TOKENS.inc(estimate_tokens(text), model=self.model_name, direction="response")
+        if cache_key is not None:
+            self.cache.set(cache_key, text)
+    
+    def analysis_context(self, question: str, snapshot) -> str:
+        """Catalog context for a question (or for several, joined), ready to prefix the prompt"""
+        with stage("prompt_build"):
+            context = build_context(snapshot, question)
+        return context + """
+        Please analyze this data and answer the following question:
+        """
+    
+    async def analyze_application_capability(self, question: str, snapshot, context: Optional[str] = None,
+                                             raise_errors: bool = False) -> str:
         """
         Analyze application-capability relationships using Gemini
         
+        Only the catalog rows relevant to the question are put in the prompt,
+        selected by retrieval under the PROMPT_TOKEN_BUDGET token budget.
+        
         Args:
-            application_data (dict): Application catalog data
-            capability_data (dict): Capability catalog data
-            consumes_mapping (dict): Application consumes capability mapping
-            provides_mapping (dict): Application provides capability mapping
             question (str): User's question about the data
+            snapshot: Catalog snapshot to draw data from
+            context (str, optional): Prebuilt analysis_context, e.g. shared by a batch
+            raise_errors (bool): Raise model call failures instead of answering with the error text
             
         Returns:
             str: Analysis result from Gemini
         """
-        context = f"""
-        Application Catalog: {application_data}
-        Capability Catalog: {capability_data}
-        Consumes Mapping: {consumes_mapping}
-        Provides Mapping: {provides_mapping}
-        
-        Please analyze this data and answer the following question:
+        if context is None:
+            context = self.analysis_context(question, snapshot)
+        fetch = self.fetch_response if raise_errors else self.get_response
+        return await fetch(question, context, data_version=snapshot.version)
+    
+    async def stream_analysis(self, question: str, snapshot) -> AsyncIterator[str]:
         """
+        Streaming variant of analyze_application_capability
         
-        return await self.get_response(question, context) 
\ No newline at end of file
+        Yields:
+            str: Successive pieces of the answer
+        """
+        context = self.analysis_context(question, snapshot)
+        async for text in self.stream_response(question, context, data_version=snapshot.version):
+            yield text
@@ -0,0 +1,111 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+# Delay between failed initialization attempts, doubling up to the maximum
+LLM_INIT_RETRY_SECONDS = float(os.getenv("LLM_INIT_RETRY_SECONDS", "2"))
+LLM_INIT_MAX_RETRY_SECONDS = float(os.getenv("LLM_INIT_MAX_RETRY_SECONDS", "60"))
+
+ClientT = TypeVar("ClientT")
+
+
+class ModelNotReadyError(Exception):
+    """Raised when the model client has not finished initializing"""
+
+
+class LazyModelClient(Generic[ClientT]):
+    """
+    Model client built on a background thread instead of at import time.
+
+    SDK imports, authentication and model lookups all happen in ``factory``,
+    so the server starts serving catalog endpoints immediately and keeps
+    serving them while the LLM backend is unreachable. Failed attempts are
+    retried with exponential backoff. Once the client exists, the worker
+    threads of its call gate are started ahead of the first request.
+    """
+
+    def __init__(self, factory: Callable[[], ClientT], name: str = "llm"):
+        self.factory = factory
+        self.name = name
+        self._client: Optional[ClientT] = None
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.init_seconds: Optional[float] = None
+
+    def start(self) -> None:
+        """Begin initializing in the background; later calls do nothing"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-init", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop retrying a failing initialization"""
+        self._stop.set()
+
+    def _run(self) -> None:
+        started = time.monotonic()
+        delay = LLM_INIT_RETRY_SECONDS
+        while not self._stop.is_set():
+            self.attempts += 1
+            try:
+                client = self.factory()
+                gate = getattr(client, "gate", None)
+                if gate is not None:
+                    gate.warm()
+            except Exception as e:
+                self.error = str(e)
+                logger.warning("Initializing %s failed (attempt %d): %s; retrying in %.1fs",
+                               self.name, self.attempts, e, delay)
+                if self._stop.wait(delay):
+                    return
+                delay = min(delay * 2, LLM_INIT_MAX_RETRY_SECONDS)
+                continue
+            self._client = client
+            self.error = None
+            self.init_seconds = time.monotonic() - started
+            self._ready.set()
+            logger.info("%s ready after %.2fs", self.name, self.init_seconds)
+            return
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Start if needed and block until ready; returns False on timeout"""
+        self.start()
+        return self._ready.wait(timeout)
+
+    def get(self) -> ClientT:
+        """
+        The initialized client
+
+        Raises:
+            ModelNotReadyError: If initialization has not finished yet
+        """
+        if self._client is None:
+            detail = f": {self.error}" if self.error else ""
+            raise ModelNotReadyError(f"{self.name} is still initializing{detail}")
+        return self._client
+
+    def status(self) -> Dict:
+        if self.ready:
+            state = "ready"
+        elif self._thread is None:
+            state = "not_started"
+        else:
+            state = "initializing" if self.error is None else "retrying"
+        return {
+            "state": state,
+            "attempts": self.attempts,
+            "error": self.error,
+            "init_seconds": self.init_seconds,
+        }
@@ -0,0 +1,102 @@
+"""
+Compact text encoding of catalog rows for LLM prompts.
+
+Python reprs of row dictionaries repeat every column name on every row, and
+the mapping rows repeat entity names next to their ids. This encoding writes
+each table's header once, leaves out columns that are empty for every row,
+lists mappings as id adjacency lists, and names each entity exactly once:
+in its own table, or in a short legend if only a mapping mentions it.
+"""
+import math
+from typing import Dict, List, Optional, Sequence
+
+SEPARATOR = "|"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)"""
+    return len(text) // 4 + 1
+
+
+def cell_text(value) -> str:
+    """Single-line cell value; empty for missing values"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    return str(value).strip().replace(SEPARATOR, "/").replace("\n", " ")
+
+
+def _present_columns(rows: Sequence[Dict]) -> List[str]:
+    """Columns, in first-seen order, with a value in at least one row"""
+    columns: List[str] = []
+    for row in rows:
+        for column, value in row.items():
+            if column not in columns and cell_text(value):
+                columns.append(column)
+    return columns
+
+
+def encode_row(row: Dict, columns: Sequence[str]) -> str:
+    return SEPARATOR.join(cell_text(row.get(column)) for column in columns)
+
+
+def encode_table(title: str, rows: Sequence[Dict], columns: Optional[Sequence[str]] = None) -> str:
+    """Header-once table: ``TITLE (col|col|...)`` followed by one line per row"""
+    if not rows:
+        return f"{title}: none"
+    columns = list(columns) if columns is not None else _present_columns(rows)
+    lines = [f"{title} ({SEPARATOR.join(columns)})"]
+    lines.extend(encode_row(row, columns) for row in rows)
+    return "\n".join(lines)
+
+
+def encode_mappings(title: str, rows: Sequence[Dict]) -> str:
+    """Mappings as ``application_id: capability_id,capability_id`` adjacency lines"""
+    if not rows:
+        return f"{title}: none"
+    grouped: Dict[str, List[str]] = {}
+    for row in rows:
+        capabilities = grouped.setdefault(cell_text(row['application_id']), [])
+        capability_id = cell_text(row['capability_id'])
+        if capability_id not in capabilities:
+            capabilities.append(capability_id)
+    lines = [f"{title} (application_id: capability_ids)"]
+    lines.extend(f"{app_id}: {','.join(cap_ids)}" for app_id, cap_ids in grouped.items())
+    return "\n".join(lines)
+
+
+def encode_catalog(apps: Sequence[Dict],
+                   caps: Sequence[Dict],
+                   consumes: Sequence[Dict],
+                   provides: Sequence[Dict]) -> str:
+    """
+    Encode catalog rows for a prompt
+
+    Args:
+        apps (Sequence[Dict]): Application catalog rows
+        caps (Sequence[Dict]): Capability catalog rows
+        consumes (Sequence[Dict]): Consumes mapping rows
+        provides (Sequence[Dict]): Provides mapping rows
+
+    Returns:
+        str: Compact text encoding
+    """
+    sections = [
+        encode_table("APPLICATIONS", apps),
+        encode_table("CAPABILITIES", caps),
+        encode_mappings("CONSUMES", consumes),
+        encode_mappings("PROVIDES", provides),
+    ]
+
+    # Entities only referenced by mappings are named once here
+    listed = {cell_text(app.get('application_id')) for app in apps}
+    listed.update(cell_text(cap.get('capability_id')) for cap in caps)
+    legend: Dict[str, str] = {}
+    for row in list(consumes) + list(provides):
+        for id_column, name_column in (('application_id', 'Application Name'), ('capability_id', 'capability Name')):
+            entity_id = cell_text(row.get(id_column))
+            name = cell_text(row.get(name_column))
+            if entity_id not in listed and name and entity_id not in legend:
+                legend[entity_id] = name
+    if legend:
+        sections.append("NAMES (id=name)\n" + "\n".join(f"{entity_id}={name}" for entity_id, name in legend.items()))
+    return "\n\n".join(sections)
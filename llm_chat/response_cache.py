@@ -0,0 +1,139 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from utils.metrics import CACHE_REQUESTS
+
+
+def normalize_question(question: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation"""
+    return re.sub(r"\s+", " ", question).strip().lower().rstrip("?.! ")
+
+
+class ResponseCache:
+    """
+    Two-tier cache for LLM responses.
+
+    An in-process LRU with a TTL sits in front of an optional SQLite table
+    that survives restarts. Keys include the catalog data version, so a
+    change to the CSVs makes every older entry unreachable.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses "
+                "(key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """Configure from LLM_CACHE_SIZE, LLM_CACHE_TTL and LLM_CACHE_DB"""
+        return cls(
+            max_entries=int(os.getenv("LLM_CACHE_SIZE", "1024")),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL", "3600")),
+            db_path=os.getenv("LLM_CACHE_DB") or None,
+        )
+
+    @staticmethod
+    def make_key(question: str, model: str, data_version: str, context: str = "") -> str:
+        """
+        Cache key for a question
+
+        Args:
+            question (str): The question or prompt; normalized before hashing
+            model (str): Model name
+            data_version (str): Version of the catalog the answer was based on
+            context (str): Extra prompt context, hashed verbatim
+
+        Returns:
+            str: Hex digest
+        """
+        digest = hashlib.sha256()
+        for part in (normalize_question(question), model, data_version, context):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                response, created_at = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    CACHE_REQUESTS.inc(cache="llm_response", result="hit")
+                    return response
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] <= self.ttl_seconds:
+                    self._remember(key, row[0], row[1])
+                    self.disk_hits += 1
+                    CACHE_REQUESTS.inc(cache="llm_response", result="disk_hit")
+                    return row[0]
+
+            self.misses += 1
+            CACHE_REQUESTS.inc(cache="llm_response", result="miss")
+            return None
+
+    def set(self, key: str, response: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, response, now)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_responses (key, response, created_at) VALUES (?, ?, ?)",
+                    (key, response, now)
+                )
+                self._db.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,))
+                self._db.commit()
+
+    def _remember(self, key: str, response: str, created_at: float) -> None:
+        self._entries[key] = (response, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_responses")
+                self._db.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "persistent": self._db is not None,
+            }
@@ -0,0 +1,245 @@
+import asyncio
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+from utils.metrics import stage
+
+# name -> (parameter, description); each maps to the snapshot method of the same name
+TOOLS = {
+    "get_application_details": ("application_id", "Get details for a specific application"),
+    "get_capability_details": ("capability_id", "Get details for a specific capability"),
+    "get_consumed_capabilities": ("application_id", "Get all capabilities consumed by an application"),
+    "get_provided_capabilities": ("application_id", "Get all capabilities provided by an application"),
+    "get_consuming_applications": ("capability_id", "Get all applications that consume a specific capability"),
+    "get_providing_applications": ("capability_id", "Get all applications that provide a specific capability"),
+}
+
+# Mapping columns that repeat what the tool arguments already say
+_REDUNDANT_COLUMNS = ("Application Name", "capability Name")
+
+
+def tools_description() -> str:
+    """Tool list and calling convention placed in every agent prompt"""
+    lines = ["Available Tools:"]
+    for i, (name, (param, description)) in enumerate(TOOLS.items(), start=1):
+        lines.append(f"{i}. {name}({param}): {description}")
+    lines.append("")
+    lines.append("To call tools, reply with JSON only, requesting as many calls as you need at once:")
+    lines.append('{"tool_calls": [{"name": "get_consumed_capabilities", "arguments": {"application_id": "APP001"}},'
+                 ' {"name": "get_capability_details", "arguments": {"capability_id": "CAP002"}}]}')
+    lines.append("When you can answer, reply with JSON only:")
+    lines.append('{"answer": "<your analysis>"}')
+    return "\n".join(lines)
+
+
+def compact_json(value) -> str:
+    """JSON without whitespace, for tool results fed back to the model"""
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+def _extract_json(text: str) -> Optional[Dict]:
+    """First JSON object in a model reply, tolerating code fences and prose"""
+    cleaned = re.sub(r"```(?:json)?", "", text)
+    start = cleaned.find("{")
+    while start != -1:
+        try:
+            value, _ = json.JSONDecoder().raw_decode(cleaned[start:])
+            if isinstance(value, dict):
+                return value
+        except ValueError:
+            pass
+        start = cleaned.find("{", start + 1)
+    return None
+
+
+def _legacy_tool_call(line: str) -> Dict:
+    """Parse the old ``TOOL: name param=value`` / ``TOOL: name('value')`` format"""
+    body = line[len("TOOL:"):].strip()
+    match = re.match(r"(\w+)\s*\(\s*['\"]?([^'\")]*)['\"]?\s*\)", body)
+    if match:
+        name, value = match.groups()
+        return {"name": name, "arguments": {TOOLS.get(name, ("id",))[0]: value}}
+    parts = body.split()
+    arguments = {}
+    for part in parts[1:]:
+        if "=" in part:
+            key, value = part.split("=", 1)
+            arguments[key] = value.strip("'\",")
+        elif parts[0] in TOOLS:
+            arguments[TOOLS[parts[0]][0]] = part.strip("'\",")
+    return {"name": parts[0] if parts else "", "arguments": arguments}
+
+
+def parse_model_output(text: str) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Split a model reply into tool calls and/or a final answer
+
+    Returns:
+        Tuple[List[Dict], Optional[str]]: Requested tool calls (possibly empty)
+        and the answer text (None when the model only asked for tools)
+    """
+    value = _extract_json(text)
+    if value is not None and ("tool_calls" in value or "answer" in value):
+        calls = [call for call in value.get("tool_calls") or [] if isinstance(call, dict) and call.get("name")]
+        answer = value.get("answer")
+        return calls, (str(answer) if answer is not None else None)
+
+    stripped = text.strip()
+    calls = [_legacy_tool_call(line.strip()) for line in stripped.splitlines() if line.strip().startswith("TOOL:")]
+    if calls:
+        return calls, None
+    if stripped.startswith("ANSWER:"):
+        stripped = stripped[len("ANSWER:"):].strip()
+    return [], stripped
+
+
+_JSON_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+_ANSWER_START = re.compile(r'"answer"\s*:\s*"')
+
+
+class AnswerStream:
+    """
+    Incremental reader for a streamed model reply
+
+    ``feed`` returns the part of the final answer that can be shown so far:
+    the decoded contents of the ``answer`` string for JSON replies, or the
+    text itself (minus any ``ANSWER:`` prefix) for plain replies. Replies
+    that request tools show nothing; ``text`` keeps the whole reply for
+    ``parse_model_output`` once the stream ends.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.shown = ""
+        self._mode: Optional[str] = None
+        self._position = 0
+        self._escape = ""
+        self._closed = False
+
+    def feed(self, chunk: str) -> str:
+        self.text += chunk
+        if self._mode is None:
+            self._detect_mode()
+        if self._mode == "text":
+            if not self.shown:
+                # Skip whitespace before the first visible character
+                while self._position < len(self.text) and self.text[self._position].isspace():
+                    self._position += 1
+            delta = self.text[self._position + len(self.shown):]
+            self.shown += delta
+            return delta
+        if self._mode == "json":
+            return self._feed_json()
+        return ""
+
+    def finish(self) -> Tuple[List[Dict], str]:
+        """
+        Interpret the complete reply once the stream has ended
+
+        Returns:
+            Tuple[List[Dict], str]: Requested tool calls (possibly empty), and
+            the answer text not already returned by ``feed``
+        """
+        calls, answer = parse_model_output(self.text)
+        if calls and not self.shown:
+            return calls, ""
+        answer = answer if answer is not None else self.text
+        if answer.startswith(self.shown):
+            return [], answer[len(self.shown):]
+        return [], "" if self.shown else answer
+
+    def _detect_mode(self) -> None:
+        stripped = re.sub(r"^\s*(```(?:json)?\s*)?", "", self.text)
+        # Too short to tell a prefix or code fence from answer text yet
+        if not stripped or "```json".startswith(self.text.lstrip()) \
+                or any(marker.startswith(stripped) for marker in ("ANSWER:", "TOOL:")):
+            return
+        offset = len(self.text) - len(stripped)
+        if stripped.startswith("{"):
+            self._mode = "json"
+        elif stripped.startswith("TOOL:"):
+            self._mode = "tools"
+        else:
+            self._mode = "text"
+            self._position = offset + (len("ANSWER:") if stripped.startswith("ANSWER:") else 0)
+
+    def _feed_json(self) -> str:
+        if self._closed:
+            return ""
+        if self._position == 0:
+            if '"tool_calls"' in self.text and '"answer"' not in self.text:
+                return ""
+            match = _ANSWER_START.search(self.text)
+            if match is None:
+                return ""
+            self._position = match.end()
+        out = []
+        raw = self._escape + self.text[self._position:]
+        self._position = len(self.text)
+        self._escape = ""
+        i = 0
+        while i < len(raw):
+            char = raw[i]
+            if char == "\\":
+                if i + 1 >= len(raw):
+                    self._escape = raw[i:]
+                    break
+                code = raw[i + 1]
+                if code == "u":
+                    if i + 6 > len(raw):
+                        self._escape = raw[i:]
+                        break
+                    out.append(chr(int(raw[i + 2:i + 6], 16)))
+                    i += 6
+                    continue
+                out.append(_JSON_ESCAPES.get(code, code))
+                i += 2
+                continue
+            if char == '"':
+                self._closed = True
+                break
+            out.append(char)
+            i += 1
+        delta = "".join(out)
+        self.shown += delta
+        return delta
+
+
+def execute_tool(snapshot, call: Dict) -> Dict:
+    """Run one tool call against a catalog snapshot"""
+    name = call.get("name")
+    arguments = call.get("arguments") or {}
+    result = {"tool": name, "arguments": arguments}
+    if name not in TOOLS:
+        result["error"] = f"Unknown tool: {name}"
+        return result
+    param = TOOLS[name][0]
+    if param not in arguments:
+        result["error"] = f"Missing argument: {param}"
+        return result
+    try:
+        value = getattr(snapshot, name)(str(arguments[param]).strip())
+    except Exception as e:
+        result["error"] = f"Error executing tool {name}: {str(e)}"
+        return result
+    if isinstance(value, list):
+        value = [{k: v for k, v in row.items() if k not in _REDUNDANT_COLUMNS} for row in value]
+    result["result"] = value
+    return result
+
+
+async def execute_tool_calls(snapshot, calls: List[Dict]) -> List[Dict]:
+    """
+    Run several tool calls concurrently against one snapshot
+
+    Identical calls are executed once.
+    """
+    unique = {}
+    for call in calls:
+        unique.setdefault(compact_json([call.get("name"), call.get("arguments")]), call)
+    loop = asyncio.get_running_loop()
+    with stage("tool_execution"):
+        return list(await asyncio.gather(*(
+            loop.run_in_executor(None, execute_tool, snapshot, call) for call in unique.values()
+        )))
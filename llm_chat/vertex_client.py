@@ -1,10 +1,34 @@
 import os
-from google.cloud import aiplatform
+import hashlib
+import time
+from typing import AsyncIterator, Optional
 from dotenv import load_dotenv
+from llm_chat.context_builder import build_context
+from llm_chat.prompt_encoding import estimate_tokens
+from llm_chat.response_cache import ResponseCache
+from llm_chat.concurrency import LLMCallGate
+from llm_chat.tools import (AnswerStream, compact_json, execute_tool_calls, parse_model_output,
+                            tools_description)
 from utils.data_processor import DataProcessor
+from utils.metrics import LLM_FIRST_TOKEN_SECONDS, LLM_PROMPT_TOKENS, LLM_TOKENS, stage
+
+# Agent loop limits
+AGENT_MAX_STEPS = int(os.getenv("AGENT_MAX_STEPS", "4"))
+AGENT_MAX_SECONDS = float(os.getenv("AGENT_MAX_SECONDS", "45"))
+AGENT_MAX_TOOL_CALLS = int(os.getenv("AGENT_MAX_TOOL_CALLS", "8"))
+
+def _step_prompt(question: str, tool_results: list) -> str:
+    if not tool_results:
+        return question
+    return question + "\n\nTool results so far:\n" + "\n".join(compact_json(result) for result in tool_results)
+
+def _final_prompt(question: str, tool_results: list) -> str:
+    # Out of steps or time: ask for the best answer from what was gathered
+    return (f"{question}\n\nTool results:\n" + "\n".join(compact_json(result) for result in tool_results)
+            + "\n\nNo more tools can be called. Answer now with the information above.")
 
 class VertexClient:
-    def __init__(self):
+    def __init__(self, data_processor: DataProcessor = None):
         load_dotenv()
         # Initialize Vertex AI
         project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
@@ -14,149 +38,211 @@ class VertexClient:
             raise ValueError("GOOGLE_CLOUD_PROJECT not found in environment variables")
         
         try:
+            # Imported here: the SDK takes seconds to import and is only needed once a client is built
+            from google.cloud import aiplatform
+
             aiplatform.init(project=project_id, location=location)
             # Get the default text model
-            self.model = aiplatform.TextGenerationModel.from_pretrained("text-bison@002")
-            # Initialize DataProcessor
-            self.data_processor = DataProcessor()
+            self.model_name = "text-bison@002"
+            self.model = aiplatform.TextGenerationModel.from_pretrained(self.model_name)
+            # Share the caller's DataProcessor so tools hit the same resident indexes
+            self.data_processor = data_processor or DataProcessor()
         except Exception as e:
             raise ValueError(f"Error initializing Vertex AI model: {str(e)}")
+        # Answers keyed on question, model and catalog data version
+        self.cache = ResponseCache.from_env()
+        # predict() is blocking: run it off the event loop, bounded and coalesced
+        self.gate = LLMCallGate.from_env()
+        # Model round trips per analyzed question
+        self.agent_questions = 0
+        self.agent_model_calls = 0
+        # Estimated prompt tokens sent upstream
+        self.prompt_tokens = 0
     
     def _get_tools_description(self) -> str:
         """Get description of available tools"""
-        return """
-        Available Tools:
-        1. get_application_details(application_id): Get details for a specific application
-        2. get_capability_details(capability_id): Get details for a specific capability
-        3. get_consumed_capabilities(application_id): Get all capabilities consumed by an application
-        4. get_provided_capabilities(application_id): Get all capabilities provided by an application
-        5. get_consuming_applications(capability_id): Get all applications that consume a specific capability
-        6. get_providing_applications(capability_id): Get all applications that provide a specific capability
-        
-        To use these tools, you can call them with appropriate parameters. For example:
-        - To get details of application 'APP001': get_application_details('APP001')
-        - To get capabilities consumed by 'APP001': get_consumed_capabilities('APP001')
-        """
+        return tools_description()
     
-    def _execute_tool(self, tool_name: str, params: dict) -> str:
-        """Execute a tool based on its name and parameters"""
-        try:
-            if tool_name == "get_application_details":
-                return str(self.data_processor.get_application_details(params['application_id'], self.app_catalog))
-            elif tool_name == "get_capability_details":
-                return str(self.data_processor.get_capability_details(params['capability_id'], self.cap_catalog))
-            elif tool_name == "get_consumed_capabilities":
-                return str(self.data_processor.get_consumed_capabilities(params['application_id'], self.consumes_mapping))
-            elif tool_name == "get_provided_capabilities":
-                return str(self.data_processor.get_provided_capabilities(params['application_id'], self.provides_mapping))
-            elif tool_name == "get_consuming_applications":
-                return str(self.data_processor.get_consuming_applications(params['capability_id'], self.consumes_mapping))
-            elif tool_name == "get_providing_applications":
-                return str(self.data_processor.get_providing_applications(params['capability_id'], self.provides_mapping))
-            else:
-                return f"Unknown tool: {tool_name}"
-        except Exception as e:
-            return f"Error executing tool {tool_name}: {str(e)}"
+    def _build_prompt(self, prompt: str, context: str = None):
+        """Full context (tools description plus catalog context) and the complete model prompt"""
+        # Add tools description to the context
+        tools_description = self._get_tools_description()
+        full_context = f"{tools_description}\n\n{context}" if context else tools_description
         
-    async def get_response(self, prompt: str, context: str = None) -> str:
+        # Create the full prompt
+        full_prompt = f"""
+            Context: {full_context}
+            
+            Question: {prompt}
+            
+            Instructions:
+            1. Analyze the question and determine if you need to use any tools
+            2. If you need tools, request every call you need in one reply as JSON tool_calls
+            3. I will execute the tools and provide you with the results
+            4. Use the results to provide a comprehensive answer as JSON {{"answer": ...}}
+            """
+        return full_context, full_prompt
+    
+    def _count_prompt_tokens(self, full_prompt: str) -> None:
+        prompt_tokens = estimate_tokens(full_prompt)
+        self.prompt_tokens += prompt_tokens
+        LLM_PROMPT_TOKENS.observe(prompt_tokens, model=self.model_name)
+        LLM_TOKENS.inc(prompt_tokens, model=self.model_name, direction="prompt")
+    
+    async def get_response(self, prompt: str, context: str = None, data_version: str = None) -> str:
         """
         Get a response from Vertex AI model
         
         Args:
             prompt (str): The user's question or prompt
             context (str, optional): Additional context for the model
+            data_version (str, optional): Catalog version the context was built from;
+                when given, the response is cached under it
             
         Returns:
             str: The model's response
         """
         try:
-            # Load data if not already loaded
-            if not hasattr(self, 'app_catalog'):
-                self.app_catalog, self.cap_catalog, self.consumes_mapping, self.provides_mapping = self.data_processor.load_data()
-            
-            # Add tools description to the context
-            tools_description = self._get_tools_description()
-            full_context = f"{tools_description}\n\n{context}" if context else tools_description
-            
-            # Create the full prompt
-            full_prompt = f"""
-            Context: {full_context}
-            
-            Question: {prompt}
-            
-            Instructions:
-            1. Analyze the question and determine if you need to use any tools
-            2. If you need to use tools, specify the tool name and parameters
-            3. I will execute the tool and provide you with the results
-            4. Use the results to provide a comprehensive answer
-            
-            Your response should be in this format:
-            TOOL: <tool_name> <parameters>
-            or
-            ANSWER: <your analysis>
-            """
-            
-            response = self.model.predict(full_prompt)
-            return response.text
+            return await self.fetch_response(prompt, context, data_version)
         except Exception as e:
             return f"Error getting response from Vertex AI: {str(e)}"
     
-    async def analyze_application_capability(self, 
-                                          application_data: dict,
-                                          capability_data: dict,
-                                          consumes_mapping: dict,
-                                          provides_mapping: dict,
-                                          question: str) -> str:
+    async def fetch_response(self, prompt: str, context: str = None, data_version: str = None) -> str:
+        """Like get_response, but upstream failures are raised instead of returned as text"""
+        full_context, full_prompt = self._build_prompt(prompt, context)
+        
+        cache_key = None
+        if data_version is not None:
+            cache_key = self.cache.make_key(prompt, self.model_name, data_version, full_context)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        self._count_prompt_tokens(full_prompt)
+        flight_key = cache_key or hashlib.sha256(full_prompt.encode("utf-8")).hexdigest()
+        with stage("llm_call"):
+            response = await self.gate.run_blocking(self.model.predict, full_prompt, key=flight_key)
+        LLM_TOKENS.inc(estimate_tokens(response.text), model=self.model_name, direction="response")
+        if cache_key is not None:
+            self.cache.set(cache_key, response.text)
+        return response.text
+    
+    async def stream_response(self, prompt: str, context: str = None, data_version: str = None) -> AsyncIterator[str]:
+        """
+        Like get_response, but yield the model's reply as it is generated
+        
+        A cached reply is yielded in one piece. Errors are raised rather than
+        returned as text, since part of the reply may already have been sent.
+        """
+        full_context, full_prompt = self._build_prompt(prompt, context)
+        
+        cache_key = None
+        if data_version is not None:
+            cache_key = self.cache.make_key(prompt, self.model_name, data_version, full_context)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        self._count_prompt_tokens(full_prompt)
+        parts = []
+        start = time.perf_counter()
+        with stage("llm_call"):
+            async for chunk in self.gate.stream_blocking(self.model.predict_streaming, full_prompt):
+                if not parts:
+                    LLM_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - start, model=self.model_name)
+                parts.append(chunk.text)
+                yield chunk.text
+        text = "".join(parts)
+        LLM_TOKENS.inc(estimate_tokens(text), model=self.model_name, direction="response")
+        if cache_key is not None:
+            self.cache.set(cache_key, text)
+    
+    def analysis_context(self, question: str, snapshot) -> str:
+        """Catalog context for a question (or for several, joined), ready to prefix the prompt"""
+        with stage("prompt_build"):
+            context = build_context(snapshot, question)
+        return context + """
+        Please analyze this data and answer the following question:
+        """
+    
+    async def analyze_application_capability(self, question: str, snapshot, context: Optional[str] = None,
+                                             raise_errors: bool = False) -> str:
         """
         Analyze application-capability relationships using Vertex AI
         
+        Only the catalog rows relevant to the question are put in the prompt,
+        selected by retrieval under the PROMPT_TOKEN_BUDGET token budget.
+        
         Args:
-            application_data (dict): Application catalog data
-            capability_data (dict): Capability catalog data
-            consumes_mapping (dict): Application consumes capability mapping
-            provides_mapping (dict): Application provides capability mapping
             question (str): User's question about the data
+            snapshot: Catalog snapshot to draw data from
+            context (str, optional): Prebuilt analysis_context, e.g. shared by a batch
+            raise_errors (bool): Raise model call failures instead of answering with the error text
             
         Returns:
             str: Analysis result from Vertex AI
         """
-        # Store the data for tool execution
-        self.app_catalog = application_data
-        self.cap_catalog = capability_data
-        self.consumes_mapping = consumes_mapping
-        self.provides_mapping = provides_mapping
+        if context is None:
+            context = self.analysis_context(question, snapshot)
         
-        context = f"""
-        Application Catalog: {application_data}
-        Capability Catalog: {capability_data}
-        Consumes Mapping: {consumes_mapping}
-        Provides Mapping: {provides_mapping}
+        # Agent loop: the model may request several tools per turn; they run
+        # concurrently and their JSON results are fed back until it answers.
+        fetch = self.fetch_response if raise_errors else self.get_response
+        self.agent_questions += 1
+        deadline = time.monotonic() + AGENT_MAX_SECONDS
+        tool_results = []
+        for step in range(AGENT_MAX_STEPS):
+            response = await fetch(_step_prompt(question, tool_results), context,
+                                   data_version=snapshot.version)
+            self.agent_model_calls += 1
+            with stage("tool_parse"):
+                calls, answer = parse_model_output(response)
+            if not calls:
+                return answer if answer is not None else response
+            if step == AGENT_MAX_STEPS - 1 or time.monotonic() >= deadline:
+                break
+            tool_results.extend(await execute_tool_calls(snapshot, calls[:AGENT_MAX_TOOL_CALLS]))
         
-        Please analyze this data and answer the following question:
+        final = await fetch(_final_prompt(question, tool_results), context, data_version=snapshot.version)
+        self.agent_model_calls += 1
+        with stage("tool_parse"):
+            calls, answer = parse_model_output(final)
+        return answer if answer is not None else final
+    
+    async def stream_analysis(self, question: str, snapshot) -> AsyncIterator[str]:
         """
+        Streaming variant of analyze_application_capability
         
-        response = await self.get_response(question, context)
+        Runs the same agent loop, streaming every model reply. Tool requests
+        are handled silently; text is yielded as soon as the model starts
+        writing its answer.
         
-        # Check if the response is a tool call
-        if response.startswith("TOOL:"):
-            # Parse the tool call
-            tool_parts = response[5:].strip().split()
-            tool_name = tool_parts[0]
-            params = {}
-            
-            # Parse parameters (assuming format: param_name=value)
-            for part in tool_parts[1:]:
-                if '=' in part:
-                    key, value = part.split('=')
-                    params[key] = value.strip("'\"")
-            
-            # Execute the tool
-            tool_result = self._execute_tool(tool_name, params)
+        Args:
+            question (str): User's question about the data
+            snapshot: Catalog snapshot to draw data from
             
-            # Get a new response with the tool result
-            return await self.get_response(
-                f"Tool {tool_name} returned: {tool_result}\n\nPlease provide a comprehensive answer to the original question: {question}",
-                context
-            )
-        
-        return response 
\ No newline at end of file
+        Yields:
+            str: Successive pieces of the answer
+        """
+        context = self.analysis_context(question, snapshot)
+        self.agent_questions += 1
+        deadline = time.monotonic() + AGENT_MAX_SECONDS
+        tool_results = []
+        for step in range(AGENT_MAX_STEPS + 1):
+            # The extra step is the forced final answer once steps or time run out
+            final = step == AGENT_MAX_STEPS or (step > 0 and time.monotonic() >= deadline)
+            prompt = _final_prompt(question, tool_results) if final else _step_prompt(question, tool_results)
+            reader = AnswerStream()
+            async for chunk in self.stream_response(prompt, context, data_version=snapshot.version):
+                shown = reader.feed(chunk)
+                if shown:
+                    yield shown
+            self.agent_model_calls += 1
+            with stage("tool_parse"):
+                calls, rest = reader.finish()
+            if not calls or final:
+                if rest:
+                    yield rest
+                return
+            tool_results.extend(await execute_tool_calls(snapshot, calls[:AGENT_MAX_TOOL_CALLS]))
@@ -0,0 +1,193 @@
+"""
+HTTP data layer for the Streamlit client.
+
+All requests share one pooled ``requests.Session``. GET responses are kept
+for a short TTL and then revalidated with the server's ETag, so an unchanged
+catalog costs a 304 instead of a full download. Detail views can be
+prefetched on a small thread pool through the batch endpoints, concurrently
+with the foreground requests, so selecting an application or capability is
+usually served from the cache.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Seconds a cached response is reused before it is revalidated with the server
+CLIENT_CACHE_TTL = float(os.getenv("CLIENT_CACHE_TTL", "30"))
+# Pooled connections to the server, also the number of concurrent background fetches
+CLIENT_POOL_SIZE = int(os.getenv("CLIENT_POOL_SIZE", "8"))
+# Responses kept in the cache; least recently stored are evicted first
+CLIENT_CACHE_SIZE = int(os.getenv("CLIENT_CACHE_SIZE", "2048"))
+# Seconds to wait for the server on any one request
+CLIENT_TIMEOUT = float(os.getenv("CLIENT_TIMEOUT", "120"))
+
+# kind -> (batch endpoint, detail path prefix)
+DETAIL_ENDPOINTS = {
+    "application": ("/applications/batch", "/application/"),
+    "capability": ("/capabilities/batch", "/capability/"),
+}
+
+
+class APIError(Exception):
+    """Error response from the analysis server"""
+
+
+def _detail(response: requests.Response) -> str:
+    try:
+        return str(response.json()["detail"])
+    except (ValueError, KeyError, TypeError):
+        return f"HTTP {response.status_code}"
+
+
+class _Entry:
+    def __init__(self, payload, etag: Optional[str], ttl: float):
+        self.payload = payload
+        self.etag = etag
+        self.expires = time.monotonic() + ttl
+
+
+class APIClient:
+    """Pooled, caching client for the analysis server"""
+
+    def __init__(self, base_url: str, ttl_seconds: float = CLIENT_CACHE_TTL, pool_size: int = CLIENT_POOL_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.ttl_seconds = ttl_seconds
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="api-client")
+        self._cache: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        # Keys being fetched in the background, so foreground reads wait instead of refetching
+        self._pending: Dict[Tuple, Future] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(path: str, params: Optional[Dict] = None) -> Tuple:
+        return (path, tuple(sorted((params or {}).items())))
+
+    def get(self, path: str, params: Optional[Dict] = None):
+        """
+        GET a JSON endpoint, served from the cache while fresh
+
+        Args:
+            path (str): Endpoint path, e.g. "/applications"
+            params (Dict, optional): Query parameters
+
+        Returns:
+            Decoded JSON body
+        """
+        key = self._key(path, params)
+        with self._lock:
+            pending = self._pending.get(key)
+        if pending is not None:
+            # Errors are reported by the fetch below
+            try:
+                pending.result(timeout=CLIENT_TIMEOUT)
+            except Exception:
+                pass
+
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is not None and entry.expires > time.monotonic():
+            return entry.payload
+
+        headers = {"If-None-Match": entry.etag} if entry is not None and entry.etag else {}
+        response = self.session.get(f"{self.base_url}{path}", params=params, headers=headers, timeout=CLIENT_TIMEOUT)
+        if response.status_code == 304 and entry is not None:
+            self._store(key, entry.payload, entry.etag)
+            return entry.payload
+        if response.status_code != 200:
+            raise APIError(_detail(response))
+        payload = response.json()
+        self._store(key, payload, response.headers.get("ETag"))
+        return payload
+
+    def post(self, path: str, body: Dict):
+        """POST a JSON body; never cached"""
+        response = self.session.post(f"{self.base_url}{path}", json=body, timeout=CLIENT_TIMEOUT)
+        if response.status_code != 200:
+            raise APIError(_detail(response))
+        return response.json()
+
+    def stream(self, path: str, body: Dict) -> Iterator[str]:
+        """
+        POST a JSON body to a server-sent events endpoint and yield each text chunk
+
+        Raises:
+            APIError: If the request fails or the server reports an error event
+        """
+        with self.session.post(f"{self.base_url}{path}", json=body, timeout=CLIENT_TIMEOUT, stream=True) as response:
+            if response.status_code != 200:
+                raise APIError(_detail(response))
+            event = None
+            for line in response.iter_lines(decode_unicode=True):
+                if not line:
+                    event = None
+                elif line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    data = json.loads(line[len("data:"):])
+                    if event == "error":
+                        raise APIError(data.get("detail", "stream failed"))
+                    if event == "done":
+                        return
+                    yield data.get("text", "")
+
+    def _store(self, key: Tuple, payload, etag: Optional[str]) -> None:
+        with self._lock:
+            self._cache[key] = _Entry(payload, etag, self.ttl_seconds)
+            self._cache.move_to_end(key)
+            while len(self._cache) > CLIENT_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def prefetch_details(self, kind: str, ids: Iterable[str]) -> Optional[Future]:
+        """
+        Load detail views in the background with one batch request
+
+        Each result is cached under its ``/application/{id}`` or
+        ``/capability/{id}`` path, with the same ETag the detail endpoint
+        would have sent, so a later ``get`` of that path is a cache hit.
+
+        Args:
+            kind (str): "application" or "capability"
+            ids (Iterable[str]): Ids likely to be viewed next
+
+        Returns:
+            Optional[Future]: The background fetch, or None if everything is cached
+        """
+        batch_path, detail_prefix = DETAIL_ENDPOINTS[kind]
+        now = time.monotonic()
+        with self._lock:
+            missing = []
+            for item_id in dict.fromkeys(ids):
+                key = self._key(f"{detail_prefix}{item_id}")
+                entry = self._cache.get(key)
+                if key not in self._pending and (entry is None or entry.expires <= now):
+                    missing.append(item_id)
+            if not missing:
+                return None
+            keys = [self._key(f"{detail_prefix}{item_id}") for item_id in missing]
+            future = self._executor.submit(self._fetch_batch, batch_path, missing, keys)
+            for key in keys:
+                self._pending[key] = future
+        return future
+
+    def _fetch_batch(self, batch_path: str, ids: List[str], keys: List[Tuple]) -> None:
+        try:
+            payload = self.post(batch_path, {"ids": ids})
+            etag = f'W/"{payload["data_version"]}"'
+            for item_id, key in zip(ids, keys):
+                if item_id in payload["results"]:
+                    self._store(key, payload["results"][item_id], etag)
+        finally:
+            with self._lock:
+                for key in keys:
+                    self._pending.pop(key, None)
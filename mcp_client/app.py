@@ -1,12 +1,78 @@
 import streamlit as st
-import requests
-import json
 from typing import Dict, List
 import pandas as pd
 
+from api_client import APIClient, APIError
+
 # Server URL
 SERVER_URL = "http://localhost:8000"
 
+# Rows requested per page from the list endpoints
+PAGE_SIZE = 200
+
+# Detail views loaded ahead of selection from the top of the current options
+PREFETCH_COUNT = 25
+
+@st.cache_resource
+def get_client() -> APIClient:
+    """One pooled, caching client shared by every session and rerun"""
+    return APIClient(SERVER_URL)
+
+def fetch_page(endpoint: str) -> List[Dict]:
+    """
+    Fetch the current page of a list endpoint, with previous/next page controls
+    
+    The cursors of visited pages are kept in the session state so the user
+    can move back and forth without the server holding any state.
+    """
+    cursors_key = f"{endpoint}_cursors"
+    if cursors_key not in st.session_state:
+        st.session_state[cursors_key] = [None]
+    cursors = st.session_state[cursors_key]
+    
+    params = {"limit": PAGE_SIZE}
+    if cursors[-1]:
+        params["cursor"] = cursors[-1]
+    payload = get_client().get(f"/{endpoint}", params)
+    
+    col_prev, col_page, col_next = st.columns(3)
+    if col_prev.button("Previous page", key=f"{endpoint}_prev", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.experimental_rerun()
+    col_page.write(f"Page {len(cursors)}")
+    if col_next.button("Next page", key=f"{endpoint}_next", disabled=not payload["next_cursor"]):
+        cursors.append(payload["next_cursor"])
+        st.experimental_rerun()
+    
+    return payload[endpoint]
+
+def select_entity(kind: str, rows: List[Dict], id_column: str, name_column: str):
+    """
+    Typeahead picker for an application or capability
+    
+    With a search term the options come from the server's search index, so
+    any entity in the catalog can be found; otherwise the current page is
+    offered.
+    """
+    client = get_client()
+    term = st.text_input(f"Search {kind}s by id, name, alias or description:", key=f"{kind}_search")
+    if term.strip():
+        results = client.get("/search", {"q": term, "type": kind, "limit": 20})["results"]
+        labels = {result["id"]: result["name"] for result in results}
+        if not labels:
+            st.info(f"No {kind}s match '{term}'")
+            return None
+    else:
+        labels = {row[id_column]: row.get(name_column) or "" for row in rows}
+    # Details of the likeliest choices load while the user decides
+    client.prefetch_details(kind, list(labels)[:PREFETCH_COUNT])
+    return st.selectbox(
+        f"Select a {kind} to view details:",
+        options=list(labels),
+        format_func=lambda x: f"{x} - {labels[x]}",
+        key=f"{kind}_selected"
+    )
+
 def main():
     st.title("Application-Capability Analysis System")
     
@@ -35,15 +101,16 @@ def show_natural_language_query():
     if st.button("Analyze"):
         if question:
             try:
-                response = requests.post(
-                    f"{SERVER_URL}/analyze",
-                    json={"question": question}
-                )
-                if response.status_code == 200:
-                    st.write("### Analysis Result")
-                    st.write(response.json()["response"])
-                else:
-                    st.error(f"Error: {response.json()['detail']}")
+                st.write("### Analysis Result")
+                # Show the answer as it is written
+                placeholder = st.empty()
+                text = ""
+                for chunk in get_client().stream("/analyze/stream", {"question": question}):
+                    text += chunk
+                    placeholder.markdown(text + "▌")
+                placeholder.markdown(text)
+            except APIError as e:
+                st.error(f"Error: {str(e)}")
             except Exception as e:
                 st.error(f"Error connecting to server: {str(e)}")
         else:
@@ -53,46 +120,38 @@ def show_application_analysis():
     st.header("Application Analysis")
     
     try:
-        # Get list of applications
-        response = requests.get(f"{SERVER_URL}/applications")
-        if response.status_code == 200:
-            applications = response.json()["applications"]
+        # The detail view shown last time loads while the page is fetched
+        if st.session_state.get("application_selected"):
+            get_client().prefetch_details("application", [st.session_state["application_selected"]])
+        # Get the current page of applications
+        applications = fetch_page("applications")
+        # Create a DataFrame for better display
+        df = pd.DataFrame(applications)
+        
+        # Display applications in a table
+        st.write("### Applications Catalog")
+        st.dataframe(df)
+        
+        # Application details
+        st.write("### Application Details")
+        selected_app = select_entity("application", applications, "application_id", "Application name")
+        
+        if selected_app:
+            app_data = get_client().get(f"/application/{selected_app}")
             
-            # Create a DataFrame for better display
-            df = pd.DataFrame(applications)
+            # Display application details
+            st.write("#### Application Information")
+            st.json(app_data["application"])
             
-            # Display applications in a table
-            st.write("### Applications Catalog")
-            st.dataframe(df)
+            # Display consumed capabilities
+            st.write("#### Consumed Capabilities")
+            st.dataframe(pd.DataFrame(app_data["consumed_capabilities"]))
             
-            # Application details
-            st.write("### Application Details")
-            selected_app = st.selectbox(
-                "Select an application to view details:",
-                options=[app["application_id"] for app in applications],
-                format_func=lambda x: f"{x} - {next((app['Application name'] for app in applications if app['application_id'] == x), '')}"
-            )
-            
-            if selected_app:
-                app_response = requests.get(f"{SERVER_URL}/application/{selected_app}")
-                if app_response.status_code == 200:
-                    app_data = app_response.json()
-                    
-                    # Display application details
-                    st.write("#### Application Information")
-                    st.json(app_data["application"])
-                    
-                    # Display consumed capabilities
-                    st.write("#### Consumed Capabilities")
-                    st.dataframe(pd.DataFrame(app_data["consumed_capabilities"]))
-                    
-                    # Display provided capabilities
-                    st.write("#### Provided Capabilities")
-                    st.dataframe(pd.DataFrame(app_data["provided_capabilities"]))
-                else:
-                    st.error(f"Error: {app_response.json()['detail']}")
-        else:
-            st.error(f"Error: {response.json()['detail']}")
+            # Display provided capabilities
+            st.write("#### Provided Capabilities")
+            st.dataframe(pd.DataFrame(app_data["provided_capabilities"]))
+    except APIError as e:
+        st.error(f"Error: {str(e)}")
     except Exception as e:
         st.error(f"Error connecting to server: {str(e)}")
 
@@ -100,46 +159,38 @@ def show_capability_analysis():
     st.header("Capability Analysis")
     
     try:
-        # Get list of capabilities
-        response = requests.get(f"{SERVER_URL}/capabilities")
-        if response.status_code == 200:
-            capabilities = response.json()["capabilities"]
+        # The detail view shown last time loads while the page is fetched
+        if st.session_state.get("capability_selected"):
+            get_client().prefetch_details("capability", [st.session_state["capability_selected"]])
+        # Get the current page of capabilities
+        capabilities = fetch_page("capabilities")
+        # Create a DataFrame for better display
+        df = pd.DataFrame(capabilities)
+        
+        # Display capabilities in a table
+        st.write("### Capabilities Catalog")
+        st.dataframe(df)
+        
+        # Capability details
+        st.write("### Capability Details")
+        selected_cap = select_entity("capability", capabilities, "capability_id", "name")
+        
+        if selected_cap:
+            cap_data = get_client().get(f"/capability/{selected_cap}")
             
-            # Create a DataFrame for better display
-            df = pd.DataFrame(capabilities)
+            # Display capability details
+            st.write("#### Capability Information")
+            st.json(cap_data["capability"])
             
-            # Display capabilities in a table
-            st.write("### Capabilities Catalog")
-            st.dataframe(df)
+            # Display consuming applications
+            st.write("#### Consuming Applications")
+            st.dataframe(pd.DataFrame(cap_data["consuming_applications"]))
             
-            # Capability details
-            st.write("### Capability Details")
-            selected_cap = st.selectbox(
-                "Select a capability to view details:",
-                options=[cap["capability_id"] for cap in capabilities],
-                format_func=lambda x: f"{x} - {next((cap['name'] for cap in capabilities if cap['capability_id'] == x), '')}"
-            )
-            
-            if selected_cap:
-                cap_response = requests.get(f"{SERVER_URL}/capability/{selected_cap}")
-                if cap_response.status_code == 200:
-                    cap_data = cap_response.json()
-                    
-                    # Display capability details
-                    st.write("#### Capability Information")
-                    st.json(cap_data["capability"])
-                    
-                    # Display consuming applications
-                    st.write("#### Consuming Applications")
-                    st.dataframe(pd.DataFrame(cap_data["consuming_applications"]))
-                    
-                    # Display providing applications
-                    st.write("#### Providing Applications")
-                    st.dataframe(pd.DataFrame(cap_data["providing_applications"]))
-                else:
-                    st.error(f"Error: {cap_response.json()['detail']}")
-        else:
-            st.error(f"Error: {response.json()['detail']}")
+            # Display providing applications
+            st.write("#### Providing Applications")
+            st.dataframe(pd.DataFrame(cap_data["providing_applications"]))
+    except APIError as e:
+        st.error(f"Error: {str(e)}")
     except Exception as e:
         st.error(f"Error connecting to server: {str(e)}")
 
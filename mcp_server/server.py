@@ -1,19 +1,113 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query as QueryParam, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, List, Optional
 import sys
 import os
+import json
+import logging
+import threading
+import time
+
+import orjson
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.data_processor import DataProcessor
-from llm_chat.vertex_client import VertexClient
+from utils.delta_ingest import CatalogWatcher
+from utils.dependency_graph import DOWNSTREAM, UPSTREAM, graph_for
+from utils import pagination
+from utils.analytics import AnalyticsService
+from utils.search_index import search_index_for
+from utils.http_cache import is_not_modified, validators_for
+from utils import metrics
+from llm_chat.lazy_client import LazyModelClient, ModelNotReadyError
+from llm_chat.batch_runner import BatchRunner
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
 
 app = FastAPI()
+logger = logging.getLogger(__name__)
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1000"))
+
+# GET endpoints whose responses depend only on the catalog data
+CATALOG_PATH_PREFIXES = ("/applications", "/capabilities", "/application/", "/capability/",
+                         "/search", "/graph/", "/analytics/")
 
-# Enable CORS
+# /readyz also waits for the LLM client when set
+READY_REQUIRES_LLM = os.getenv("READY_REQUIRES_LLM", "0") == "1"
+# Seconds a client should wait before retrying /analyze while the model initializes
+LLM_RETRY_AFTER = os.getenv("LLM_RETRY_AFTER", "5")
+
+def _vertex_client():
+    # Imported lazily: pulls in the Vertex AI SDK
+    from llm_chat.vertex_client import VertexClient
+
+    return VertexClient(data_processor)
+
+# Initialize components
+data_processor = DataProcessor()
+# The Vertex AI client is built in the background so catalog endpoints serve immediately
+vertex_client = LazyModelClient(_vertex_client, name="Vertex AI client")
+catalog_watcher = CatalogWatcher(data_processor.store)
+analytics_service = AnalyticsService(data_processor.store)
+request_profiler = metrics.RequestProfiler.from_env()
+batch_runner = BatchRunner(vertex_client.get, data_processor.snapshot)
+
+@app.middleware("http")
+async def conditional_get(request: Request, call_next):
+    """ETag/Last-Modified from the catalog data version; 304 when the client's copy is current"""
+    if request.method != "GET" or not request.url.path.startswith(CATALOG_PATH_PREFIXES):
+        return await call_next(request)
+    snapshot = data_processor.snapshot()
+    validators = validators_for(snapshot)
+    if is_not_modified(request.headers, snapshot):
+        metrics.CACHE_REQUESTS.inc(cache="http_etag", result="not_modified")
+        return Response(status_code=304, headers=validators)
+    metrics.CACHE_REQUESTS.inc(cache="http_etag", result="full")
+    response = await call_next(request)
+    # Skip the validators if the data changed while the response was built
+    if response.status_code == 200 and data_processor.snapshot().version == snapshot.version:
+        response.headers.update(validators)
+    return response
+
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    """Request latency histogram, Server-Timing breakdown by stage and sampled profiles of slow requests"""
+    timings, token = metrics.begin_request()
+    profile = request_profiler.start()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.end_request(token)
+        # Templated path (e.g. /application/{application_id}) keeps the label set small;
+        # 304s are answered before routing
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "not_modified" if status == 304 else "unmatched")
+        metrics.HTTP_SECONDS.observe(elapsed, method=request.method, route=route_path, status=str(status))
+        request_profiler.finish(profile, elapsed, f"{request.method}-{route_path}")
+    response.headers["Server-Timing"] = metrics.server_timing(timings, elapsed)
+    return response
+
+# Compress large responses, including streamed NDJSON
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESSION_MIN_SIZE, gzip_fallback=True)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
+# Enable CORS (registered last so it is outermost and also covers 304 responses)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -22,90 +116,466 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize components
-data_processor = DataProcessor()
-vertex_client = VertexClient()
+def _json_response(content):
+    """
+    Serialize a response of catalog rows with orjson, with empty (NaN) cells as null
+
+    Returning the response directly also skips FastAPI's per-value encoding
+    pass, which dominates the cost of big row lists.
+    """
+    return ORJSONResponse(content)
+
+def _ndjson_line(row) -> bytes:
+    """One row as a line of newline-delimited JSON, with empty (NaN) cells as null"""
+    return orjson.dumps(row, default=str, option=orjson.OPT_APPEND_NEWLINE)
 
 class Query(BaseModel):
     question: str
 
+class BatchLookup(BaseModel):
+    ids: List[str]
+
+# Upper bound on ids per batch request
+MAX_BATCH_IDS = int(os.getenv("MAX_BATCH_IDS", "5000"))
+
+@metrics.timed("lookup")
+def _application_view(snapshot, application_id: str) -> Dict:
+    return {
+        "application": snapshot.get_application_details(application_id),
+        "consumed_capabilities": snapshot.get_consumed_capabilities(application_id),
+        "provided_capabilities": snapshot.get_provided_capabilities(application_id)
+    }
+
+@metrics.timed("lookup")
+def _capability_view(snapshot, capability_id: str) -> Dict:
+    return {
+        "capability": snapshot.get_capability_details(capability_id),
+        "consuming_applications": snapshot.get_consuming_applications(capability_id),
+        "providing_applications": snapshot.get_providing_applications(capability_id)
+    }
+
+def _batch_lookup(ids: List[str], exists, view) -> Dict:
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    # One snapshot for the whole batch so every result comes from the same data
+    snapshot = data_processor.snapshot()
+    results, not_found = {}, []
+    for item_id in dict.fromkeys(ids):
+        if exists(snapshot, item_id):
+            results[item_id] = view(snapshot, item_id)
+        else:
+            not_found.append(item_id)
+    return _json_response({"data_version": snapshot.version, "results": results, "not_found": not_found})
+
+def _warm_catalog_indexes():
+    try:
+        search_index_for(data_processor.snapshot())
+        analytics_service.get().summary()
+    except Exception:
+        logger.exception("Warming the catalog indexes failed")
+
+@app.on_event("startup")
+async def load_catalog():
+    # Load the catalog before serving the first request; the derived indexes
+    # (built on demand anyway) and the LLM client are prepared in the background
+    data_processor.snapshot()
+    threading.Thread(target=_warm_catalog_indexes, name="catalog-warmup", daemon=True).start()
+    vertex_client.start()
+    catalog_watcher.start()
+
+@app.on_event("shutdown")
+async def stop_catalog_watcher():
+    catalog_watcher.stop()
+    vertex_client.stop()
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving requests"""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: the catalog is loaded (and the LLM client, with READY_REQUIRES_LLM=1)"""
+    catalog_ready = data_processor.store.loaded
+    ready = catalog_ready and (vertex_client.ready or not READY_REQUIRES_LLM)
+    body = {
+        "ready": ready,
+        "catalog": {
+            "ready": catalog_ready,
+            "data_version": data_processor.snapshot().version if catalog_ready else None
+        },
+        "llm": vertex_client.status()
+    }
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+def _llm_client():
+    try:
+        return vertex_client.get()
+    except ModelNotReadyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": LLM_RETRY_AFTER})
+
 @app.get("/")
 async def root():
-    return {"message": "Application-Capability Analysis Server"}
+    return {
+        "message": "Application-Capability Analysis Server",
+        "data_version": data_processor.snapshot().version
+    }
 
 @app.post("/analyze")
 async def analyze_data(query: Query):
     try:
-        # Load all data
-        app_catalog, cap_catalog, consumes_mapping, provides_mapping = data_processor.load_data()
-        
-        # Get analysis from Vertex AI
-        response = await vertex_client.analyze_application_capability(
-            application_data=app_catalog,
-            capability_data=cap_catalog,
-            consumes_mapping=consumes_mapping,
-            provides_mapping=provides_mapping,
-            question=query.question
+        # Get analysis from Vertex AI over the resident catalog snapshot
+        response = await _llm_client().analyze_application_capability(
+            question=query.question,
+            snapshot=data_processor.snapshot()
         )
         
         return {"response": response}
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+class BatchQuery(BaseModel):
+    questions: List[str]
+    job_id: Optional[str] = None
+
+@app.post("/analyze/batch", status_code=202)
+async def analyze_batch(query: BatchQuery):
+    """
+    Start (or resume) a batch of questions; poll GET /analyze/batch/{job_id} for progress
+    
+    Questions are deduplicated and answered in the background with one shared
+    context. Results are appended to a file as they arrive, so submitting the
+    same job again only asks the questions that have no answer yet.
+    """
+    _llm_client()
+    try:
+        job = batch_runner.submit(query.questions, query.job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return job.to_dict()
+
+@app.get("/analyze/batch/{job_id}")
+async def get_batch_job(job_id: str, results: bool = False):
+    """Progress of a batch job, with its answers so far when results=true"""
+    job = batch_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    return _json_response(job.to_dict(include_results=results))
+
+def _sse(data: Dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@app.post("/analyze/stream")
+async def analyze_data_stream(query: Query):
+    """
+    Same as /analyze, but the answer is sent as server-sent events while the model writes it
+    
+    Each piece of text arrives as ``data: {"text": ...}``; the stream ends
+    with an ``event: done`` message, or ``event: error`` carrying a detail.
+    """
+    client = _llm_client()
+    snapshot = data_processor.snapshot()
+
+    async def events():
+        try:
+            async for text in client.stream_analysis(query.question, snapshot):
+                yield _sse({"text": text})
+            yield _sse({"data_version": snapshot.version}, event="done")
+        except Exception as e:
+            yield _sse({"detail": str(e)}, event="error")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Keep proxies and the compression middleware from buffering events
+            "X-Accel-Buffering": "no",
+            "Content-Encoding": "identity",
+            "X-Data-Version": snapshot.version
+        }
+    )
+
+# Page size bounds for the list endpoints
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "500"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "5000"))
+
+def _list_table(table: str, filters: Dict[str, Optional[str]], fields: Optional[str],
+                cursor: Optional[str], limit: Optional[int], format: str):
+    snapshot = data_processor.snapshot()
+    column_filters = {
+        pagination.TABLE_FILTERS[table][name]: value
+        for name, value in filters.items() if value
+    }
+    field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+
+    if format == "ndjson":
+        headers = {"X-Data-Version": snapshot.version}
+        if limit is not None:
+            # A bounded page: its continuation cursor goes in a header
+            result = pagination.page(snapshot, table, column_filters, cursor, limit, field_list)
+            if result["next_cursor"]:
+                headers["X-Next-Cursor"] = result["next_cursor"]
+            rows = iter(result["items"])
+        else:
+            # Stream every row from the cursor on; only the current row is held in memory
+            after = pagination.decode_cursor(cursor) if cursor else None
+            rows = (pagination.project(row, field_list)
+                    for row in pagination.iter_rows(snapshot, table, column_filters, after))
+        return StreamingResponse(
+            (_ndjson_line(row) for row in rows),
+            media_type="application/x-ndjson",
+            headers=headers
+        )
+
+    result = pagination.page(snapshot, table, column_filters, cursor, limit or DEFAULT_PAGE_SIZE, field_list)
+    return _json_response({
+        table: result["items"],
+        "next_cursor": result["next_cursor"],
+        "data_version": snapshot.version
+    })
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters of the LLM response cache and in-flight LLM call state"""
+    if not vertex_client.ready:
+        return {"llm": vertex_client.status()}
+    client = vertex_client.get()
+    return {
+        "llm_response_cache": client.cache.stats(),
+        "llm_calls": client.gate.stats(),
+        "agent": {
+            "questions": client.agent_questions,
+            "model_calls": client.agent_model_calls,
+            "prompt_tokens": client.prompt_tokens
+        }
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics: stage and request latency histograms, token counts and cache hit/miss counters"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/applications")
-async def get_applications():
+async def get_applications(
+    type: Optional[str] = None,
+    platform: Optional[str] = None,
+    disposition: Optional[str] = None,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = QueryParam(None, ge=1, le=MAX_PAGE_SIZE),
+    format: str = QueryParam("json", regex="^(json|ndjson)$")
+):
     try:
-        app_catalog, _, _, _ = data_processor.load_data()
-        return {"applications": app_catalog}
+        return _list_table(
+            "applications",
+            {"type": type, "platform": platform, "disposition": disposition},
+            fields, cursor, limit, format
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/capabilities")
-async def get_capabilities():
+async def get_capabilities(
+    status: Optional[str] = None,
+    context: Optional[str] = None,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = QueryParam(None, ge=1, le=MAX_PAGE_SIZE),
+    format: str = QueryParam("json", regex="^(json|ndjson)$")
+):
     try:
-        _, cap_catalog, _, _ = data_processor.load_data()
-        return {"capabilities": cap_catalog}
+        return _list_table(
+            "capabilities",
+            {"status": status, "context": context},
+            fields, cursor, limit, format
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/application/{application_id}")
 async def get_application_details(application_id: str):
     try:
-        app_catalog, cap_catalog, consumes_mapping, provides_mapping = data_processor.load_data()
+        snapshot = data_processor.snapshot()
         
-        app_details = data_processor.get_application_details(application_id, app_catalog)
-        if not app_details:
+        if not snapshot.get_application_details(application_id):
             raise HTTPException(status_code=404, detail="Application not found")
-            
-        consumed_caps = data_processor.get_consumed_capabilities(application_id, consumes_mapping)
-        provided_caps = data_processor.get_provided_capabilities(application_id, provides_mapping)
         
-        return {
-            "application": app_details,
-            "consumed_capabilities": consumed_caps,
-            "provided_capabilities": provided_caps
-        }
+        return _json_response(_application_view(snapshot, application_id))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/capability/{capability_id}")
 async def get_capability_details(capability_id: str):
     try:
-        app_catalog, cap_catalog, consumes_mapping, provides_mapping = data_processor.load_data()
+        snapshot = data_processor.snapshot()
         
-        cap_details = data_processor.get_capability_details(capability_id, cap_catalog)
-        if not cap_details:
+        if not snapshot.get_capability_details(capability_id):
             raise HTTPException(status_code=404, detail="Capability not found")
-            
-        consuming_apps = data_processor.get_consuming_applications(capability_id, consumes_mapping)
-        providing_apps = data_processor.get_providing_applications(capability_id, provides_mapping)
         
-        return {
-            "capability": cap_details,
-            "consuming_applications": consuming_apps,
-            "providing_applications": providing_apps
-        }
+        return _json_response(_capability_view(snapshot, capability_id))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/applications/batch")
+async def get_applications_batch(lookup: BatchLookup):
+    """Details, consumed and provided capabilities for many applications at once"""
+    try:
+        return _batch_lookup(
+            lookup.ids,
+            lambda snapshot, item_id: bool(snapshot.get_application_details(item_id)),
+            _application_view
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/capabilities/batch")
+async def get_capabilities_batch(lookup: BatchLookup):
+    """Details, consuming and providing applications for many capabilities at once"""
+    try:
+        return _batch_lookup(
+            lookup.ids,
+            lambda snapshot, item_id: bool(snapshot.get_capability_details(item_id)),
+            _capability_view
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/search")
+async def search_catalog(q: str = QueryParam(..., min_length=1),
+                         limit: int = QueryParam(10, ge=1, le=100),
+                         type: Optional[str] = QueryParam(None, regex="^(application|capability)$")):
+    """Typeahead search over application and capability ids, names, aliases, context and descriptions"""
+    try:
+        snapshot = data_processor.snapshot()
+        with metrics.stage("search"):
+            results = search_index_for(snapshot).search(q, limit=limit, kind=type)
+        return {"data_version": snapshot.version, "results": results}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _traverse(node_id: str, direction: str, depth: int):
+    result = graph_for(data_processor.snapshot()).traverse(node_id, direction, depth)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Application or capability not found")
+    return result
+
+@app.get("/graph/impact/{node_id}")
+async def get_impact(node_id: str, depth: int = QueryParam(3, ge=1, le=50)):
+    """Blast radius: applications that break if the given application or capability goes down"""
+    try:
+        return _traverse(node_id, DOWNSTREAM, depth)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/graph/dependencies/{node_id}")
+async def get_dependencies(node_id: str, depth: int = QueryParam(3, ge=1, le=50)):
+    """Transitive upstream dependencies of an application or capability"""
+    try:
+        return _traverse(node_id, UPSTREAM, depth)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/graph/path")
+async def get_dependency_path(source: str, target: str, direction: str = QueryParam(UPSTREAM, regex="^(upstream|downstream)$")):
+    """Shortest dependency path between two applications or capabilities"""
+    try:
+        path = graph_for(data_processor.snapshot()).shortest_path(source, target, direction)
+        if path is None:
+            raise HTTPException(status_code=404, detail="Application or capability not found")
+        return {"source": source, "target": target, "direction": direction, "path": path}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/graph/cycles")
+async def get_dependency_cycles():
+    """Groups of applications that depend on each other in a cycle"""
+    try:
+        return {"cycles": graph_for(data_processor.snapshot()).cycles()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/analytics/summary")
+async def get_analytics_summary():
+    """Portfolio-wide counts"""
+    try:
+        return analytics_service.get().summary()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/analytics/unprovided-capabilities")
+async def get_unprovided_capabilities():
+    """Capabilities that are consumed but never provided"""
+    try:
+        analytics = analytics_service.get()
+        return _json_response({"data_version": analytics.version, "capabilities": analytics.unprovided_capabilities()})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/analytics/multi-provider-capabilities")
+async def get_multi_provider_capabilities():
+    """Capabilities with more than one provider"""
+    try:
+        analytics = analytics_service.get()
+        return _json_response({"data_version": analytics.version, "capabilities": analytics.multi_provider_capabilities()})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/analytics/unused-capabilities")
+async def get_unused_capabilities():
+    """Capabilities that are neither consumed nor provided"""
+    try:
+        analytics = analytics_service.get()
+        return _json_response({"data_version": analytics.version, "capabilities": analytics.unused_capabilities()})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/analytics/fan-in")
+async def get_fan_in(limit: int = QueryParam(20, ge=1, le=1000)):
+    """Applications with the most dependent applications"""
+    try:
+        analytics = analytics_service.get()
+        return _json_response({"data_version": analytics.version, "applications": analytics.top_fan_in(limit)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/analytics/fan-out")
+async def get_fan_out(limit: int = QueryParam(20, ge=1, le=1000)):
+    """Applications with the most dependencies"""
+    try:
+        analytics = analytics_service.get()
+        return _json_response({"data_version": analytics.version, "applications": analytics.top_fan_out(limit)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/analytics/critical-legacy")
+async def get_critical_legacy(min_fan_in: int = QueryParam(1, ge=0)):
+    """Legacy or on-premise applications that other applications depend on"""
+    try:
+        analytics = analytics_service.get()
+        return _json_response({"data_version": analytics.version, "applications": analytics.critical_legacy_applications(min_fan_in)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -0,0 +1,22 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "mcp_server"))
+
+# Offline stand-in for the Vertex AI SDK, registered before any client is built
+from benchmarks import stub_llm  # noqa: E402
+
+stub_llm.install()
+
+
+@pytest.fixture
+def catalog_dir(tmp_path):
+    """Writable copy of the sample catalog CSVs"""
+    path = tmp_path / "data"
+    shutil.copytree(os.path.join(REPO_ROOT, "data"), path)
+    return str(path)
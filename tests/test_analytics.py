@@ -0,0 +1,51 @@
+import os
+
+import pandas as pd
+
+from utils.analytics import AnalyticsService, PortfolioAnalytics
+from utils.data_processor import DataProcessor
+
+
+def test_incremental_update_swaps_in_new_metrics(catalog_dir):
+    data_processor = DataProcessor(catalog_dir)
+    data_processor.store.check_interval = 0
+    service = AnalyticsService(data_processor.store)
+    before = service.get()
+    before_summary = before.summary()
+
+    # A mapping change applied incrementally while a reader still holds the old metrics
+    path = os.path.join(catalog_dir, "application_provides_capability_mapping.csv")
+    provides = pd.read_csv(path)
+    provides[provides["capability_id"] != "CAP001"].to_csv(path, index=False)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    after = service.get()
+    assert after is not before
+    assert after.version == data_processor.snapshot().version != before.version
+    assert after.summary() == PortfolioAnalytics(DataProcessor(catalog_dir).snapshot()).summary()
+    # Whatever the old reader computes stays with the old version
+    assert before.unprovided_capabilities() is not None
+    assert before.summary() == before_summary
+    assert service.get() is after
+
+
+def test_portfolio_metrics_on_a_small_catalog():
+    from utils.catalog_store import CatalogSnapshot
+
+    apps = [{"application_id": app_id, "Application name": app_id, "Type": kind, "Platform": "Cloud",
+             "Disposition": "Production"} for app_id, kind in (("A", "Legacy"), ("B", "Web"), ("C", "Web"))]
+    caps = [{"capability_id": cap_id, "name": cap_id, "status": "Active"} for cap_id in ("C1", "C2", "C3", "C4")]
+    consumes = [{"application_id": "B", "capability_id": "C1"}, {"application_id": "C", "capability_id": "C1"},
+                {"application_id": "C", "capability_id": "C2"}, {"application_id": "C", "capability_id": "C2"}]
+    provides = [{"application_id": "A", "capability_id": "C1"}, {"application_id": "B", "capability_id": "C3"},
+                {"application_id": "C", "capability_id": "C3"}]
+    analytics = PortfolioAnalytics(CatalogSnapshot(apps, caps, consumes, provides, version="v1"))
+
+    assert [row["capability_id"] for row in analytics.unprovided_capabilities()] == ["C2"]
+    assert [row["capability_id"] for row in analytics.multi_provider_capabilities()] == ["C3"]
+    assert [row["capability_id"] for row in analytics.unused_capabilities()] == ["C4"]
+    assert analytics.top_fan_in(1)[0]["application_id"] == "A" and analytics.top_fan_in(1)[0]["fan_in"] == 2
+    assert [row["application_id"] for row in analytics.critical_legacy_applications()] == ["A"]
+    summary = analytics.summary()
+    assert summary["consumes_pairs"] == 3 and summary["application_dependencies"] == 2
@@ -0,0 +1,54 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from mcp_client.api_client import APIClient, APIError
+from utils.data_processor import DataProcessor
+
+
+class RecordingSession:
+    """TestClient wrapper that records the requests the API client sends"""
+
+    def __init__(self, app):
+        self.client = TestClient(app)
+        self.requests = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        response = self.client.get(url, params=params, headers=headers)
+        self.requests.append(("GET", url, dict(headers or {}), response.status_code))
+        return response
+
+    def post(self, url, json=None, timeout=None):
+        response = self.client.post(url, json=json)
+        self.requests.append(("POST", url, {}, response.status_code))
+        return response
+
+
+@pytest.fixture
+def api(catalog_dir, monkeypatch):
+    monkeypatch.setattr(server, "data_processor", DataProcessor(catalog_dir))
+    client = APIClient("http://testserver", ttl_seconds=0)
+    client.session = RecordingSession(server.app)
+    return client
+
+
+def test_expired_entries_are_revalidated_with_the_etag(api):
+    first = api.get("/applications")
+    assert api.get("/applications") == first
+    (_, _, first_headers, first_status), (_, _, second_headers, second_status) = api.session.requests
+    assert first_status == 200 and "If-None-Match" not in first_headers
+    assert second_status == 304 and second_headers["If-None-Match"].startswith('W/"')
+
+    with pytest.raises(APIError):
+        api.get("/application/APP404")
+
+
+def test_prefetched_details_are_served_from_the_cache(api):
+    api.ttl_seconds = 60
+    api.prefetch_details("application", ["APP001", "APP002"]).result()
+    assert [method for method, *_ in api.session.requests] == ["POST"]
+
+    details = api.get("/application/APP002")
+    assert details["application"]["application_id"] == "APP002"
+    assert len(api.session.requests) == 1
+    assert api.prefetch_details("application", ["APP001"]) is None
@@ -0,0 +1,105 @@
+import asyncio
+import threading
+
+from llm_chat.batch_runner import BatchJob, BatchRunner, group_questions
+from llm_chat.vertex_client import VertexClient
+from utils.data_processor import DataProcessor
+
+
+def _runner(tmp_path, catalog_dir):
+    data_processor = DataProcessor(catalog_dir)
+    client = VertexClient(data_processor)
+    runner = BatchRunner(lambda: client, data_processor.snapshot, output_dir=str(tmp_path / "jobs"),
+                         concurrency=4, rate_per_second=0)
+    return runner, client
+
+
+def test_upstream_failures_are_recorded_and_retried(tmp_path, catalog_dir):
+    runner, client = _runner(tmp_path, catalog_dir)
+
+    def unavailable(prompt, **kwargs):
+        raise RuntimeError("quota exceeded")
+
+    client.model.predict = unavailable
+    job = runner.create(["Which apps consume CAP001?", "What does APP002 provide?"])
+    asyncio.run(runner.run(job))
+
+    status = job.to_dict()
+    assert status["failed"] == 2 and status["completed"] == 0 and status["pending"] == 2
+    assert status["status"] != "completed"
+    assert all("quota exceeded" in result["error"] for result in job.results.values())
+
+    # Resuming from disk asks only the failed questions again
+    del client.model.predict
+    reopened = BatchJob.load(job.job_id, runner.output_dir)
+    assert len(reopened.pending_questions()) == 2
+    asyncio.run(runner.run(reopened))
+    assert reopened.to_dict()["completed"] == 2 and reopened.status == "completed"
+
+
+def test_each_question_gets_a_context_covering_its_application(tmp_path):
+    from benchmarks.generate_data import generate
+
+    data_dir = tmp_path / "generated"
+    generate(str(data_dir), applications=200, capabilities=50, consumes_per_app=3, seed=7)
+    runner, client = _runner(tmp_path, str(data_dir))
+    snapshot = runner.snapshot_provider()
+    app_ids = [app["application_id"] for app in snapshot.app_catalog]
+
+    contexts = {}
+    original = client.analyze_application_capability
+
+    async def record(question, snapshot, context=None, raise_errors=False):
+        contexts[question] = context
+        return await original(question, snapshot, context=context, raise_errors=raise_errors)
+
+    client.analyze_application_capability = record
+    job = runner.create([f"Summarize dependencies of {app_id}" for app_id in app_ids])
+    asyncio.run(runner.run(job))
+
+    assert job.status == "completed"
+    assert all(app_id in contexts[f"Summarize dependencies of {app_id}"] for app_id in app_ids)
+
+
+def test_questions_added_while_running_are_answered(tmp_path, catalog_dir):
+    runner, client = _runner(tmp_path, catalog_dir)
+
+    async def scenario():
+        job = runner.submit(["Which apps consume CAP001?"], job_id="nightly")
+        first_run = job.task
+        await asyncio.sleep(0)
+        assert job.status == "running"
+        reopened = runner.submit(["What does APP002 provide?"], job_id="nightly")
+        assert reopened is job and reopened.task is first_run
+        await first_run
+        return job
+
+    job = asyncio.run(scenario())
+    assert job.status == "completed"
+    assert job.to_dict()["completed"] == 2 and job.pending_questions() == []
+
+
+def test_templated_questions_get_a_group_each(catalog_dir):
+    snapshot = DataProcessor(catalog_dir).snapshot()
+    templated = [f"Summarize dependencies of {app['application_id']}" for app in snapshot.app_catalog]
+    assert sorted(map(len, group_questions(templated, snapshot))) == [1] * len(templated)
+
+    same_app = ["What does APP002 provide?", "Which capabilities does APP002 consume?"]
+    assert group_questions(same_app, snapshot) == [same_app]
+
+
+def test_contexts_are_built_off_the_event_loop(tmp_path, catalog_dir):
+    runner, client = _runner(tmp_path, catalog_dir)
+    threads = set()
+    original = client.analysis_context
+
+    def record(question, snapshot):
+        threads.add(threading.current_thread())
+        return original(question, snapshot)
+
+    client.analysis_context = record
+    job = runner.create(["Which apps consume CAP001?", "What does APP002 provide?"])
+    asyncio.run(runner.run(job))
+
+    assert job.status == "completed"
+    assert threads and threading.main_thread() not in threads
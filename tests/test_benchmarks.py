@@ -0,0 +1,23 @@
+import filecmp
+import os
+
+from benchmarks.generate_data import generate
+from benchmarks.run_benchmarks import compare, summarize
+from utils.data_processor import DataProcessor
+
+
+def test_generated_catalog_is_reproducible_and_loadable(tmp_path):
+    counts = generate(str(tmp_path / "a"), applications=300, capabilities=60, seed=11)
+    generate(str(tmp_path / "b"), applications=300, capabilities=60, seed=11)
+    for name in os.listdir(tmp_path / "a"):
+        assert filecmp.cmp(tmp_path / "a" / name, tmp_path / "b" / name, shallow=False)
+
+    snapshot = DataProcessor(str(tmp_path / "a")).snapshot()
+    assert counts["applications"] == snapshot.row_count("applications") == 300
+    assert counts["consumes"] == snapshot.row_count("consumes")
+
+
+def test_regressions_ignore_small_absolute_changes():
+    baseline = {"fast": summarize([0.0001] * 10), "slow": summarize([0.010] * 10)}
+    current = {"fast": summarize([0.0002] * 10), "slow": summarize([0.020] * 10), "new": summarize([0.001])}
+    assert compare(current, baseline, "p50_ms", tolerance=0.2, min_delta_ms=1.0) == ["slow"]
@@ -0,0 +1,31 @@
+import os
+
+from utils.data_processor import DataProcessor
+
+
+def test_snapshot_is_reused_until_the_files_change(catalog_dir):
+    loads = []
+    data_processor = DataProcessor(catalog_dir)
+    store = data_processor.store
+    store.check_interval = 0
+    store.incremental = False
+    original_loader = store.loader
+    store.loader = lambda: loads.append(1) or original_loader()
+
+    first = data_processor.snapshot()
+    assert data_processor.snapshot() is first and len(loads) == 1
+    assert first.get_application_details("APP001")["Application name"] == "Customer Portal"
+    assert {row["capability_id"] for row in first.get_consumed_capabilities("APP001")} >= {"CAP001", "CAP002"}
+    assert first.get_application_details("missing") == {}
+
+    path = os.path.join(catalog_dir, "application_catalog.csv")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("\nAPP999,Reporting Hub,Web Application,Cloud,Production,A,B,C\n")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    second = data_processor.snapshot()
+    assert second is not first and second.version != first.version and len(loads) == 2
+    assert second.get_application_details("APP999")["Application name"] == "Reporting Hub"
+    # The old snapshot is untouched for readers still holding it
+    assert first.get_application_details("APP999") == {}
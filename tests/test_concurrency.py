@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from llm_chat.concurrency import LLMCallGate, LLMTimeoutError
+
+
+def test_timed_out_blocking_call_keeps_its_slot():
+    gate = LLMCallGate(max_concurrency=1, timeout_seconds=0.05)
+    release = threading.Event()
+    started = []
+
+    def stuck():
+        release.wait(5)
+        return "late"
+
+    def quick():
+        started.append(time.monotonic())
+        return "ok"
+
+    async def scenario():
+        with pytest.raises(LLMTimeoutError):
+            await gate.run_blocking(stuck)
+        # The stuck call still occupies the only slot and pool thread
+        assert gate.stats()["running"] == 1
+        waiting = asyncio.ensure_future(gate.run_blocking(quick))
+        await asyncio.sleep(0.2)
+        assert not started and not waiting.done()
+
+        release.set()
+        assert await waiting == "ok"
+        assert gate.stats()["running"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_timed_out_async_call_is_cancelled_and_frees_its_slot():
+    gate = LLMCallGate(max_concurrency=1, timeout_seconds=0.05)
+
+    async def scenario():
+        with pytest.raises(LLMTimeoutError):
+            await gate.run(lambda: asyncio.sleep(5))
+        # Cancellation completes on the next loop iterations
+        await asyncio.sleep(0.01)
+        assert gate.stats()["running"] == 0
+        assert await gate.run(lambda: asyncio.sleep(0, result="ok")) == "ok"
+
+    asyncio.run(scenario())
+
+
+def test_identical_calls_in_flight_are_coalesced():
+    gate = LLMCallGate(max_concurrency=4, timeout_seconds=5)
+    calls = []
+
+    def predict(prompt):
+        calls.append(prompt)
+        time.sleep(0.05)
+        return prompt.upper()
+
+    async def scenario():
+        return await asyncio.gather(*(gate.run_blocking(predict, "q", key="same") for _ in range(5)),
+                                    gate.run_blocking(predict, "other", key="different"))
+
+    assert asyncio.run(scenario()) == ["Q"] * 5 + ["OTHER"]
+    assert sorted(calls) == ["other", "q"]
+    assert gate.stats()["coalesced"] == 4
+
+
+def test_timed_out_blocking_stream_keeps_its_slot():
+    gate = LLMCallGate(max_concurrency=1, timeout_seconds=0.05)
+    release = threading.Event()
+
+    def stuck_stream():
+        yield "first"
+        release.wait(5)
+        yield "late"
+
+    async def consume():
+        return [chunk async for chunk in gate.stream_blocking(stuck_stream)]
+
+    async def scenario():
+        with pytest.raises(LLMTimeoutError):
+            await consume()
+        # The pump thread is still blocked in the iterator
+        assert gate.stats()["running"] == 1
+        waiting = asyncio.ensure_future(gate.run_blocking(lambda: "ok"))
+        await asyncio.sleep(0.2)
+        assert not waiting.done()
+
+        release.set()
+        assert await waiting == "ok"
+        assert gate.stats()["running"] == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,25 @@
+from benchmarks.generate_data import generate
+from llm_chat.context_builder import build_context
+from llm_chat.prompt_encoding import estimate_tokens
+from utils.data_processor import DataProcessor
+
+
+def test_small_catalog_is_sent_whole(catalog_dir):
+    snapshot = DataProcessor(catalog_dir).snapshot()
+    context = build_context(snapshot, "Which applications consume CAP001?")
+    assert all(app["application_id"] in context for app in snapshot.app_catalog)
+    assert "most relevant" not in context
+
+
+def test_large_catalog_context_stays_within_budget(tmp_path):
+    generate(str(tmp_path), applications=2000, capabilities=300, consumes_per_app=5, seed=3)
+    snapshot = DataProcessor(str(tmp_path)).snapshot()
+    app = snapshot.app_catalog[1234]
+
+    context = build_context(snapshot, f"What does {app['application_id']} consume?", token_budget=1500)
+    assert estimate_tokens(context) <= 1500 + 100
+    assert app["application_id"] in context
+    # Its consumed capabilities come along with it
+    consumed = snapshot.get_consumed_capabilities(app["application_id"])
+    assert consumed and all(row["capability_id"] in context for row in consumed)
+    assert "most relevant" in context
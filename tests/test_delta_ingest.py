@@ -0,0 +1,66 @@
+import os
+
+import pandas as pd
+
+from utils.data_processor import DataProcessor
+
+
+def _lookups(snapshot):
+    """Every lookup result, with rows compared as order-independent multisets"""
+    def rows(result):
+        return sorted(repr(sorted(row.items())) for row in result)
+
+    app_ids = sorted({row["application_id"] for row in snapshot.app_catalog})
+    cap_ids = sorted({row["capability_id"] for row in snapshot.cap_catalog})
+    return {
+        "applications": {app_id: snapshot.get_application_details(app_id) for app_id in app_ids},
+        "capabilities": {cap_id: snapshot.get_capability_details(cap_id) for cap_id in cap_ids},
+        "consumed": {app_id: rows(snapshot.get_consumed_capabilities(app_id)) for app_id in app_ids},
+        "provided": {app_id: rows(snapshot.get_provided_capabilities(app_id)) for app_id in app_ids},
+        "consuming": {cap_id: rows(snapshot.get_consuming_applications(cap_id)) for cap_id in cap_ids},
+        "providing": {cap_id: rows(snapshot.get_providing_applications(cap_id)) for cap_id in cap_ids},
+        "tables": [rows(table) for table in snapshot.as_tuple()],
+    }
+
+
+def _edit(catalog_dir, name, edit):
+    path = os.path.join(catalog_dir, name)
+    frame = edit(pd.read_csv(path))
+    frame.to_csv(path, index=False)
+    # Make sure the fingerprint changes even on coarse mtime clocks
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_incremental_update_matches_full_reload(catalog_dir):
+    data_processor = DataProcessor(catalog_dir)
+    store = data_processor.store
+    store.check_interval = 0
+    before = data_processor.snapshot()
+    applied = []
+    store.add_listener(lambda snapshot, deltas: applied.append(deltas is not None))
+    for table in ("applications", "capabilities", "consumes", "provides"):
+        before.key_index(table)
+    before_lookups = _lookups(before)
+
+    consumes = "application_consumes_capability_mapping.csv"
+    # Duplicate mapping rows, a renamed application and a removed capability
+    _edit(catalog_dir, consumes, lambda frame: pd.concat([frame] + [frame[frame["application_id"] == "APP001"]] * 3))
+    _edit(catalog_dir, "application_catalog.csv",
+          lambda frame: frame.assign(**{"Application name": frame["Application name"].where(
+              frame["application_id"] != "APP002", "Payments Hub")}))
+    _edit(catalog_dir, "capability_catalog.csv", lambda frame: frame[frame["capability_id"] != "CAP003"])
+
+    updated = data_processor.snapshot()
+    assert applied == [True]
+    assert updated is not before and updated.version != before.version
+    assert _lookups(updated) == _lookups(DataProcessor(catalog_dir).snapshot())
+    assert len(updated.get_consumed_capabilities("APP001")) == 4 * len(before.get_consumed_capabilities("APP001"))
+
+    # Readers still holding the old snapshot see it unchanged
+    assert _lookups(before) == before_lookups
+
+    # Removing the duplicates again is also applied incrementally
+    _edit(catalog_dir, consumes, lambda frame: frame.drop_duplicates())
+    assert _lookups(data_processor.snapshot()) == _lookups(DataProcessor(catalog_dir).snapshot())
+    assert applied == [True, True]
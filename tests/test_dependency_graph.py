@@ -0,0 +1,39 @@
+from utils.dependency_graph import DOWNSTREAM, UPSTREAM, DependencyGraph
+
+
+def _graph():
+    # A -> C1 -> B -> C2 -> C -> C3 -> A (upstream), plus D consuming C2
+    return DependencyGraph(
+        ["A", "B", "C", "D"],
+        ["C1", "C2", "C3"],
+        consumes_pairs=[("A", "C1"), ("B", "C2"), ("C", "C3"), ("D", "C2")],
+        provides_pairs=[("B", "C1"), ("C", "C2"), ("A", "C3")],
+    )
+
+
+def test_traverse_counts_application_hops():
+    graph = _graph()
+    one_hop = graph.traverse("A", UPSTREAM, depth=1)
+    assert one_hop["applications"] == [{"application_id": "B", "depth": 1}]
+    assert one_hop["capabilities"] == [{"capability_id": "C1", "depth": 1}]
+
+    two_hops = graph.traverse("A", UPSTREAM, depth=2)
+    assert {(app["application_id"], app["depth"]) for app in two_hops["applications"]} == {("B", 1), ("C", 2)}
+
+
+def test_blast_radius_from_a_capability():
+    # Everything that breaks if C2 goes away: its consumers, then theirs
+    result = _graph().traverse("C2", DOWNSTREAM, depth=None)
+    assert {app["application_id"] for app in result["applications"]} == {"B", "D", "A", "C"}
+    assert _graph().traverse("missing") is None
+
+
+def test_shortest_path_and_cycles():
+    graph = _graph()
+    path = graph.shortest_path("A", "C", UPSTREAM)
+    assert [node["id"] for node in path] == ["A", "C1", "B", "C2", "C"]
+    assert graph.shortest_path("D", "missing") is None
+
+    cycles = graph.cycles()
+    assert len(cycles) == 1
+    assert {node["id"] for node in cycles[0]} == {"A", "B", "C", "C1", "C2", "C3"}
@@ -0,0 +1,47 @@
+import pytest
+
+from llm_chat import lazy_client
+from llm_chat.lazy_client import LazyModelClient, ModelNotReadyError
+
+
+def test_get_fails_until_the_client_is_built():
+    client = LazyModelClient(lambda: "model", name="test client")
+    assert client.status()["state"] == "not_started"
+    with pytest.raises(ModelNotReadyError):
+        client.get()
+
+    assert client.wait(5)
+    assert client.get() == "model"
+    assert client.status()["state"] == "ready"
+
+
+def test_failed_initialization_is_retried(monkeypatch):
+    monkeypatch.setattr(lazy_client, "LLM_INIT_RETRY_SECONDS", 0.01)
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("credentials unavailable")
+        return "model"
+
+    client = LazyModelClient(factory)
+    assert client.wait(5)
+    assert client.get() == "model"
+    assert client.attempts == 3
+    assert client.error is None
+
+
+def test_stop_ends_the_retries():
+    def factory():
+        raise RuntimeError("unreachable")
+
+    client = LazyModelClient(factory)
+    client.start()
+    assert not client.wait(0.2)
+    assert client.status()["state"] == "retrying"
+    with pytest.raises(ModelNotReadyError, match="unreachable"):
+        client.get()
+    client.stop()
+    client._thread.join(5)
+    assert not client._thread.is_alive()
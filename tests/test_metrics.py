@@ -0,0 +1,80 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from utils import metrics
+
+
+def test_histogram_renders_cumulative_buckets(monkeypatch):
+    monkeypatch.setattr(metrics, "REGISTRY", [])
+    histogram = metrics.Histogram("demo_seconds", "Demo", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, stage="load")
+
+    lines = metrics.render().splitlines()
+    assert lines[:2] == ["# HELP demo_seconds Demo", "# TYPE demo_seconds histogram"]
+    assert 'demo_seconds_bucket{stage="load",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{stage="load",le="1"} 3' in lines
+    assert 'demo_seconds_bucket{stage="load",le="+Inf"} 4' in lines
+    assert 'demo_seconds_count{stage="load"} 4' in lines
+
+
+def test_stages_are_timed_per_request_and_errors_counted():
+    timings, token = metrics.begin_request()
+    try:
+        with metrics.stage("lookup"):
+            pass
+        with pytest.raises(KeyError):
+            with metrics.stage("lookup"):
+                raise KeyError("x")
+    finally:
+        metrics.end_request(token)
+    assert list(timings) == ["lookup"]
+    assert metrics.STAGE_ERRORS.value(stage="lookup", error="KeyError") >= 1
+    assert metrics.server_timing(timings, 0.01).endswith("total;dur=10.00")
+
+
+def test_metrics_endpoint_serves_prometheus_text():
+    response = TestClient(server.app).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+
+
+def test_profiles_are_kept_only_for_requests_that_ran_alone(tmp_path):
+    profiler = metrics.RequestProfiler(sample_rate=1.0, slow_seconds=0, output_dir=str(tmp_path))
+
+    alone = profiler.start()
+    assert profiler.finish(alone, 0.5, "GET-/applications") is not None
+
+    # A request arriving mid-profile would be attributed to it
+    profiled = profiler.start()
+    other = profiler.start()
+    assert profiled is not None and other is None
+    profiler.finish(other, 0.1, "GET-/capabilities")
+    assert profiler.finish(profiled, 0.5, "GET-/applications") is None
+    assert profiler.discarded == 1
+
+    # Nor is a request sampled while another one is in flight
+    unsampled = metrics.RequestProfiler(sample_rate=0.0)
+    first = unsampled.start()
+    unsampled.sample_rate = 1.0
+    assert unsampled.start() is None
+    unsampled.finish(first, 0.1, "GET-/")
+    assert unsampled.in_flight == 1
+    assert profiler.dumps == 1 and len(list(tmp_path.iterdir())) == 1
+
+
+def _stage_count(stage: str) -> int:
+    lines = [line for line in metrics.render().splitlines()
+             if line.startswith(f'stage_duration_seconds_count{{stage="{stage}"}}')]
+    return int(lines[0].rsplit(" ", 1)[1]) if lines else 0
+
+
+def test_data_processor_lookups_are_timed(catalog_dir):
+    from utils.data_processor import DataProcessor
+
+    data_processor = DataProcessor(catalog_dir)
+    before = _stage_count("get_consumed_capabilities")
+    data_processor.get_consumed_capabilities("APP001")
+    assert _stage_count("get_consumed_capabilities") == before + 1
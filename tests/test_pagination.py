@@ -0,0 +1,13 @@
+import pytest
+
+from utils import pagination
+
+
+def test_cursor_round_trip():
+    assert pagination.decode_cursor(pagination.encode_cursor("APP001")) == "APP001"
+
+
+@pytest.mark.parametrize("cursor", ["%%%", "QVBQMDAx!", "QVBQMDA", "", "AA==", "_w=="])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError):
+        pagination.decode_cursor(cursor)
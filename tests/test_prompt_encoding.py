@@ -0,0 +1,22 @@
+from llm_chat.prompt_encoding import encode_catalog, encode_table
+
+
+def test_tables_write_headers_once_and_drop_empty_columns():
+    rows = [{"id": "APP001", "name": "Portal", "notes": float("nan")},
+            {"id": "APP002", "name": "Pay|Gate", "notes": None}]
+    assert encode_table("APPLICATIONS", rows) == "APPLICATIONS (id|name)\nAPP001|Portal\nAPP002|Pay/Gate"
+    assert encode_table("APPLICATIONS", []) == "APPLICATIONS: none"
+
+
+def test_catalog_encodes_mappings_as_adjacency_with_a_legend():
+    apps = [{"application_id": "APP001", "Application name": "Portal"}]
+    consumes = [
+        {"Application Name": "Portal", "application_id": "APP001", "capability Name": "Auth", "capability_id": "CAP001"},
+        {"Application Name": "Portal", "application_id": "APP001", "capability Name": "Pay", "capability_id": "CAP002"},
+        {"Application Name": "Portal", "application_id": "APP001", "capability Name": "Auth", "capability_id": "CAP001"},
+    ]
+    text = encode_catalog(apps, [], consumes, [])
+    assert "CONSUMES (application_id: capability_ids)\nAPP001: CAP001,CAP002" in text
+    # Capabilities not listed in their own table are named once, the application not at all
+    assert text.endswith("NAMES (id=name)\nCAP001=Auth\nCAP002=Pay")
+    assert text.count("Portal") == 1
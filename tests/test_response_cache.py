@@ -0,0 +1,35 @@
+import time
+
+from llm_chat.response_cache import ResponseCache, normalize_question
+
+
+def test_keys_normalize_the_question_and_include_the_data_version():
+    assert normalize_question("  Which apps   use CAP001?? ") == "which apps use cap001"
+    key = ResponseCache.make_key("Which apps use CAP001?", "model", "v1")
+    assert ResponseCache.make_key("which apps  use cap001", "model", "v1") == key
+    assert ResponseCache.make_key("Which apps use CAP001?", "model", "v2") != key
+    assert ResponseCache.make_key("Which apps use CAP001?", "other-model", "v1") != key
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    cache = ResponseCache(max_entries=2, ttl_seconds=3600)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+    # "b" was least recently used
+    assert cache.get("b") is None and cache.get("a") == "1" and cache.get("c") == "3"
+
+    expiring = ResponseCache(ttl_seconds=60)
+    expiring.set("a", "1")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert expiring.get("a") is None
+
+
+def test_persistent_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    ResponseCache(db_path=path).set("key", "answer")
+    restarted = ResponseCache(db_path=path)
+    assert restarted.get("key") == "answer"
+    assert restarted.stats()["disk_hits"] == 1
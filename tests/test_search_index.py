@@ -0,0 +1,22 @@
+from utils.data_processor import DataProcessor
+from utils.search_index import SearchIndex, search_index_for
+
+
+def _index(catalog_dir) -> SearchIndex:
+    return search_index_for(DataProcessor(catalog_dir).snapshot())
+
+
+def test_exact_ids_and_name_prefixes_rank_first(catalog_dir):
+    index = _index(catalog_dir)
+    assert index.search("APP002")[0]["id"] == "APP002"
+    assert index.search("payment gate")[0]["id"] == "APP002"
+    assert {result["id"] for result in index.search("Invent", limit=2)} == {"CAP003", "APP003"}
+
+
+def test_typos_still_match_and_kind_filters(catalog_dir):
+    index = _index(catalog_dir)
+    assert index.search("notifcation servce")[0]["name"] == "Notification Service"
+    results = index.search("user authentication", kind="capability")
+    assert results and all(result["type"] == "capability" for result in results)
+    assert results[0]["id"] == "CAP001"
+    assert index.search("   ") == []
@@ -0,0 +1,139 @@
+import copy
+import json
+import os
+import time
+from email.utils import formatdate
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from llm_chat.lazy_client import LazyModelClient
+from utils.data_processor import DataProcessor
+
+
+@pytest.fixture
+def client(catalog_dir, monkeypatch):
+    """API client serving the copied catalog, without starting the background workers"""
+    monkeypatch.setattr(server, "data_processor", DataProcessor(catalog_dir))
+    return TestClient(server.app)
+
+
+def test_ndjson_writes_empty_cells_as_null(client, catalog_dir):
+    path = f"{catalog_dir}/capability_catalog.csv"
+    caps = pd.read_csv(path)
+    caps.loc[0, "notes"] = None
+    caps.to_csv(path, index=False)
+
+    response = client.get("/capabilities", params={"format": "ndjson"})
+    rows = [json.loads(line, parse_constant=pytest.fail) for line in response.text.splitlines()]
+    assert len(rows) == len(caps)
+    assert rows[0]["notes"] is None
+
+
+def test_ndjson_pages_follow_limit_and_cursor(client):
+    everything = client.get("/applications", params={"format": "ndjson"}).text.splitlines()
+
+    lines, cursor = [], None
+    while True:
+        params = {"format": "ndjson", "limit": 4}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/applications", params=params)
+        page = response.text.splitlines()
+        assert len(page) <= 4
+        lines.extend(page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert lines == everything
+
+
+@pytest.mark.parametrize("format", ["json", "ndjson"])
+def test_malformed_cursor_is_a_bad_request(client, format):
+    response = client.get("/applications", params={"cursor": "%%%", "format": format})
+    assert response.status_code == 400
+
+
+def test_batch_lookup_matches_single_lookups(client, monkeypatch):
+    response = client.post("/applications/batch", json={"ids": ["APP001", "APP002", "APP001", "APP404"]})
+    assert response.status_code == 200
+    body = response.json()
+    assert list(body["results"]) == ["APP001", "APP002"]
+    assert body["not_found"] == ["APP404"]
+    assert body["results"]["APP001"] == client.get("/application/APP001").json()
+
+    capabilities = client.post("/capabilities/batch", json={"ids": ["CAP001"]}).json()
+    assert capabilities["results"]["CAP001"] == client.get("/capability/CAP001").json()
+
+    monkeypatch.setattr(server, "MAX_BATCH_IDS", 2)
+    assert client.post("/applications/batch", json={"ids": ["A", "B", "C"]}).status_code == 413
+
+
+def test_conditional_get_answers_304_for_the_current_version(client):
+    response = client.get("/applications")
+    etag = response.headers["ETag"]
+    assert response.status_code == 200 and etag == f'W/"{response.json()["data_version"]}"'
+
+    assert client.get("/applications", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/application/APP001", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/applications", headers={"If-Modified-Since": response.headers["Last-Modified"]}).status_code == 304
+    assert client.get("/applications", headers={"If-None-Match": 'W/"stale"'}).status_code == 200
+
+
+def test_last_modified_is_the_same_in_every_worker(client, catalog_dir, monkeypatch):
+    first = client.get("/applications").headers["Last-Modified"]
+    # Another worker (or a restart) loading the same files
+    monkeypatch.setattr(server, "data_processor", DataProcessor(catalog_dir))
+    time.sleep(1.1)
+    assert client.get("/applications").headers["Last-Modified"] == first
+    newest = max(os.stat(os.path.join(catalog_dir, name)).st_mtime for name in os.listdir(catalog_dir))
+    assert first == formatdate(newest, usegmt=True)
+
+
+def test_no_validators_when_the_data_changes_mid_request(client, monkeypatch):
+    current = server.data_processor.snapshot()
+    changed = copy.copy(current)
+    changed.version = "changed"
+
+    class ChangingProcessor:
+        calls = 0
+
+        def snapshot(self):
+            # The middleware sees the old version, the handler and re-check the new one
+            ChangingProcessor.calls += 1
+            return current if ChangingProcessor.calls == 1 else changed
+
+    monkeypatch.setattr(server, "data_processor", ChangingProcessor())
+    response = client.get("/applications")
+    assert response.status_code == 200 and response.json()["data_version"] == "changed"
+    assert "ETag" not in response.headers and "Last-Modified" not in response.headers
+
+
+def test_large_responses_are_compressed(client):
+    response = client.get("/applications", headers={"Accept-Encoding": "gzip"})
+    assert response.headers.get("Content-Encoding") in ("gzip", "br")
+    assert len(response.json()["applications"]) == 10
+
+
+def test_health_and_readiness_do_not_wait_for_the_llm(client, monkeypatch):
+    monkeypatch.setattr(server, "vertex_client", LazyModelClient(lambda: None))
+    assert client.get("/healthz").json() == {"status": "ok"}
+
+    # Nothing has read the catalog yet
+    assert client.get("/readyz").status_code == 503
+    client.get("/")
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.json()["llm"]["state"] == "not_started"
+
+    monkeypatch.setattr(server, "READY_REQUIRES_LLM", True)
+    assert client.get("/readyz").status_code == 503
+
+
+def test_analyze_answers_503_while_the_llm_client_initializes(client, monkeypatch):
+    monkeypatch.setattr(server, "vertex_client", LazyModelClient(lambda: None))
+    response = client.post("/analyze", json={"question": "Which applications provide payments?"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == server.LLM_RETRY_AFTER
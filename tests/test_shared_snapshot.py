@@ -0,0 +1,45 @@
+import os
+import threading
+
+from utils import shared_snapshot
+from utils.catalog_store import CatalogStore
+from utils.delta_ingest import CatalogWatcher
+
+
+def test_requests_leave_publishing_to_the_watcher(catalog_dir, tmp_path, monkeypatch):
+    publish_threads = []
+    original_publish = shared_snapshot.publish
+
+    def recording_publish(data_dir, shared_dir):
+        publish_threads.append(threading.current_thread().name)
+        return original_publish(data_dir, shared_dir)
+
+    monkeypatch.setattr(shared_snapshot, "publish", recording_publish)
+    store = CatalogStore(catalog_dir, loader=None, check_interval=0, shared_dir=str(tmp_path / "shared"))
+    first = store.get()
+    assert len(publish_threads) == 1
+
+    # A watcher that has not polled yet: requests must not publish in its place
+    watcher = CatalogWatcher(store, interval=60)
+    watcher.start()
+    try:
+        path = os.path.join(catalog_dir, "capability_catalog.csv")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        assert store.get() is first
+        assert len(publish_threads) == 1
+
+        # The watcher's check publishes and swaps in the new generation
+        checker = threading.Thread(target=store.check, name="catalog-watcher")
+        checker.start()
+        checker.join()
+        assert store.get().version != first.version
+        assert publish_threads[1:] == ["catalog-watcher"]
+    finally:
+        watcher.stop()
+
+    # Without a watcher, get() checks for changes itself again
+    assert not store.background_checks
@@ -0,0 +1,72 @@
+import math
+import os
+
+import pandas as pd
+
+from utils.catalog_store import source_fingerprint
+from utils.data_processor import DataProcessor
+from utils.snapshot_file import MappedCatalogSnapshot, compile_snapshot, read_source_fingerprint
+
+
+def test_compiled_snapshot_answers_like_the_csvs(catalog_dir, tmp_path):
+    path = str(tmp_path / "catalog.snap")
+    version = compile_snapshot(catalog_dir, path)
+    assert read_source_fingerprint(path) == source_fingerprint(catalog_dir)
+
+    mapped = MappedCatalogSnapshot(path)
+    loaded = DataProcessor(catalog_dir).snapshot()
+    assert mapped.version == loaded.version == version
+    for table in ("applications", "capabilities", "consumes", "provides"):
+        assert mapped.row_count(table) == loaded.row_count(table)
+    for app in loaded.app_catalog:
+        app_id = app["application_id"]
+        assert mapped.get_application_details(app_id) == app
+        assert mapped.get_consumed_capabilities(app_id) == loaded.get_consumed_capabilities(app_id)
+        assert mapped.get_provided_capabilities(app_id) == loaded.get_provided_capabilities(app_id)
+    for cap in loaded.cap_catalog:
+        cap_id = cap["capability_id"]
+        assert mapped.get_capability_details(cap_id) == cap
+        assert mapped.get_consuming_applications(cap_id) == loaded.get_consuming_applications(cap_id)
+        assert mapped.get_providing_applications(cap_id) == loaded.get_providing_applications(cap_id)
+    assert mapped.get_application_details("missing") == {}
+
+
+def test_stale_snapshot_is_detected(catalog_dir, tmp_path):
+    path = str(tmp_path / "catalog.snap")
+    compile_snapshot(catalog_dir, path)
+    csv_path = os.path.join(catalog_dir, "capability_catalog.csv")
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert read_source_fingerprint(path) != source_fingerprint(catalog_dir)
+
+
+def _same(left, right):
+    # NaN never equals itself; empty cells must be NaN on both sides
+    return left.keys() == right.keys() and all(
+        left[key] == right[key] or (isinstance(left[key], float) and math.isnan(left[key]) and math.isnan(right[key]))
+        for key in left)
+
+
+def test_empty_and_numeric_cells_decode_like_the_csvs(catalog_dir, tmp_path):
+    apps_path = os.path.join(catalog_dir, "application_catalog.csv")
+    apps = pd.read_csv(apps_path)
+    apps["headcount"] = range(len(apps))
+    apps["budget"] = [1.5] + [None] * (len(apps) - 1)
+    apps.loc[0, "Disposition"] = None
+    apps.to_csv(apps_path, index=False)
+    caps_path = os.path.join(catalog_dir, "capability_catalog.csv")
+    caps = pd.read_csv(caps_path)
+    caps.loc[1, "notes"] = None
+    caps.to_csv(caps_path, index=False)
+
+    path = str(tmp_path / "catalog.snap")
+    compile_snapshot(catalog_dir, path)
+    mapped = MappedCatalogSnapshot(path)
+    loaded = DataProcessor(catalog_dir).snapshot()
+
+    assert all(map(_same, mapped.app_catalog, loaded.app_catalog))
+    assert all(map(_same, mapped.cap_catalog, loaded.cap_catalog))
+    first = mapped.get_application_details(loaded.app_catalog[0]["application_id"])
+    assert type(first["headcount"]) is int and first["budget"] == 1.5
+    assert math.isnan(first["Disposition"])
+    assert mapped.app_catalog is mapped.app_catalog
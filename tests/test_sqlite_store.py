@@ -0,0 +1,71 @@
+import os
+
+from utils import pagination, sqlite_store
+from utils.catalog_store import CatalogStore
+from utils.data_processor import DataProcessor
+
+
+def test_sqlite_backend_answers_like_the_csvs(catalog_dir, tmp_path):
+    data_processor = DataProcessor(catalog_dir)
+    loaded = data_processor.snapshot()
+    store = CatalogStore(catalog_dir, data_processor.load_data, db_path=str(tmp_path / "catalog.db"))
+    snapshot = store.get()
+    assert snapshot.version == loaded.version
+
+    for table in ("applications", "capabilities", "consumes", "provides"):
+        assert snapshot.row_count(table) == loaded.row_count(table)
+    for app in loaded.app_catalog:
+        app_id = app["application_id"]
+        assert snapshot.get_application_details(app_id) == app
+        assert snapshot.get_consumed_capabilities(app_id) == loaded.get_consumed_capabilities(app_id)
+        assert snapshot.get_provided_capabilities(app_id) == loaded.get_provided_capabilities(app_id)
+    for cap in loaded.cap_catalog:
+        cap_id = cap["capability_id"]
+        assert snapshot.get_capability_details(cap_id) == cap
+        assert snapshot.get_consuming_applications(cap_id) == loaded.get_consuming_applications(cap_id)
+        assert snapshot.get_providing_applications(cap_id) == loaded.get_providing_applications(cap_id)
+
+
+def _all_pages(snapshot):
+    pages, cursor = [], None
+    while True:
+        page = pagination.page(snapshot, "applications", {"Platform": "cloud"}, cursor, 3, ["application_id"])
+        pages.append(page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            return pages
+
+
+def test_sqlite_pages_match_the_in_memory_pages(catalog_dir, tmp_path):
+    data_processor = DataProcessor(catalog_dir)
+    store = CatalogStore(catalog_dir, data_processor.load_data, db_path=str(tmp_path / "catalog.db"))
+    expected = _all_pages(data_processor.snapshot())
+    assert len(expected) > 1
+    assert _all_pages(store.get()) == expected
+
+
+def test_a_snapshot_keeps_reading_the_import_it_was_opened_on(catalog_dir, tmp_path):
+    db_path = str(tmp_path / "catalog.db")
+    store = CatalogStore(catalog_dir, DataProcessor(catalog_dir).load_data, db_path=db_path)
+    snapshot = store.get()
+    before = snapshot.get_application_details("APP001")
+
+    path = f"{catalog_dir}/application_catalog.csv"
+    with open(path, encoding="utf-8") as f:
+        rows = f.read().replace("APP001,", "APP001-RENAMED,", 1)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(rows)
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 1_000_000_000))
+    # Another worker imports the change while this snapshot is still in use
+    assert sqlite_store.import_catalog(catalog_dir, db_path) != snapshot.version
+
+    assert snapshot.get_application_details("APP001") == before
+    assert len(list(snapshot.iter_rows("applications"))) == snapshot.row_count("applications")
+    assert store.check().get_application_details("APP001") == {}
+
+
+def test_iter_rows_fetches_in_chunks(catalog_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(sqlite_store, "LIST_BATCH_SIZE", 2)
+    data_processor = DataProcessor(catalog_dir)
+    store = CatalogStore(catalog_dir, data_processor.load_data, db_path=str(tmp_path / "catalog.db"))
+    assert list(store.get().iter_rows("consumes")) == data_processor.snapshot().consumes_mapping
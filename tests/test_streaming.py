@@ -0,0 +1,38 @@
+import json
+
+from fastapi.testclient import TestClient
+
+import server
+from llm_chat.tools import AnswerStream
+
+
+def test_answer_stream_shows_only_the_decoded_answer():
+    reader = AnswerStream()
+    shown = "".join(reader.feed(chunk) for chunk in ('```json\n{"ans', 'wer": "Line\\', 'none \\u00e9', '"}\n```'))
+    assert shown == "Line\none é"
+    assert reader.finish() == ([], "")
+
+    tools = AnswerStream()
+    assert tools.feed('{"tool_calls": [{"name": "get_capability_details", ') == ""
+    assert tools.feed('"arguments": {"capability_id": "CAP001"}}]}') == ""
+    calls, rest = tools.finish()
+    assert calls[0]["name"] == "get_capability_details" and rest == ""
+
+
+def test_analyze_stream_sends_text_then_done():
+    assert server.vertex_client.wait(10)
+    client = TestClient(server.app)
+    with client.stream("POST", "/analyze/stream", json={"question": "Who provides CAP001?"}) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.headers["content-encoding"] == "identity"
+        lines = [line for line in response.iter_lines() if line]
+
+    events, event = [], "message"
+    for line in lines:
+        if line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            events.append((event, json.loads(line[len("data:"):])))
+            event = "message"
+    assert "".join(data["text"] for kind, data in events if kind == "message") == "Benchmark answer"
+    assert events[-1][0] == "done" and events[-1][1]["data_version"]
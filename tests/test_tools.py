@@ -0,0 +1,54 @@
+import asyncio
+import json
+
+from llm_chat.tools import execute_tool_calls, parse_model_output
+from llm_chat.vertex_client import VertexClient
+from utils.data_processor import DataProcessor
+
+
+def test_parse_model_output_formats():
+    calls, answer = parse_model_output('```json\n{"tool_calls": [{"name": "get_application_details", '
+                                       '"arguments": {"application_id": "APP001"}}]}\n```')
+    assert calls == [{"name": "get_application_details", "arguments": {"application_id": "APP001"}}]
+    assert answer is None
+    assert parse_model_output('Sure: {"answer": "Two apps"}') == ([], "Two apps")
+    assert parse_model_output("TOOL: get_consumed_capabilities('APP002')") == (
+        [{"name": "get_consumed_capabilities", "arguments": {"application_id": "APP002"}}], None)
+    assert parse_model_output("ANSWER: plain text") == ([], "plain text")
+
+
+def test_tool_calls_run_once_each_and_report_errors(catalog_dir):
+    snapshot = DataProcessor(catalog_dir).snapshot()
+    call = {"name": "get_consumed_capabilities", "arguments": {"application_id": "APP001"}}
+    results = asyncio.run(execute_tool_calls(snapshot, [call, dict(call), {"name": "drop_tables", "arguments": {}},
+                                                        {"name": "get_capability_details", "arguments": {}}]))
+    assert len(results) == 3
+    assert {row["capability_id"] for row in results[0]["result"]} >= {"CAP001", "CAP002"}
+    assert "Application Name" not in results[0]["result"][0]
+    assert results[1]["error"] == "Unknown tool: drop_tables"
+    assert results[2]["error"] == "Missing argument: capability_id"
+
+
+def test_agent_loop_feeds_tool_results_back(catalog_dir):
+    data_processor = DataProcessor(catalog_dir)
+    client = VertexClient(data_processor)
+    prompts = []
+
+    class Reply:
+        def __init__(self, text):
+            self.text = text
+
+    def predict(prompt, **kwargs):
+        prompts.append(prompt)
+        if len(prompts) == 1:
+            return Reply(json.dumps({"tool_calls": [
+                {"name": "get_providing_applications", "arguments": {"capability_id": "CAP001"}},
+                {"name": "get_consuming_applications", "arguments": {"capability_id": "CAP001"}},
+            ]}))
+        return Reply('{"answer": "APP007 provides it"}')
+
+    client.model.predict = predict
+    answer = asyncio.run(client.analyze_application_capability("Who provides CAP001?", data_processor.snapshot()))
+    assert answer == "APP007 provides it"
+    assert len(prompts) == 2 and client.agent_model_calls == 2
+    assert "Tool results so far" in prompts[1] and "APP007" in prompts[1]
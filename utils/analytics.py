@@ -0,0 +1,240 @@
+"""
+Deterministic portfolio metrics computed with vectorized pandas operations.
+
+The mapping tables are reduced to unique (application_id, capability_id)
+pairs, and an application-level dependency edge list is derived by joining
+consumers to providers on capability_id:
+
+    consumer_id -> provider_id via capability_id
+
+Fan-in, fan-out, unprovided and multi-provider capabilities and critical
+legacy applications are all group-bys over these frames. After an
+incremental catalog update only the edges of the touched capabilities are
+re-joined.
+"""
+import copy
+import threading
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+APPLICATION_COLUMNS = ["application_id", "Application name", "Type", "Platform", "Disposition"]
+CAPABILITY_COLUMNS = ["capability_id", "name", "status"]
+PAIR_COLUMNS = ["application_id", "capability_id"]
+
+# Type/Platform values that mark an application as legacy
+LEGACY_TYPES = ("legacy",)
+LEGACY_PLATFORMS = ("on-premise",)
+
+
+def _frame(rows: List[Dict], columns: List[str]) -> pd.DataFrame:
+    frame = pd.DataFrame(rows)
+    for column in columns:
+        if column not in frame.columns:
+            frame[column] = None
+    return frame[columns]
+
+
+def _pairs(rows: List[Dict]) -> pd.DataFrame:
+    return _frame(rows, PAIR_COLUMNS).dropna().drop_duplicates().reset_index(drop=True)
+
+
+def _join_edges(consumes: pd.DataFrame, provides: pd.DataFrame) -> pd.DataFrame:
+    edges = consumes.merge(provides, on="capability_id", suffixes=("_consumer", "_provider"))
+    edges = edges.rename(columns={"application_id_consumer": "consumer_id",
+                                  "application_id_provider": "provider_id"})
+    # An application providing what it consumes does not depend on itself
+    return edges[edges["consumer_id"] != edges["provider_id"]][["consumer_id", "provider_id", "capability_id"]]
+
+
+def _records(frame: pd.DataFrame) -> List[Dict]:
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+
+class PortfolioAnalytics:
+    """
+    Portfolio metrics for one catalog version
+
+    An instance never changes once built: an incremental update produces a
+    new instance (see with_delta), so metrics cached on it always match its
+    data.
+    """
+
+    def __init__(self, snapshot):
+        self.version = snapshot.version
+        self._load_catalogs(snapshot)
+        self.consumes = _pairs(snapshot.consumes_mapping)
+        self.provides = _pairs(snapshot.provides_mapping)
+        self._set_edges(_join_edges(self.consumes, self.provides))
+        self._metrics: Dict[str, object] = {}
+
+    def _set_edges(self, edges: pd.DataFrame) -> None:
+        self.edges = edges
+        # Unique consumer -> provider application dependencies
+        self.dependencies = edges[["consumer_id", "provider_id"]].drop_duplicates()
+
+    def _load_catalogs(self, snapshot) -> None:
+        self.applications = _frame(snapshot.app_catalog, APPLICATION_COLUMNS).drop_duplicates("application_id")
+        self.capabilities = _frame(snapshot.cap_catalog, CAPABILITY_COLUMNS).drop_duplicates("capability_id")
+
+    def with_delta(self, snapshot, deltas) -> "PortfolioAnalytics":
+        """
+        Metrics for the snapshot produced by an incremental catalog update
+
+        Catalog tables are small and re-read; for mapping changes only the
+        dependency edges through the touched capabilities are re-joined.
+        Frames are replaced, never modified, so they are shared with this
+        instance where unchanged.
+        """
+        updated = copy.copy(self)
+        updated._metrics = {}
+        updated._apply_delta(snapshot, deltas)
+        return updated
+
+    def _apply_delta(self, snapshot, deltas) -> None:
+        touched = set()
+        for delta in deltas:
+            if not delta:
+                continue
+            if delta.table in ("applications", "capabilities"):
+                self._load_catalogs(snapshot)
+                continue
+            removed = _pairs(delta.removed)
+            added = _pairs(delta.added)
+            current = self.consumes if delta.table == "consumes" else self.provides
+            if len(removed):
+                keep = ~pd.MultiIndex.from_frame(current).isin(pd.MultiIndex.from_frame(removed))
+                current = current[keep]
+            updated = pd.concat([current, added], ignore_index=True).drop_duplicates().reset_index(drop=True)
+            if delta.table == "consumes":
+                self.consumes = updated
+            else:
+                self.provides = updated
+            touched.update(removed["capability_id"])
+            touched.update(added["capability_id"])
+
+        if touched:
+            touched_list = list(touched)
+            self._set_edges(pd.concat([
+                self.edges[~self.edges["capability_id"].isin(touched_list)],
+                _join_edges(self.consumes[self.consumes["capability_id"].isin(touched_list)],
+                            self.provides[self.provides["capability_id"].isin(touched_list)]),
+            ], ignore_index=True))
+        self.version = snapshot.version
+
+    def _cached(self, name: str, compute):
+        if name not in self._metrics:
+            self._metrics[name] = compute()
+        return self._metrics[name]
+
+    def _capability_counts(self) -> pd.DataFrame:
+        def compute():
+            counts = pd.DataFrame({
+                "consumer_count": self.consumes.groupby("capability_id")["application_id"].nunique(),
+                "provider_count": self.provides.groupby("capability_id")["application_id"].nunique(),
+            })
+            ids = pd.Index(self.capabilities["capability_id"]).union(counts.index)
+            counts = counts.reindex(ids).fillna(0).astype(int)
+            counts.index.name = "capability_id"
+            names = self.capabilities.set_index("capability_id")["name"]
+            counts.insert(0, "name", names.reindex(counts.index))
+            return counts.reset_index()
+        return self._cached("capability_counts", compute)
+
+    def _coupling(self) -> pd.DataFrame:
+        def compute():
+            pairs = self.dependencies
+            frame = pd.DataFrame({
+                "fan_in": pairs.groupby("provider_id")["consumer_id"].nunique(),
+                "fan_out": pairs.groupby("consumer_id")["provider_id"].nunique(),
+            })
+            ids = pd.Index(self.applications["application_id"]).union(frame.index)
+            frame = frame.reindex(ids).fillna(0).astype(int)
+            frame.index.name = "application_id"
+            apps = self.applications.set_index("application_id")
+            frame = apps.reindex(frame.index).join(frame)
+            return frame.reset_index()
+        return self._cached("coupling", compute)
+
+    def unprovided_capabilities(self) -> List[Dict]:
+        """Capabilities that are consumed but have no provider"""
+        counts = self._capability_counts()
+        result = counts[(counts["consumer_count"] > 0) & (counts["provider_count"] == 0)]
+        return _records(result.sort_values(["consumer_count", "capability_id"], ascending=[False, True]))
+
+    def multi_provider_capabilities(self) -> List[Dict]:
+        """Capabilities with more than one providing application"""
+        counts = self._capability_counts()
+        result = counts[counts["provider_count"] > 1]
+        return _records(result.sort_values(["provider_count", "capability_id"], ascending=[False, True]))
+
+    def unused_capabilities(self) -> List[Dict]:
+        """Capabilities that are neither consumed nor provided"""
+        counts = self._capability_counts()
+        result = counts[(counts["consumer_count"] == 0) & (counts["provider_count"] == 0)]
+        return _records(result.sort_values("capability_id"))
+
+    def top_fan_in(self, limit: int = 20) -> List[Dict]:
+        """Applications the most other applications depend on"""
+        coupling = self._coupling()
+        return _records(coupling.sort_values(["fan_in", "application_id"], ascending=[False, True]).head(limit))
+
+    def top_fan_out(self, limit: int = 20) -> List[Dict]:
+        """Applications that depend on the most other applications"""
+        coupling = self._coupling()
+        return _records(coupling.sort_values(["fan_out", "application_id"], ascending=[False, True]).head(limit))
+
+    def critical_legacy_applications(self, min_fan_in: int = 1) -> List[Dict]:
+        """Legacy or on-premise applications that other applications depend on"""
+        coupling = self._coupling()
+        legacy = (coupling["Type"].fillna("").str.strip().str.lower().isin(LEGACY_TYPES)
+                  | coupling["Platform"].fillna("").str.strip().str.lower().isin(LEGACY_PLATFORMS))
+        result = coupling[legacy & (coupling["fan_in"] >= min_fan_in)]
+        return _records(result.sort_values(["fan_in", "application_id"], ascending=[False, True]))
+
+    def summary(self) -> Dict:
+        counts = self._capability_counts()
+        coupling = self._coupling()
+        return {
+            "data_version": self.version,
+            "applications": int(len(self.applications)),
+            "capabilities": int(len(self.capabilities)),
+            "consumes_pairs": int(len(self.consumes)),
+            "provides_pairs": int(len(self.provides)),
+            "application_dependencies": int(len(self.dependencies)),
+            "unprovided_capabilities": int(((counts["consumer_count"] > 0) & (counts["provider_count"] == 0)).sum()),
+            "multi_provider_capabilities": int((counts["provider_count"] > 1).sum()),
+            "unused_capabilities": int(((counts["consumer_count"] == 0) & (counts["provider_count"] == 0)).sum()),
+            "isolated_applications": int(((coupling["fan_in"] == 0) & (coupling["fan_out"] == 0)).sum()),
+        }
+
+
+class AnalyticsService:
+    """
+    Keeps PortfolioAnalytics in step with a CatalogStore.
+
+    Incremental catalog updates are applied via a store listener, which
+    swaps in a new PortfolioAnalytics built from the previous one; readers
+    keep using the instance they already have. Full reloads rebuild the
+    metrics on next use.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._analytics: Optional[PortfolioAnalytics] = None
+        self._lock = threading.Lock()
+        store.add_listener(self._on_change)
+
+    def _on_change(self, snapshot, deltas) -> None:
+        with self._lock:
+            if deltas is None or self._analytics is None:
+                self._analytics = None
+                return
+            self._analytics = self._analytics.with_delta(snapshot, deltas)
+
+    def get(self) -> PortfolioAnalytics:
+        snapshot = self.store.get()
+        with self._lock:
+            if self._analytics is None or self._analytics.version != snapshot.version:
+                self._analytics = PortfolioAnalytics(snapshot)
+            return self._analytics
@@ -0,0 +1,454 @@
+import copy
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.metrics import stage
+
+# Source files that make up one catalog snapshot, in load_data() order
+CATALOG_FILES = (
+    "application_catalog.csv",
+    "capability_catalog.csv",
+    "application_consumes_capability_mapping.csv",
+    "application_provides_capability_mapping.csv",
+)
+
+# Key columns identifying a row in each table, in CATALOG_FILES order
+TABLE_KEYS = {
+    "applications": ("application_id",),
+    "capabilities": ("capability_id",),
+    "consumes": ("application_id", "capability_id"),
+    "provides": ("application_id", "capability_id"),
+}
+
+logger = logging.getLogger(__name__)
+
+
+def source_fingerprint(data_dir: str) -> Tuple:
+    """Size and modification time of every catalog source file"""
+    fingerprint = []
+    for name in CATALOG_FILES:
+        try:
+            stat = os.stat(os.path.join(data_dir, name))
+            fingerprint.append((name, stat.st_size, stat.st_mtime_ns))
+        except FileNotFoundError:
+            fingerprint.append((name, None, None))
+    return tuple(fingerprint)
+
+
+def version_for(fingerprint: Tuple) -> str:
+    """Stable data version string for a source fingerprint"""
+    return hashlib.sha1(repr(tuple(tuple(entry) for entry in fingerprint)).encode("utf-8")).hexdigest()[:16]
+
+
+def modified_at_for(fingerprint: Tuple) -> float:
+    """Latest modification time (epoch seconds) of the source files in a fingerprint"""
+    return max((entry[2] for entry in fingerprint if entry[2] is not None), default=0) / 1e9
+
+
+def derived(snapshot, name: str, builder: Callable):
+    """
+    Memoize a structure derived from a snapshot, rebuilt when its version changes
+
+    Works for any snapshot type; ``builder`` is called with the snapshot.
+    """
+    cache = snapshot.__dict__.setdefault("_derived", {})
+    entry = cache.get(name)
+    if entry is None or entry[0] != snapshot.version:
+        entry = (snapshot.version, builder(snapshot))
+        cache[name] = entry
+    return entry[1]
+
+
+def _group_by(rows: List[Dict], key: str) -> Dict[str, List[Dict]]:
+    """Group rows by the value of a column, preserving row order"""
+    groups: Dict[str, List[Dict]] = {}
+    for row in rows:
+        groups.setdefault(row[key], []).append(row)
+    return groups
+
+
+def _index_by(rows: List[Dict], key: str) -> Dict[str, Dict]:
+    """Index rows by a key column, keeping the first row for duplicate keys"""
+    index: Dict[str, Dict] = {}
+    for row in rows:
+        index.setdefault(row[key], row)
+    return index
+
+
+def _regroup(groups: Dict[str, List[Dict]], group_key: str, key_columns: Tuple[str, ...],
+             removed: Dict[Tuple, Dict], replaced: Dict[Tuple, Dict], added: List[Dict]) -> None:
+    """Patch the groups touched by a delta, replacing each touched list wholesale"""
+    touched = {row[group_key] for row in removed.values()}
+    touched.update(row[group_key] for row in replaced.values())
+    touched.update(row[group_key] for row in added)
+    for value in touched:
+        rows = []
+        for row in groups.get(value, ()):
+            key = tuple(row[column] for column in key_columns)
+            if key in removed:
+                continue
+            rows.append(replaced.get(key, row))
+        rows.extend(row for row in added if row[group_key] == value)
+        if rows:
+            groups[value] = rows
+        else:
+            groups.pop(value, None)
+
+
+class CatalogSnapshot:
+    """
+    Indexed, read-only view of the four catalog datasets.
+
+    Hash indexes are built once per snapshot so every lookup costs O(1)
+    plus the size of its result instead of a scan over the whole catalog.
+    """
+
+    def __init__(self,
+                 app_catalog: List[Dict],
+                 cap_catalog: List[Dict],
+                 consumes_mapping: List[Dict],
+                 provides_mapping: List[Dict],
+                 version: str,
+                 modified_at: Optional[float] = None):
+        self.app_catalog = app_catalog
+        self.cap_catalog = cap_catalog
+        self.consumes_mapping = consumes_mapping
+        self.provides_mapping = provides_mapping
+        self.version = version
+        self.loaded_at = time.time()
+        # When the source data last changed; the same in every worker
+        self.modified_at = modified_at if modified_at is not None else self.loaded_at
+
+        self.apps_by_id = _index_by(app_catalog, 'application_id')
+        self.caps_by_id = _index_by(cap_catalog, 'capability_id')
+        self.consumes_by_app = _group_by(consumes_mapping, 'application_id')
+        self.consumes_by_cap = _group_by(consumes_mapping, 'capability_id')
+        self.provides_by_app = _group_by(provides_mapping, 'application_id')
+        self.provides_by_cap = _group_by(provides_mapping, 'capability_id')
+        self._key_indexes: Dict[str, Dict[Tuple, Dict]] = {}
+
+    _TABLE_ATTRS = {
+        "applications": "app_catalog",
+        "capabilities": "cap_catalog",
+        "consumes": "consumes_mapping",
+        "provides": "provides_mapping",
+    }
+
+    def row_count(self, table: str) -> int:
+        return len(getattr(self, self._TABLE_ATTRS[table]))
+
+    def key_index(self, table: str) -> Dict[Tuple, List[Dict]]:
+        """Rows of a table grouped by their TABLE_KEYS key, in file order, built on first use"""
+        index = self._key_indexes.get(table)
+        if index is None:
+            key_columns = TABLE_KEYS[table]
+            index = {}
+            for row in getattr(self, self._TABLE_ATTRS[table]):
+                index.setdefault(tuple(row[column] for column in key_columns), []).append(row)
+            self._key_indexes[table] = index
+        return index
+
+    def with_delta(self, deltas, version: str, modified_at: Optional[float] = None) -> "CatalogSnapshot":
+        """
+        A new snapshot with table deltas (see utils.delta_ingest) applied
+
+        This snapshot is left untouched, so readers holding it keep a
+        consistent view. Indexes of tables the deltas do not touch are
+        shared with the new snapshot; touched ones are copied and only the
+        entries for affected keys are replaced.
+        """
+        snapshot = copy.copy(self)
+        # Structures derived from this version must not leak into the new one
+        snapshot.__dict__.pop("_derived", None)
+        snapshot._key_indexes = dict(self._key_indexes)
+        for delta in deltas:
+            if not delta:
+                continue
+            key_columns = TABLE_KEYS[delta.table]
+
+            def key_of(row):
+                return tuple(row[column] for column in key_columns)
+
+            removed = {key_of(row): row for row in delta.removed}
+            replaced = {key_of(new): new for _, new in delta.changed}
+
+            attr = self._TABLE_ATTRS[delta.table]
+            rows = [replaced.get(key_of(row), row) for row in getattr(self, attr)
+                    if not removed or key_of(row) not in removed]
+            rows.extend(delta.added)
+            setattr(snapshot, attr, rows)
+
+            index = snapshot._key_indexes.get(delta.table)
+            if index is not None:
+                index = dict(index)
+                for key in removed:
+                    index.pop(key, None)
+                for key, row in replaced.items():
+                    index[key] = [row]
+                for row in delta.added:
+                    index[key_of(row)] = index.get(key_of(row), []) + [row]
+                snapshot._key_indexes[delta.table] = index
+
+            if delta.table in ("applications", "capabilities"):
+                name = "apps_by_id" if delta.table == "applications" else "caps_by_id"
+                by_id = dict(getattr(self, name))
+                for key in removed:
+                    by_id.pop(key[0], None)
+                for key, row in replaced.items():
+                    by_id[key[0]] = row
+                for row in delta.added:
+                    by_id.setdefault(key_of(row)[0], row)
+                setattr(snapshot, name, by_id)
+            else:
+                for name, group_key in ((f"{delta.table}_by_app", 'application_id'),
+                                        (f"{delta.table}_by_cap", 'capability_id')):
+                    groups = dict(getattr(self, name))
+                    _regroup(groups, group_key, key_columns, removed, replaced, delta.added)
+                    setattr(snapshot, name, groups)
+
+        snapshot.version = version
+        snapshot.loaded_at = time.time()
+        snapshot.modified_at = modified_at if modified_at is not None else snapshot.loaded_at
+        return snapshot
+
+    def as_tuple(self) -> Tuple[List[Dict], List[Dict], List[Dict], List[Dict]]:
+        """Return the raw datasets in the same order as DataProcessor.load_data()"""
+        return self.app_catalog, self.cap_catalog, self.consumes_mapping, self.provides_mapping
+
+    def get_application_details(self, application_id: str) -> Dict:
+        """Get details for a specific application"""
+        return self.apps_by_id.get(application_id, {})
+
+    def get_capability_details(self, capability_id: str) -> Dict:
+        """Get details for a specific capability"""
+        return self.caps_by_id.get(capability_id, {})
+
+    def get_consumed_capabilities(self, application_id: str) -> List[Dict]:
+        """Get all capabilities consumed by an application"""
+        return list(self.consumes_by_app.get(application_id, ()))
+
+    def get_provided_capabilities(self, application_id: str) -> List[Dict]:
+        """Get all capabilities provided by an application"""
+        return list(self.provides_by_app.get(application_id, ()))
+
+    def get_consuming_applications(self, capability_id: str) -> List[Dict]:
+        """Get all applications that consume a specific capability"""
+        return list(self.consumes_by_cap.get(capability_id, ()))
+
+    def get_providing_applications(self, capability_id: str) -> List[Dict]:
+        """Get all applications that provide a specific capability"""
+        return list(self.provides_by_cap.get(capability_id, ()))
+
+
+class CatalogStore:
+    """
+    Long-lived holder of the current CatalogSnapshot.
+
+    The source files are loaded once and re-checked at most every
+    ``check_interval`` seconds. When their size or modification time
+    changes a new snapshot is built off to the side and swapped in with a
+    single reference assignment, so readers always see a complete snapshot.
+
+    With ``incremental`` enabled (the default for the in-memory mode) only
+    the changed files are diffed row by row, and a copy of the snapshot
+    with just the affected index entries replaced is swapped in the same way.
+
+    When ``snapshot_path`` is set the CSVs are compiled into a binary
+    snapshot file (see ``utils.snapshot_file``) which is memory-mapped
+    instead of being parsed into per-row dictionaries.
+
+    When ``db_path`` is set the CSVs are imported into a SQLite database
+    (see ``utils.sqlite_store``) and every lookup is an indexed query.
+
+    When ``shared_dir`` is set the store maps the generation published in
+    that directory (see ``utils.shared_snapshot``) and follows its
+    ``CURRENT`` pointer, so every worker process shares one copy. With
+    ``publish`` enabled this store also publishes new generations when the
+    CSVs change; otherwise an external publisher does.
+    """
+
+    def __init__(self,
+                 data_dir: str,
+                 loader: Callable[[], Tuple[List[Dict], List[Dict], List[Dict], List[Dict]]],
+                 check_interval: Optional[float] = None,
+                 snapshot_path: Optional[str] = None,
+                 incremental: Optional[bool] = None,
+                 db_path: Optional[str] = None,
+                 shared_dir: Optional[str] = None,
+                 publish: bool = True):
+        self.data_dir = data_dir
+        self.loader = loader
+        # Optional compiled binary snapshot used instead of parsing the CSVs
+        self.snapshot_path = snapshot_path
+        # Optional SQLite database answering lookups with indexed queries
+        self.db_path = db_path
+        # Optional directory of published snapshot generations shared by all workers
+        self.shared_dir = shared_dir
+        self.publish = publish
+        if incremental is None:
+            incremental = os.getenv("CATALOG_INCREMENTAL", "1") != "0"
+        # Patch the live indexes from a row diff instead of reloading everything
+        self.incremental = incremental and not snapshot_path and not db_path and not shared_dir
+        if check_interval is None:
+            check_interval = float(os.getenv("CATALOG_RELOAD_INTERVAL", "2.0"))
+        self.check_interval = check_interval
+
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._fingerprint: Optional[Tuple] = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._listeners: List[Callable] = []
+        # Set while a watcher thread keeps the snapshot current (see utils.delta_ingest.CatalogWatcher)
+        self.background_checks = False
+
+    def _source_fingerprint(self) -> Tuple:
+        if self.shared_dir:
+            # Imported lazily: shared_snapshot depends on this module
+            from utils.shared_snapshot import current_generation
+
+            # Follow the published pointer; watch the CSVs only when this store publishes
+            return current_generation(self.shared_dir), source_fingerprint(self.data_dir) if self.publish else None
+        return source_fingerprint(self.data_dir)
+
+    @staticmethod
+    def version_for(fingerprint: Tuple) -> str:
+        return version_for(fingerprint)
+
+    def _update(self, fingerprint: Tuple) -> None:
+        """Bring the snapshot up to date, incrementally when possible"""
+        if self.incremental and self._snapshot is not None:
+            # Imported lazily: delta_ingest depends on this module
+            from utils.delta_ingest import ingest_changes
+
+            deltas = ingest_changes(self, fingerprint)
+            if deltas is not None:
+                self._fingerprint = fingerprint
+                self._notify(self._snapshot, deltas)
+                return
+        self._reload(fingerprint)
+        self._notify(self._snapshot, None)
+
+    def add_listener(self, listener: Callable) -> None:
+        """
+        Register ``listener(snapshot, deltas)`` to run after every data change
+
+        ``deltas`` is the list of applied TableDelta objects for an
+        incremental update, or None after a full reload.
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, snapshot, deltas) -> None:
+        for listener in self._listeners:
+            try:
+                listener(snapshot, deltas)
+            except Exception:
+                logger.exception("Catalog change listener %r failed", listener)
+
+    def _reload(self, fingerprint: Tuple) -> None:
+        if self.shared_dir:
+            snapshot, fingerprint = self._attach_shared(fingerprint)
+        elif self.snapshot_path:
+            snapshot = self._open_compiled(fingerprint)
+        elif self.db_path:
+            snapshot = self._open_database(fingerprint)
+        else:
+            app_catalog, cap_catalog, consumes_mapping, provides_mapping = self.loader()
+            with stage("snapshot_build"):
+                snapshot = CatalogSnapshot(
+                    app_catalog,
+                    cap_catalog,
+                    consumes_mapping,
+                    provides_mapping,
+                    version=version_for(fingerprint),
+                    modified_at=modified_at_for(fingerprint),
+                )
+        # Atomic swap: readers holding the old snapshot keep a consistent view
+        self._snapshot = snapshot
+        self._fingerprint = fingerprint
+
+    def _open_compiled(self, fingerprint: Tuple):
+        """Map the compiled snapshot file, recompiling it first if it is stale"""
+        # Imported lazily so the CSV-only mode does not pay for it
+        from utils.snapshot_file import MappedCatalogSnapshot, compile_snapshot, read_source_fingerprint
+
+        if read_source_fingerprint(self.snapshot_path) != fingerprint:
+            compile_snapshot(self.data_dir, self.snapshot_path)
+        return MappedCatalogSnapshot(self.snapshot_path)
+
+    def _attach_shared(self, fingerprint: Tuple):
+        """Map the live shared generation, publishing a new one first if this store publishes"""
+        from utils.shared_snapshot import publish
+        from utils.snapshot_file import MappedCatalogSnapshot
+
+        if self.publish:
+            publish(self.data_dir, self.shared_dir)
+            # Publishing moves CURRENT; map (and remember) the pointer as it is now
+            fingerprint = self._source_fingerprint()
+        path = fingerprint[0]
+        if path is None:
+            raise FileNotFoundError(f"No catalog generation published in {self.shared_dir}")
+        if self._snapshot is not None and getattr(self._snapshot, "path", None) == path:
+            return self._snapshot, fingerprint
+        return MappedCatalogSnapshot(path), fingerprint
+
+    def _open_database(self, fingerprint: Tuple):
+        """Open the SQLite catalog, importing the CSVs first if it is stale"""
+        from utils.sqlite_store import SqliteCatalogSnapshot, import_catalog, read_source_fingerprint
+
+        if read_source_fingerprint(self.db_path) != fingerprint:
+            with stage("snapshot_build"):
+                import_catalog(self.data_dir, self.db_path)
+        return SqliteCatalogSnapshot(self.db_path)
+
+    @property
+    def loaded(self) -> bool:
+        """Whether a snapshot has been loaded yet"""
+        return self._snapshot is not None
+
+    def get(self) -> CatalogSnapshot:
+        """
+        Return the current snapshot, reloading it if the source files changed
+
+        While ``background_checks`` is set, a background thread calls check()
+        and this only returns the snapshot it last swapped in, so requests
+        never stat files, wait for the publish lock or rebuild anything.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and (self.background_checks
+                                     or time.monotonic() - self._last_check < self.check_interval):
+            return snapshot
+        return self.check()
+
+    def check(self) -> CatalogSnapshot:
+        """Reload now if the source files changed; only one thread checks at a time"""
+        snapshot = self._snapshot
+
+        # Only one thread reloads; the others keep serving the current snapshot
+        if not self._lock.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            self._last_check = time.monotonic()
+            fingerprint = self._source_fingerprint()
+            if self._snapshot is None or fingerprint != self._fingerprint:
+                try:
+                    self._update(fingerprint)
+                except Exception:
+                    if self._snapshot is None:
+                        raise
+                    # Keep serving the last good snapshot while the files are mid-write
+                    logger.exception("Catalog reload failed; keeping version %s", self._snapshot.version)
+            return self._snapshot
+        finally:
+            self._lock.release()
+
+    def refresh(self) -> CatalogSnapshot:
+        """Force a reload from the source files"""
+        with self._lock:
+            self._last_check = time.monotonic()
+            self._reload(self._source_fingerprint())
+            self._notify(self._snapshot, None)
+            return self._snapshot
@@ -1,13 +1,50 @@
 import pandas as pd
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import os
 
+from utils.catalog_store import CatalogSnapshot, CatalogStore
+from utils.metrics import timed
+
 class DataProcessor:
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: Optional[str] = None):
         # Get the absolute path to the project root directory
         project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        # CATALOG_DATA_DIR points the server at another set of CSVs (e.g. generated benchmark data)
+        data_dir = data_dir or os.getenv("CATALOG_DATA_DIR", "data")
         self.data_dir = os.path.join(project_root, data_dir)
+        # Optional compiled binary snapshot (see utils/snapshot_file.py)
+        snapshot_path = os.getenv("CATALOG_SNAPSHOT")
+        if snapshot_path and not os.path.isabs(snapshot_path):
+            snapshot_path = os.path.join(project_root, snapshot_path)
+        # CATALOG_BACKEND=sqlite answers lookups from a SQLite database instead (see utils/sqlite_store.py)
+        db_path = None
+        if os.getenv("CATALOG_BACKEND", "memory") == "sqlite":
+            db_path = os.getenv("CATALOG_DB") or os.path.join(self.data_dir, "catalog.db")
+            if not os.path.isabs(db_path):
+                db_path = os.path.join(project_root, db_path)
+        # CATALOG_SHARED_DIR maps snapshot generations shared by all workers (see utils/shared_snapshot.py);
+        # CATALOG_PUBLISHER=external leaves publishing to a separate loader process
+        shared_dir = os.getenv("CATALOG_SHARED_DIR")
+        if shared_dir and not os.path.isabs(shared_dir):
+            shared_dir = os.path.join(project_root, shared_dir)
+        publish = os.getenv("CATALOG_PUBLISHER", "worker") != "external"
+        # Resident, indexed copy of the catalog shared by every lookup
+        self.store = CatalogStore(self.data_dir, self.load_data, snapshot_path=snapshot_path, db_path=db_path,
+                                  shared_dir=shared_dir, publish=publish)
+    
+    def snapshot(self) -> CatalogSnapshot:
+        """
+        Get the current indexed catalog snapshot
+        
+        The data is loaded on first use and reloaded only when the CSV files
+        change, so callers can use this on every request.
+        
+        Returns:
+            CatalogSnapshot: Indexed view of all four datasets
+        """
+        return self.store.get()
         
+    @timed("load_data")
     def load_data(self) -> Tuple[Dict, Dict, Dict, Dict]:
         """
         Load all CSV files and return their data as dictionaries
@@ -41,32 +78,50 @@ class DataProcessor:
         except Exception as e:
             raise Exception(f"Error loading data: {str(e)}")
     
-    def get_application_details(self, application_id: str, app_catalog: List[Dict]) -> Dict:
+    @timed("get_application_details")
+    def get_application_details(self, application_id: str, app_catalog: Optional[List[Dict]] = None) -> Dict:
         """Get details for a specific application"""
+        if app_catalog is None:
+            return self.snapshot().get_application_details(application_id)
         for app in app_catalog:
             if app['application_id'] == application_id:
                 return app
         return {}
     
-    def get_capability_details(self, capability_id: str, cap_catalog: List[Dict]) -> Dict:
+    @timed("get_capability_details")
+    def get_capability_details(self, capability_id: str, cap_catalog: Optional[List[Dict]] = None) -> Dict:
         """Get details for a specific capability"""
+        if cap_catalog is None:
+            return self.snapshot().get_capability_details(capability_id)
         for cap in cap_catalog:
             if cap['capability_id'] == capability_id:
                 return cap
         return {}
     
-    def get_consumed_capabilities(self, application_id: str, consumes_mapping: List[Dict]) -> List[Dict]:
+    @timed("get_consumed_capabilities")
+    def get_consumed_capabilities(self, application_id: str, consumes_mapping: Optional[List[Dict]] = None) -> List[Dict]:
         """Get all capabilities consumed by an application"""
+        if consumes_mapping is None:
+            return self.snapshot().get_consumed_capabilities(application_id)
         return [mapping for mapping in consumes_mapping if mapping['application_id'] == application_id]
     
-    def get_provided_capabilities(self, application_id: str, provides_mapping: List[Dict]) -> List[Dict]:
+    @timed("get_provided_capabilities")
+    def get_provided_capabilities(self, application_id: str, provides_mapping: Optional[List[Dict]] = None) -> List[Dict]:
         """Get all capabilities provided by an application"""
+        if provides_mapping is None:
+            return self.snapshot().get_provided_capabilities(application_id)
         return [mapping for mapping in provides_mapping if mapping['application_id'] == application_id]
     
-    def get_consuming_applications(self, capability_id: str, consumes_mapping: List[Dict]) -> List[Dict]:
+    @timed("get_consuming_applications")
+    def get_consuming_applications(self, capability_id: str, consumes_mapping: Optional[List[Dict]] = None) -> List[Dict]:
         """Get all applications that consume a specific capability"""
+        if consumes_mapping is None:
+            return self.snapshot().get_consuming_applications(capability_id)
         return [mapping for mapping in consumes_mapping if mapping['capability_id'] == capability_id]
     
-    def get_providing_applications(self, capability_id: str, provides_mapping: List[Dict]) -> List[Dict]:
+    @timed("get_providing_applications")
+    def get_providing_applications(self, capability_id: str, provides_mapping: Optional[List[Dict]] = None) -> List[Dict]:
         """Get all applications that provide a specific capability"""
+        if provides_mapping is None:
+            return self.snapshot().get_providing_applications(capability_id)
         return [mapping for mapping in provides_mapping if mapping['capability_id'] == capability_id] 
\ No newline at end of file
@@ -0,0 +1,171 @@
+import logging
+import math
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from utils.catalog_store import CATALOG_FILES, TABLE_KEYS, CatalogStore, modified_at_for
+from utils.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Source file for each catalog table
+TABLE_FILES = dict(zip(TABLE_KEYS, CATALOG_FILES))
+
+
+class TableDelta:
+    """Rows added, removed and changed in one catalog table, matched by key"""
+
+    def __init__(self, table: str):
+        self.table = table
+        self.added: List[Dict] = []
+        self.removed: List[Dict] = []
+        # (old row, new row) pairs sharing the same key
+        self.changed: List[Tuple[Dict, Dict]] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def __repr__(self) -> str:
+        return (f"TableDelta({self.table!r}, added={len(self.added)}, "
+                f"removed={len(self.removed)}, changed={len(self.changed)})")
+
+
+def _same_value(a, b) -> bool:
+    # pandas reads empty cells as NaN, and NaN != NaN
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return a == b
+
+
+def _same_row(a: Dict, b: Dict) -> bool:
+    return a.keys() == b.keys() and all(_same_value(a[k], b[k]) for k in a)
+
+
+def diff_table(path: str, table: str, current: Dict[Tuple, List[Dict]], chunksize: int = 50000) -> TableDelta:
+    """
+    Diff a new version of a catalog CSV against the rows currently loaded
+
+    The file is streamed in chunks so only one chunk of new rows is held in
+    memory at a time, along with per-key progress and the rows that differ.
+    Rows are matched by key; when a key's rows (duplicates included) differ
+    other than by a single row changing, all of its old rows are removed and
+    all of its new ones added, so the result matches a full reload.
+
+    Args:
+        path (str): Path to the new CSV file
+        table (str): Table name, one of TABLE_KEYS
+        current (Dict[Tuple, List[Dict]]): Currently loaded rows by key
+        chunksize (int): Rows parsed per chunk
+
+    Returns:
+        TableDelta: Added, removed and changed rows
+    """
+    key_columns = TABLE_KEYS[table]
+    delta = TableDelta(table)
+    # Key -> [leading new rows equal to the old ones, new rows from the first difference on]
+    seen: Dict[Tuple, list] = {}
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        for row in chunk.to_dict('records'):
+            key = tuple(row[column] for column in key_columns)
+            progress = seen.setdefault(key, [0, []])
+            old_rows = current.get(key, ())
+            matched, different = progress
+            if not different and matched < len(old_rows) and _same_row(old_rows[matched], row):
+                progress[0] += 1
+            else:
+                different.append(row)
+    for key, (matched, different) in seen.items():
+        old_rows = current.get(key, [])
+        if not different and matched == len(old_rows):
+            continue
+        new_rows = old_rows[:matched] + different
+        if not old_rows:
+            delta.added.extend(new_rows)
+        elif len(old_rows) == 1 and len(new_rows) == 1:
+            delta.changed.append((old_rows[0], new_rows[0]))
+        else:
+            delta.removed.extend(old_rows)
+            delta.added.extend(new_rows)
+    for key, old_rows in current.items():
+        if key not in seen:
+            delta.removed.extend(old_rows)
+    return delta
+
+
+@timed("delta_ingest")
+def ingest_changes(store: CatalogStore, fingerprint: Tuple) -> Optional[List[TableDelta]]:
+    """
+    Apply changed source files to the store's snapshot
+
+    Only the files whose size or modification time differ from the loaded
+    fingerprint are diffed. A new snapshot with the indexes patched for the
+    affected keys and the version of the new fingerprint replaces the live
+    one; readers still holding the old snapshot are unaffected. Call with
+    the store's lock held.
+
+    Returns:
+        Optional[List[TableDelta]]: The applied deltas, or None if the changes
+        could not be applied incrementally and the caller should fall back to
+        a full reload
+    """
+    snapshot = store._snapshot
+    if snapshot is None or store._fingerprint is None or not hasattr(snapshot, "with_delta"):
+        return None
+
+    deltas = []
+    for table, old_entry, new_entry in zip(TABLE_KEYS, store._fingerprint, fingerprint):
+        if old_entry == new_entry:
+            continue
+        if new_entry[1] is None:
+            # A source file disappeared; let the full reload report it
+            return None
+        path = os.path.join(store.data_dir, TABLE_FILES[table])
+        deltas.append(diff_table(path, table, snapshot.key_index(table)))
+
+    store._snapshot = snapshot.with_delta(deltas, version=store.version_for(fingerprint),
+                                          modified_at=modified_at_for(fingerprint))
+    changes = [delta for delta in deltas if delta]
+    if changes:
+        logger.info("Applied catalog delta %s -> version %s", changes, store._snapshot.version)
+    return deltas
+
+
+class CatalogWatcher:
+    """
+    Background thread that polls the catalog files and ingests changes.
+
+    Changes are picked up even when no requests arrive, so caches keyed on
+    the data version are invalidated promptly. While it runs, the store's
+    get() leaves all checking, reloading and publishing to this thread, so
+    none of it happens on the request path.
+    """
+
+    def __init__(self, store: CatalogStore, interval: Optional[float] = None):
+        self.store = store
+        self.interval = interval if interval is not None else store.check_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="catalog-watcher", daemon=True)
+        self._thread.start()
+        self.store.background_checks = True
+
+    def stop(self) -> None:
+        self.store.background_checks = False
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.store.check()
+            except Exception:
+                logger.exception("Catalog watcher failed to check for changes")
@@ -0,0 +1,262 @@
+"""
+Dependency graph over the consumes/provides mappings.
+
+Applications and capabilities share one integer node space (applications
+first, then capabilities) and adjacency is stored in CSR form: ``indptr``
+holds the offset of each node's neighbours inside ``indices``. Two edge
+directions are kept:
+
+    upstream    application -> capability it consumes -> application providing it
+    downstream  application -> capability it provides -> application consuming it
+
+So "what does APP001 depend on" walks upstream, and "what breaks if APP002
+goes down" walks downstream. Depths are counted in application hops.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.catalog_store import derived
+
+UPSTREAM = "upstream"
+DOWNSTREAM = "downstream"
+
+
+def _csr(src: np.ndarray, dst: np.ndarray, n_nodes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Build (indptr, indices) for directed edges src -> dst"""
+    order = np.argsort(src, kind="stable")
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n_nodes), out=indptr[1:])
+    return indptr, dst[order].astype(np.int32)
+
+
+def _expand(indptr: np.ndarray, indices: np.ndarray, nodes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Neighbours of every node in ``nodes`` plus the node each one came from"""
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.empty(0, dtype=np.int32)
+        return empty, empty
+    # Position of every neighbour inside ``indices`` without a Python loop
+    positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+    return indices[positions], np.repeat(nodes, counts)
+
+
+class DependencyGraph:
+    """Compact bipartite application/capability dependency graph"""
+
+    def __init__(self,
+                 application_ids: List[str],
+                 capability_ids: List[str],
+                 consumes_pairs: List[Tuple[str, str]],
+                 provides_pairs: List[Tuple[str, str]]):
+        """
+        Args:
+            application_ids (List[str]): Known application ids
+            capability_ids (List[str]): Known capability ids
+            consumes_pairs (List[Tuple[str, str]]): (application_id, capability_id) consumption edges
+            provides_pairs (List[Tuple[str, str]]): (application_id, capability_id) provision edges
+        """
+        self.node_ids: List[str] = []
+        self.node_index: Dict[Tuple[str, str], int] = {}
+        for app_id in application_ids:
+            self._add_node("application", app_id)
+        # Ids referenced only by the mappings still become nodes
+        for app_id, _ in list(consumes_pairs) + list(provides_pairs):
+            self._add_node("application", app_id)
+        self.n_applications = len(self.node_ids)
+        for cap_id in capability_ids:
+            self._add_node("capability", cap_id)
+        for _, cap_id in list(consumes_pairs) + list(provides_pairs):
+            self._add_node("capability", cap_id)
+        self.n_nodes = len(self.node_ids)
+
+        consumes = self._edge_arrays(consumes_pairs)
+        provides = self._edge_arrays(provides_pairs)
+        self.edge_count = len(consumes[0]) + len(provides[0])
+        # upstream: app -> consumed cap, cap -> providing app
+        self.adjacency = {
+            UPSTREAM: _csr(np.concatenate([consumes[0], provides[1]]),
+                           np.concatenate([consumes[1], provides[0]]), self.n_nodes),
+            DOWNSTREAM: _csr(np.concatenate([provides[0], consumes[1]]),
+                             np.concatenate([provides[1], consumes[0]]), self.n_nodes),
+        }
+        self._cycles: Optional[List[List[Dict]]] = None
+
+    def _add_node(self, kind: str, node_id: str) -> None:
+        if (kind, node_id) not in self.node_index:
+            self.node_index[(kind, node_id)] = len(self.node_ids)
+            self.node_ids.append(node_id)
+
+    def _edge_arrays(self, pairs: List[Tuple[str, str]]) -> Tuple[np.ndarray, np.ndarray]:
+        apps = np.fromiter((self.node_index[("application", a)] for a, _ in pairs), dtype=np.int64, count=len(pairs))
+        caps = np.fromiter((self.node_index[("capability", c)] for _, c in pairs), dtype=np.int64, count=len(pairs))
+        return apps, caps
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> "DependencyGraph":
+        """Build the graph from a catalog snapshot"""
+        return cls(
+            [app['application_id'] for app in snapshot.app_catalog],
+            [cap['capability_id'] for cap in snapshot.cap_catalog],
+            [(m['application_id'], m['capability_id']) for m in snapshot.consumes_mapping],
+            [(m['application_id'], m['capability_id']) for m in snapshot.provides_mapping],
+        )
+
+    def _kind(self, node: int) -> str:
+        return "application" if node < self.n_applications else "capability"
+
+    def _describe(self, node: int) -> Dict:
+        return {"type": self._kind(node), "id": self.node_ids[node]}
+
+    def resolve(self, node_id: str) -> Optional[int]:
+        """Integer node for an application or capability id"""
+        node = self.node_index.get(("application", node_id))
+        if node is None:
+            node = self.node_index.get(("capability", node_id))
+        return node
+
+    def _bfs(self, start: int, direction: str, max_edges: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Edge distance and BFS parent of every node reachable from ``start``"""
+        indptr, indices = self.adjacency[direction]
+        distance = np.full(self.n_nodes, -1, dtype=np.int32)
+        parent = np.full(self.n_nodes, -1, dtype=np.int32)
+        distance[start] = 0
+        frontier = np.array([start], dtype=np.int64)
+        level = 0
+        while frontier.size and (max_edges is None or level < max_edges):
+            neighbours, sources = _expand(indptr, indices, frontier)
+            fresh = distance[neighbours] < 0
+            neighbours, sources = neighbours[fresh], sources[fresh]
+            frontier, first = np.unique(neighbours, return_index=True)
+            level += 1
+            distance[frontier] = level
+            parent[frontier] = sources[first]
+            frontier = frontier.astype(np.int64)
+        return distance, parent
+
+    def traverse(self, node_id: str, direction: str = DOWNSTREAM, depth: Optional[int] = 3) -> Optional[Dict]:
+        """
+        Multi-hop dependency traversal from an application or capability
+
+        Args:
+            node_id (str): Starting application or capability id
+            direction (str): "downstream" for blast radius, "upstream" for dependencies
+            depth (int, optional): Maximum application hops, None for unlimited
+
+        Returns:
+            Optional[Dict]: Reached applications and capabilities with their depth,
+            or None if the id is unknown
+        """
+        start = self.resolve(node_id)
+        if start is None:
+            return None
+        # Starting from a capability, the first hop is cap -> app
+        offset = 0 if start < self.n_applications else 1
+        max_edges = None if depth is None else max(depth * 2 - offset, 0)
+        distance, _ = self._bfs(start, direction, max_edges)
+
+        reached = np.flatnonzero(distance > 0)
+        reached = reached[np.argsort(distance[reached], kind="stable")]
+        applications, capabilities = [], []
+        for node in reached.tolist():
+            hops = (int(distance[node]) + offset + 1) // 2
+            if node < self.n_applications:
+                applications.append({"application_id": self.node_ids[node], "depth": hops})
+            else:
+                capabilities.append({"capability_id": self.node_ids[node], "depth": hops})
+        return {
+            "root": self._describe(start),
+            "direction": direction,
+            "max_depth": depth,
+            "applications": applications,
+            "capabilities": capabilities,
+        }
+
+    def shortest_path(self, source_id: str, target_id: str, direction: str = UPSTREAM) -> Optional[List[Dict]]:
+        """
+        Shortest dependency path between two applications or capabilities
+
+        Returns:
+            Optional[List[Dict]]: Nodes from source to target, [] if the target
+            is unreachable, or None if either id is unknown
+        """
+        source = self.resolve(source_id)
+        target = self.resolve(target_id)
+        if source is None or target is None:
+            return None
+        distance, parent = self._bfs(source, direction, None)
+        if distance[target] < 0:
+            return []
+        path = [target]
+        while path[-1] != source:
+            path.append(int(parent[path[-1]]))
+        return [self._describe(node) for node in reversed(path)]
+
+    def cycles(self) -> List[List[Dict]]:
+        """
+        Dependency cycles, as strongly connected components of the upstream graph
+
+        Every component with more than one node is a set of applications that
+        (transitively) depend on each other through the listed capabilities.
+        """
+        if self._cycles is None:
+            self._cycles = self._strongly_connected_components()
+        return self._cycles
+
+    def _strongly_connected_components(self) -> List[List[Dict]]:
+        indptr, indices = self.adjacency[UPSTREAM]
+        indptr, indices = indptr.tolist(), indices.tolist()
+        index = [-1] * self.n_nodes
+        lowlink = [0] * self.n_nodes
+        on_stack = [False] * self.n_nodes
+        stack: List[int] = []
+        components: List[List[int]] = []
+        counter = 0
+
+        # Iterative Tarjan so deep chains do not hit the recursion limit
+        for root in range(self.n_nodes):
+            if index[root] >= 0:
+                continue
+            work = [(root, indptr[root])]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            while work:
+                node, position = work[-1]
+                if position < indptr[node + 1]:
+                    work[-1] = (node, position + 1)
+                    neighbour = indices[position]
+                    if index[neighbour] < 0:
+                        index[neighbour] = lowlink[neighbour] = counter
+                        counter += 1
+                        stack.append(neighbour)
+                        on_stack[neighbour] = True
+                        work.append((neighbour, indptr[neighbour]))
+                    elif on_stack[neighbour]:
+                        lowlink[node] = min(lowlink[node], index[neighbour])
+                    continue
+                work.pop()
+                if work:
+                    caller = work[-1][0]
+                    lowlink[caller] = min(lowlink[caller], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1:
+                        components.append(sorted(component))
+
+        components.sort(key=len, reverse=True)
+        return [[self._describe(node) for node in component] for component in components]
+
+
+def graph_for(snapshot) -> DependencyGraph:
+    """Dependency graph for a snapshot, rebuilt only when the data version changes"""
+    return derived(snapshot, "dependency_graph", DependencyGraph.from_snapshot)
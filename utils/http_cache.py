@@ -0,0 +1,62 @@
+"""
+HTTP validators derived from the catalog snapshot.
+
+Every catalog-backed response is a function of the request URL and the data
+version, so the version doubles as a (weak) entity tag and the latest
+modification time of the source files as Last-Modified; both come from the
+data, so every worker and restart reports the same validators. Clients that send either validator back get a 304
+without the response being rebuilt.
+"""
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Mapping
+
+
+def etag_for(version: str) -> str:
+    """Weak entity tag for a data version (weak, since bodies may be re-encoded by compression)"""
+    return f'W/"{version}"'
+
+
+def validators_for(snapshot) -> Dict[str, str]:
+    """Caching headers for responses built from a snapshot"""
+    return {
+        "ETag": etag_for(snapshot.version),
+        "Last-Modified": formatdate(snapshot.modified_at, usegmt=True),
+        # Clients may store responses but must revalidate before reuse
+        "Cache-Control": "no-cache",
+    }
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request_headers: Mapping[str, str], snapshot) -> bool:
+    """
+    Whether a conditional GET can be answered with 304 Not Modified
+
+    If-None-Match takes precedence over If-Modified-Since, as in RFC 9110.
+
+    Args:
+        request_headers (Mapping[str, str]): Request headers
+        snapshot: Current catalog snapshot
+
+    Returns:
+        bool: True if the client's copy is current
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        current = _opaque_tag(etag_for(snapshot.version))
+        return any(_opaque_tag(tag) == current for tag in if_none_match.split(","))
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have one-second resolution
+        return int(snapshot.modified_at) <= since
+    return False
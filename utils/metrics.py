@@ -0,0 +1,284 @@
+"""
+In-process metrics exported in the Prometheus text format.
+
+Counters and histograms are plain in-memory objects with a lock; ``render()``
+produces the ``/metrics`` payload. ``stage(name)`` times a block of work into
+the ``stage_duration_seconds`` histogram, counts exceptions by type, and adds
+the time to the current request's breakdown, which the server sends back as
+a ``Server-Timing`` header.
+
+``RequestProfiler`` runs cProfile on a sample of requests and keeps the
+profile only when the request turned out to be slow.
+"""
+import contextvars
+import cProfile
+import functools
+import os
+import random
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds; tuned for lookups (sub-millisecond) through LLM calls (tens of seconds)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+REGISTRY: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> Iterator[Tuple[str, Sequence[Tuple[str, str]], float]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for name, labels, value in self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield self.name, list(zip(self.labelnames, key)), value
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observed values per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        for key, counts, total, count in series:
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", labels + [("le", _format_value(bound))], cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format"""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+STAGE_SECONDS = Histogram("stage_duration_seconds", "Time spent in each processing stage", ["stage"])
+STAGE_ERRORS = Counter("stage_errors_total", "Exceptions raised in each processing stage, by type", ["stage", "error"])
+HTTP_SECONDS = Histogram("http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"])
+LLM_TOKENS = Counter("llm_tokens_total", "Estimated tokens sent to and received from the model",
+                     ["model", "direction"])
+LLM_PROMPT_TOKENS = Histogram("llm_prompt_tokens", "Estimated prompt tokens per model call", ["model"],
+                              buckets=TOKEN_BUCKETS)
+LLM_FIRST_TOKEN_SECONDS = Histogram("llm_time_to_first_token_seconds",
+                                    "Time from starting a streamed model call to its first chunk", ["model"])
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by cache and result", ["cache", "result"])
+
+# Stage name -> seconds for the request being handled, if any
+_request_stages: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "request_stages", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Time a block of work as a named stage
+
+    Args:
+        name (str): Stage label, e.g. "load_data" or "llm_call"
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        STAGE_ERRORS.inc(stage=name, error=type(e).__name__)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        timings = _request_stages.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+
+def timed(name: str):
+    """Decorator form of ``stage`` for synchronous functions"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def begin_request() -> Tuple[Dict[str, float], contextvars.Token]:
+    """Start collecting stage timings for the current request"""
+    timings: Dict[str, float] = {}
+    return timings, _request_stages.set(timings)
+
+
+def end_request(token: contextvars.Token) -> None:
+    _request_stages.reset(token)
+
+
+_TOKEN_PATTERN = re.compile(r"[^A-Za-z0-9_\-]")
+
+
+def server_timing(timings: Dict[str, float], total: float) -> str:
+    """``Server-Timing`` header value with one entry per stage plus the total, in milliseconds"""
+    entries = [f"{_TOKEN_PATTERN.sub('_', name)};dur={seconds * 1000:.2f}" for name, seconds in timings.items()]
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+
+class RequestProfiler:
+    """
+    Sampled cProfile capture for slow requests.
+
+    cProfile sees everything the event loop thread runs, not just one
+    request, so a profile is only taken while the server is otherwise idle:
+    a ``sample_rate`` share of requests that arrive with no other request
+    in flight run under cProfile, and the profile is discarded if another
+    request starts before it ends. It is written to ``output_dir`` only if
+    the request took at least ``slow_seconds``. Background tasks on the
+    event loop (such as batch jobs) still show up in it, and work on thread
+    pools (such as blocking LLM calls) shows up as waiting.
+
+    Call ``start`` when every request begins and ``finish`` when it ends.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, slow_seconds: float = 1.0, output_dir: str = "profiles"):
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_seconds
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self._active: Optional[cProfile.Profile] = None
+        self._overlapped = False
+        self.dumps = 0
+        self.discarded = 0
+
+    @classmethod
+    def from_env(cls) -> "RequestProfiler":
+        """Configure from PROFILE_SAMPLE_RATE, PROFILE_SLOW_SECONDS and PROFILE_DIR"""
+        return cls(
+            sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+            slow_seconds=float(os.getenv("PROFILE_SLOW_SECONDS", "1.0")),
+            output_dir=os.getenv("PROFILE_DIR", "profiles"),
+        )
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """Count a new request and profile it if it is sampled and alone"""
+        with self._lock:
+            self.in_flight += 1
+            if self._active is not None:
+                # Its frames would land in the running profile
+                self._overlapped = True
+                return None
+            if self.in_flight > 1 or self.sample_rate <= 0 or random.random() >= self.sample_rate:
+                return None
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler is active in this thread
+                return None
+            self._active = profile
+            self._overlapped = False
+            return profile
+
+    def finish(self, profile: Optional[cProfile.Profile], elapsed: float, label: str) -> Optional[str]:
+        """
+        End a request; stop profiling it and keep the profile if it was slow and ran alone
+
+        Returns:
+            Optional[str]: Path of the written .prof file, if any
+        """
+        with self._lock:
+            self.in_flight -= 1
+            if profile is None or profile is not self._active:
+                return None
+            profile.disable()
+            self._active = None
+            if self._overlapped:
+                self.discarded += 1
+                return None
+        if elapsed < self.slow_seconds:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        name = _TOKEN_PATTERN.sub("_", label).strip("_") or "request"
+        path = os.path.join(self.output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{int(elapsed * 1000)}ms-{name}.prof")
+        profile.dump_stats(path)
+        self.dumps += 1
+        return path
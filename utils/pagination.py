@@ -0,0 +1,121 @@
+import base64
+import binascii
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Optional
+
+from utils.catalog_store import derived
+
+# Query parameter -> column filters supported by each list endpoint
+TABLE_FILTERS = {
+    "applications": {"type": "Type", "platform": "Platform", "disposition": "Disposition"},
+    "capabilities": {"status": "status", "context": "context"},
+}
+
+TABLE_ID_COLUMNS = {
+    "applications": "application_id",
+    "capabilities": "capability_id",
+}
+
+
+def encode_cursor(last_id: str) -> str:
+    """Opaque cursor pointing just past ``last_id``"""
+    return base64.urlsafe_b64encode(last_id.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> str:
+    """
+    Inverse of encode_cursor
+
+    Only cursors encode_cursor could have produced are accepted, so a
+    corrupted cursor is an error instead of silently restarting at page 1.
+
+    Raises:
+        ValueError: For malformed cursors
+    """
+    try:
+        last_id = base64.b64decode(cursor.encode("ascii"), altchars=b"-_", validate=True).decode("utf-8")
+    except (binascii.Error, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not last_id or not last_id.isprintable() or encode_cursor(last_id) != cursor:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return last_id
+
+
+def _sorted_ids(snapshot, table: str) -> List[str]:
+    id_column = TABLE_ID_COLUMNS[table]
+    rows = snapshot.app_catalog if table == "applications" else snapshot.cap_catalog
+    return sorted({row[id_column] for row in rows})
+
+
+def _get_row(snapshot, table: str, row_id: str) -> Dict:
+    if table == "applications":
+        return snapshot.get_application_details(row_id)
+    return snapshot.get_capability_details(row_id)
+
+
+def _matches(row: Dict, filters: Dict[str, str]) -> bool:
+    for column, value in filters.items():
+        if str(row.get(column, "")).strip().lower() != value.strip().lower():
+            return False
+    return True
+
+
+def project(row: Dict, fields: Optional[List[str]]) -> Dict:
+    """Keep only the requested fields of a row"""
+    if not fields:
+        return row
+    return {field: row[field] for field in fields if field in row}
+
+
+def iter_rows(snapshot, table: str, filters: Dict[str, str], after: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Lazily yield rows of a catalog table in id order
+
+    Keyset iteration over a per-version sorted id list means only the rows
+    actually returned are touched, and a cursor stays valid across reloads.
+
+    Args:
+        snapshot: Catalog snapshot to read from
+        table (str): "applications" or "capabilities"
+        filters (Dict[str, str]): Column -> value, matched case-insensitively
+        after (str, optional): Only yield rows whose id sorts after this one
+
+    Yields:
+        Dict: Matching rows
+    """
+    if hasattr(snapshot, "iter_ordered"):
+        # Backends with an id index walk it directly (see utils.sqlite_store)
+        for row in snapshot.iter_ordered(table, TABLE_ID_COLUMNS[table], after):
+            if _matches(row, filters):
+                yield row
+        return
+    ids = derived(snapshot, f"{table}.sorted_ids", lambda s: _sorted_ids(s, table))
+    start = bisect_right(ids, after) if after is not None else 0
+    for position in range(start, len(ids)):
+        row = _get_row(snapshot, table, ids[position])
+        if row and _matches(row, filters):
+            yield row
+
+
+def page(snapshot,
+         table: str,
+         filters: Dict[str, str],
+         cursor: Optional[str],
+         limit: int,
+         fields: Optional[List[str]] = None) -> Dict:
+    """
+    One page of a catalog table
+
+    Returns:
+        Dict: ``items`` for the page and ``next_cursor`` (None on the last page)
+    """
+    after = decode_cursor(cursor) if cursor else None
+    id_column = TABLE_ID_COLUMNS[table]
+    items = []
+    next_cursor = None
+    for row in iter_rows(snapshot, table, filters, after):
+        if len(items) == limit:
+            next_cursor = encode_cursor(items[-1][id_column])
+            break
+        items.append(row)
+    return {"items": [project(row, fields) for row in items], "next_cursor": next_cursor}
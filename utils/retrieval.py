@@ -0,0 +1,104 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from utils.catalog_store import derived
+
+# Text columns indexed for each entity type
+APPLICATION_TEXT_COLUMNS = ("Application name", "Type", "Platform", "Disposition",
+                            "System architect", "Delivery lead", "service owner")
+CAPABILITY_TEXT_COLUMNS = ("name", "aliases", "context", "description", "notes", "status")
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset("""
+    a an and are as at be by does do for from has have how i in is it its me of on or
+    that the their them these this to was what when where which who why will with
+    application applications app apps capability capabilities cap caps
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens with common question words removed"""
+    return [token for token in _TOKEN_PATTERN.findall(str(text).lower()) if token not in _STOPWORDS]
+
+
+class CatalogRetriever:
+    """
+    BM25 inverted index over application and capability text.
+
+    Documents are the catalog entities; their ids, names, aliases, contexts,
+    descriptions and notes are indexed. Ids that appear verbatim in a
+    question always rank first.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, documents: List[Tuple[str, str, str]]):
+        """
+        Args:
+            documents (List[Tuple[str, str, str]]): (entity type, entity id, text) triples
+        """
+        self.documents = [(kind, entity_id) for kind, entity_id, _ in documents]
+        self.ids = {}
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths = []
+        for doc, (kind, entity_id, text) in enumerate(documents):
+            self.ids.setdefault(str(entity_id).strip().lower(), []).append(doc)
+            terms = Counter(tokenize(text))
+            lengths.append(sum(terms.values()))
+            for term, frequency in terms.items():
+                self.postings.setdefault(term, []).append((doc, frequency))
+        self.lengths = lengths
+        self.average_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> "CatalogRetriever":
+        documents = []
+        for app in snapshot.app_catalog:
+            text = " ".join(str(app.get(column, "")) for column in APPLICATION_TEXT_COLUMNS)
+            documents.append(("application", app['application_id'], f"{app['application_id']} {text}"))
+        for cap in snapshot.cap_catalog:
+            text = " ".join(str(cap.get(column, "")) for column in CAPABILITY_TEXT_COLUMNS)
+            documents.append(("capability", cap['capability_id'], f"{cap['capability_id']} {text}"))
+        return cls(documents)
+
+    def _idf(self, term: str) -> float:
+        n = len(self.documents)
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, question: str, limit: int = 20) -> List[Tuple[str, str, float]]:
+        """
+        Rank catalog entities against a question
+
+        Args:
+            question (str): Natural language question
+            limit (int): Maximum number of entities to return
+
+        Returns:
+            List[Tuple[str, str, float]]: (entity type, entity id, score), best first
+        """
+        scores: Dict[int, float] = {}
+        # Exact id mentions outrank any text match
+        for token in re.findall(r"[A-Za-z0-9_\-]+", question):
+            for doc in self.ids.get(token.lower(), ()):
+                scores[doc] = scores.get(doc, 0.0) + 1000.0
+
+        for term in set(tokenize(question)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf(term)
+            for doc, frequency in postings:
+                norm = 1 - self.B + self.B * self.lengths[doc] / (self.average_length or 1.0)
+                scores[doc] = scores.get(doc, 0.0) + idf * frequency * (self.K1 + 1) / (frequency + self.K1 * norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(*self.documents[doc], score) for doc, score in ranked]
+
+
+def retriever_for(snapshot) -> CatalogRetriever:
+    """Retrieval index for a snapshot, rebuilt only when the data version changes"""
+    return derived(snapshot, "retriever", CatalogRetriever.from_snapshot)
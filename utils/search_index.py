@@ -0,0 +1,152 @@
+"""
+Typeahead search over applications and capabilities.
+
+Two indexes are kept per catalog version:
+
+- a sorted (token, document) list over ids, names and aliases, so prefix
+  matches are a binary search plus a short scan;
+- trigram postings (NumPy arrays of document numbers) over the primary text
+  (id, name, aliases) and the secondary text (context, description), so
+  fuzzy scoring is a ``bincount`` over the query's trigram postings.
+
+Scores add up: exact id/name match > name prefix > word prefix > trigram
+overlap, with secondary-text overlap weighted lower.
+"""
+import re
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.catalog_store import derived
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+EXACT_SCORE = 4.0
+NAME_PREFIX_SCORE = 2.0
+WORD_PREFIX_SCORE = 1.0
+PRIMARY_TRIGRAM_WEIGHT = 1.0
+SECONDARY_TRIGRAM_WEIGHT = 0.4
+
+
+def _normalize(text) -> str:
+    if text is None or (isinstance(text, float) and text != text):
+        return ""
+    return " ".join(_TOKEN_PATTERN.findall(str(text).lower()))
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _trigram_postings(texts: List[str]) -> Dict[str, np.ndarray]:
+    postings: Dict[str, List[int]] = {}
+    for doc, text in enumerate(texts):
+        for trigram in _trigrams(text):
+            postings.setdefault(trigram, []).append(doc)
+    return {trigram: np.asarray(docs, dtype=np.int32) for trigram, docs in postings.items()}
+
+
+class SearchIndex:
+    """Ranked prefix and trigram search over catalog entities"""
+
+    def __init__(self, entities: List[Tuple[str, str, str, str, str]]):
+        """
+        Args:
+            entities: (type, id, name, primary text, secondary text) per entity
+        """
+        self.entities = [(kind, entity_id, name) for kind, entity_id, name, _, _ in entities]
+        self.kinds = np.array([kind == "application" for kind, _, _, _, _ in entities], dtype=bool)
+        self.exact: Dict[str, List[int]] = {}
+        self.names = [_normalize(name) for _, _, name, _, _ in entities]
+        tokens = []
+        primary_texts, secondary_texts = [], []
+        for doc, (_, entity_id, name, primary, secondary) in enumerate(entities):
+            for key in (_normalize(entity_id), _normalize(name)):
+                if key:
+                    self.exact.setdefault(key, []).append(doc)
+            primary_text = _normalize(f"{entity_id} {name} {primary}")
+            primary_texts.append(primary_text)
+            secondary_texts.append(_normalize(secondary))
+            for token in set(primary_text.split()):
+                tokens.append((token, doc))
+        tokens.sort()
+        self.tokens = [token for token, _ in tokens]
+        self.token_docs = np.asarray([doc for _, doc in tokens], dtype=np.int32)
+        self.primary = _trigram_postings(primary_texts)
+        self.secondary = _trigram_postings(secondary_texts)
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> "SearchIndex":
+        entities = []
+        for app in snapshot.app_catalog:
+            entities.append(("application", app['application_id'], app.get('Application name') or "",
+                             "", " ".join(str(app.get(column) or "") for column in ("Type", "Platform"))))
+        for cap in snapshot.cap_catalog:
+            entities.append(("capability", cap['capability_id'], cap.get('name') or "",
+                             str(cap.get('aliases') or ""),
+                             f"{cap.get('context') or ''} {cap.get('description') or ''}"))
+        return cls(entities)
+
+    def _add_trigram_scores(self, scores: np.ndarray, postings: Dict[str, np.ndarray], query: str, weight: float) -> None:
+        grams = _trigrams(query)
+        hits = [postings[gram] for gram in grams if gram in postings]
+        if not hits:
+            return
+        counts = np.bincount(np.concatenate(hits), minlength=len(scores))
+        scores += weight * counts / len(grams)
+
+    def search(self, query: str, limit: int = 10, kind: Optional[str] = None) -> List[Dict]:
+        """
+        Best matches for a (possibly partial) query
+
+        Args:
+            query (str): Text typed so far
+            limit (int): Maximum number of results
+            kind (str, optional): "application" or "capability" to restrict results
+
+        Returns:
+            List[Dict]: Results with type, id, name and score, best first
+        """
+        normalized = _normalize(query)
+        if not normalized or not self.entities:
+            return []
+        scores = np.zeros(len(self.entities), dtype=np.float64)
+
+        for doc in self.exact.get(normalized, ()):
+            scores[doc] += EXACT_SCORE
+
+        words = normalized.split()
+        last = words[-1]
+        # Tokens are [a-z0-9] only, so every token with this prefix sorts below prefix + "{"
+        start = bisect_left(self.tokens, last)
+        end = bisect_left(self.tokens, last + "{", start)
+        if end > start:
+            matched = np.zeros(len(scores), dtype=bool)
+            matched[self.token_docs[start:end]] = True
+            scores[matched] += WORD_PREFIX_SCORE
+
+        self._add_trigram_scores(scores, self.primary, normalized, PRIMARY_TRIGRAM_WEIGHT)
+        self._add_trigram_scores(scores, self.secondary, normalized, SECONDARY_TRIGRAM_WEIGHT)
+
+        if kind is not None:
+            scores[self.kinds != (kind == "application")] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        if candidates.size > limit * 4:
+            candidates = candidates[np.argpartition(-scores[candidates], limit * 4)[:limit * 4]]
+        # Whole-name prefix bonus is only worth computing for the short list
+        for doc in candidates.tolist():
+            if self.names[doc].startswith(normalized):
+                scores[doc] += NAME_PREFIX_SCORE
+        ranked = sorted(candidates.tolist(), key=lambda doc: (-scores[doc], self.entities[doc][1]))[:limit]
+        return [
+            {"type": self.entities[doc][0], "id": self.entities[doc][1],
+             "name": self.entities[doc][2], "score": round(float(scores[doc]), 4)}
+            for doc in ranked
+        ]
+
+
+def search_index_for(snapshot) -> SearchIndex:
+    """Search index for a snapshot, rebuilt only when the data version changes"""
+    return derived(snapshot, "search_index", SearchIndex.from_snapshot)
@@ -0,0 +1,140 @@
+"""
+Catalog snapshot generations shared by every worker process on a host.
+
+A publisher compiles the CSVs into a generation file (see
+``utils.snapshot_file``) inside a shared directory and then atomically
+replaces the ``CURRENT`` pointer file with the generation's name. Workers
+memory-map whichever generation ``CURRENT`` names and switch when it
+changes, so they all serve the same data version and share one copy of it
+in the page cache instead of each parsing and indexing the CSVs.
+
+Directory layout::
+
+    CURRENT                      name of the live generation
+    catalog-<version>.snap       compiled generations, newest kept
+    publish.lock                 serializes publishers
+
+Publishing holds an exclusive lock and re-checks staleness once it has it,
+so when several workers notice the same CSV change only one compiles.
+Old generations are unlinked after ``SHARED_KEEP_GENERATIONS`` newer ones
+exist; workers still mapping an unlinked file keep reading it safely.
+"""
+import glob
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from utils.catalog_store import source_fingerprint, version_for
+from utils.snapshot_file import compile_snapshot, read_source_fingerprint
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = "publish.lock"
+# Generations kept on disk besides the live one
+SHARED_KEEP_GENERATIONS = int(os.getenv("SHARED_KEEP_GENERATIONS", "2"))
+
+logger = logging.getLogger(__name__)
+
+
+def generation_name(version: str) -> str:
+    return f"catalog-{version}.snap"
+
+
+def current_generation(shared_dir: str) -> Optional[str]:
+    """Path of the generation ``CURRENT`` points to, or None before the first publish"""
+    try:
+        with open(os.path.join(shared_dir, CURRENT_FILE), encoding="utf-8") as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return os.path.join(shared_dir, name) if name else None
+
+
+@contextmanager
+def _publish_lock(shared_dir: str):
+    with open(os.path.join(shared_dir, LOCK_FILE), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _point_current(shared_dir: str, name: str) -> None:
+    tmp_path = os.path.join(shared_dir, f"{CURRENT_FILE}.tmp.{os.getpid()}")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(name + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(shared_dir, CURRENT_FILE))
+
+
+def _prune(shared_dir: str, live_name: str) -> None:
+    generations = sorted(glob.glob(os.path.join(shared_dir, generation_name("*"))), key=os.path.getmtime)
+    stale = [path for path in generations if os.path.basename(path) != live_name]
+    for path in stale[:max(len(stale) - SHARED_KEEP_GENERATIONS, 0)]:
+        try:
+            os.remove(path)
+        except OSError:
+            logger.warning("Could not remove old catalog generation %s", path)
+
+
+def publish(data_dir: str, shared_dir: str) -> str:
+    """
+    Compile and publish a new generation if ``CURRENT`` is older than the CSVs
+
+    Args:
+        data_dir (str): Directory containing the catalog CSV files
+        shared_dir (str): Directory holding the generations and ``CURRENT``
+
+    Returns:
+        str: Path of the live generation after publishing
+    """
+    os.makedirs(shared_dir, exist_ok=True)
+    with _publish_lock(shared_dir):
+        fingerprint = source_fingerprint(data_dir)
+        current = current_generation(shared_dir)
+        if current is not None and read_source_fingerprint(current) == fingerprint:
+            return current
+
+        name = generation_name(version_for(fingerprint))
+        path = os.path.join(shared_dir, name)
+        if read_source_fingerprint(path) != fingerprint:
+            compile_snapshot(data_dir, path)
+        _point_current(shared_dir, name)
+        logger.info("Published catalog generation %s", name)
+        _prune(shared_dir, name)
+        return path
+
+
+def watch(data_dir: str, shared_dir: str, interval: float) -> None:
+    """Publish a new generation whenever the CSVs change, until interrupted"""
+    while True:
+        try:
+            publish(data_dir, shared_dir)
+        except Exception:
+            # Keep the last good generation while the files are mid-write
+            logger.exception("Publishing the catalog failed")
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.shared_snapshot [data_dir] [shared_dir] [--watch]
+    logging.basicConfig(level=logging.INFO)
+    args = [arg for arg in sys.argv[1:] if arg != "--watch"]
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    data_dir = args[0] if args else os.path.join(project_root, "data")
+    shared_dir = args[1] if len(args) > 1 else os.getenv("CATALOG_SHARED_DIR", os.path.join(data_dir, "shared"))
+    if "--watch" in sys.argv:
+        watch(data_dir, shared_dir, float(os.getenv("CATALOG_RELOAD_INTERVAL", "2.0")))
+    else:
+        print(f"Live generation: {publish(data_dir, shared_dir)}")
@@ -0,0 +1,365 @@
+"""
+Compact, memory-mappable binary snapshot of the catalog CSVs.
+
+Layout (all integers little-endian, every section 8-byte aligned)::
+
+    MAGIC (8 bytes) | header length (u64) | JSON header | sections...
+
+Sections:
+    strings.offsets   u64[n + 1]  byte offsets into strings.data
+    strings.data      UTF-8 blob of every distinct cell value, sorted
+    <table>.<column>  u32[rows]   string id of each cell (NULL_ID = empty)
+    <index>.keys      u32[rows]   key string ids in sorted order
+    <index>.rows      u32[rows]   row number for each entry in .keys
+
+Because the string table is sorted, string id order equals string order and
+an id can be resolved with a binary search.
+
+Cells are parsed by pandas exactly as ``DataProcessor.load_data`` parses
+them, and the header records each column's type, so decoded rows match the
+in-memory backend: numbers come back as ``int``/``float`` and empty cells
+as ``NaN``. Columns and indexes are read
+straight out of the mapping through ``memoryview`` casts, so opening a
+snapshot copies nothing and processes that map the same file share its pages.
+"""
+import array
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from utils.catalog_store import CATALOG_FILES, derived, modified_at_for, source_fingerprint, version_for
+
+MAGIC = b"ACSNAP1\0"
+FORMAT_VERSION = 2
+NULL_ID = 0xFFFFFFFF
+_ALIGN = 8
+
+# Table name for each source file, in CATALOG_FILES order
+TABLES = ("applications", "capabilities", "consumes", "provides")
+
+# (index name, table, key column) built at compile time
+INDEXES = (
+    ("applications.by_application_id", "applications", "application_id"),
+    ("capabilities.by_capability_id", "capabilities", "capability_id"),
+    ("consumes.by_application_id", "consumes", "application_id"),
+    ("consumes.by_capability_id", "consumes", "capability_id"),
+    ("provides.by_application_id", "provides", "application_id"),
+    ("provides.by_capability_id", "provides", "capability_id"),
+)
+
+
+# Cell encoding and decoding for each column type; empty cells are stored as NULL_ID
+_ENCODE: Dict[str, Callable] = {"int": lambda value: str(int(value)), "float": lambda value: repr(float(value)),
+                                "bool": lambda value: "1" if value else "0", "str": str}
+_DECODE: Dict[str, Callable] = {"int": int, "float": float, "bool": lambda text: text == "1", "str": str}
+
+
+def _column_type(series: pd.Series) -> str:
+    if pd.api.types.is_bool_dtype(series):
+        return "bool"
+    if pd.api.types.is_integer_dtype(series):
+        return "int"
+    if pd.api.types.is_float_dtype(series):
+        return "float"
+    return "str"
+
+
+def _read_csv(path: str) -> Tuple[List[str], List[str], List[List[Optional[str]]]]:
+    """Column names, column types and the encoded cells of each column, parsed as load_data parses them"""
+    frame = pd.read_csv(path)
+    columns = [str(column) for column in frame.columns]
+    types, cells = [], []
+    for _, series in frame.items():
+        kind = _column_type(series)
+        encode = _ENCODE[kind]
+        types.append(kind)
+        cells.append([None if pd.isna(value) else encode(value) for value in series.tolist()])
+    return columns, types, cells
+
+
+def compile_snapshot(data_dir: str, output_path: str) -> str:
+    """
+    Compile the four catalog CSVs into a single binary snapshot file
+
+    The file is written next to ``output_path`` and moved into place with
+    ``os.replace`` so readers never observe a partially written snapshot.
+
+    Args:
+        data_dir (str): Directory containing the catalog CSV files
+        output_path (str): Destination of the snapshot file
+
+    Returns:
+        str: The data version recorded in the snapshot
+    """
+    fingerprint = source_fingerprint(data_dir)
+    tables = {}
+    for table, filename in zip(TABLES, CATALOG_FILES):
+        tables[table] = _read_csv(os.path.join(data_dir, filename))
+
+    # Sorted, de-duplicated string table shared by every column
+    distinct = set()
+    for _, _, cells in tables.values():
+        for values in cells:
+            distinct.update(value for value in values if value is not None)
+    strings = sorted(distinct)
+    string_ids = {value: i for i, value in enumerate(strings)}
+
+    encoded = [value.encode("utf-8") for value in strings]
+    offsets = array.array("Q", [0] * (len(encoded) + 1))
+    position = 0
+    for i, value in enumerate(encoded):
+        position += len(value)
+        offsets[i + 1] = position
+
+    sections: List[Tuple[str, bytes]] = [
+        ("strings.offsets", _le_bytes(offsets)),
+        ("strings.data", b"".join(encoded)),
+    ]
+    table_meta = {}
+    column_ids: Dict[Tuple[str, str], array.array] = {}
+    for table, (columns, types, cells) in tables.items():
+        rows = len(cells[0]) if cells else 0
+        table_meta[table] = {"rows": rows, "columns": columns, "types": types}
+        for column, values in zip(columns, cells):
+            ids = array.array("I", [NULL_ID if value is None else string_ids[value] for value in values])
+            column_ids[(table, column)] = ids
+            sections.append((f"{table}.{column}", _le_bytes(ids)))
+
+    for index, table, column in INDEXES:
+        ids = column_ids.get((table, column), array.array("I"))
+        # Stable sort keeps the original row order within each key
+        order = sorted(range(len(ids)), key=ids.__getitem__)
+        sections.append((f"{index}.keys", _le_bytes(array.array("I", (ids[i] for i in order)))))
+        sections.append((f"{index}.rows", _le_bytes(array.array("I", order))))
+
+    header = {
+        "format": FORMAT_VERSION,
+        "version": version_for(fingerprint),
+        "source": fingerprint,
+        "compiled_at": time.time(),
+        "strings": len(strings),
+        "tables": table_meta,
+        "sections": {},
+    }
+    # Section offsets depend on the encoded header length; iterate until stable
+    header_bytes = b""
+    while True:
+        offset = _align(len(MAGIC) + 8 + len(header_bytes))
+        for name, payload in sections:
+            header["sections"][name] = [offset, len(payload)]
+            offset = _align(offset + len(payload))
+        encoded_header = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        if len(encoded_header) == len(header_bytes):
+            header_bytes = encoded_header
+            break
+        header_bytes = encoded_header
+
+    tmp_path = f"{output_path}.tmp.{os.getpid()}"
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for name, payload in sections:
+            f.seek(header["sections"][name][0])
+            f.write(payload)
+        f.truncate(_align(f.tell()))
+    os.replace(tmp_path, output_path)
+    return header["version"]
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _le_bytes(values: array.array) -> bytes:
+    if sys.byteorder != "little":
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _read_header(f) -> Optional[Dict]:
+    if f.read(len(MAGIC)) != MAGIC:
+        return None
+    (length,) = struct.unpack("<Q", f.read(8))
+    header = json.loads(f.read(length).decode("utf-8"))
+    if header.get("format") != FORMAT_VERSION:
+        return None
+    return header
+
+
+def read_source_fingerprint(path: str) -> Optional[Tuple]:
+    """Return the source fingerprint a snapshot was compiled from, or None"""
+    try:
+        with open(path, "rb") as f:
+            header = _read_header(f)
+    except (OSError, ValueError):
+        return None
+    if header is None:
+        return None
+    return tuple(tuple(entry) for entry in header["source"])
+
+
+class _StringTable:
+    """Sequence view over the sorted string table; supports bisect"""
+
+    def __init__(self, offsets: memoryview, data: memoryview):
+        self._offsets = offsets
+        self._data = data
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, string_id: int) -> str:
+        return str(self._data[self._offsets[string_id]:self._offsets[string_id + 1]], "utf-8")
+
+    def lookup(self, value: str) -> Optional[int]:
+        """Return the id of a string, or None if it does not occur"""
+        i = bisect_left(self, value)
+        if i < len(self) and self[i] == value:
+            return i
+        return None
+
+
+class MappedCatalogSnapshot:
+    """
+    Read-only catalog snapshot backed by a memory-mapped snapshot file.
+
+    Offers the same lookup interface as ``CatalogSnapshot``, with the same
+    value types; rows are decoded into dictionaries only when a lookup
+    returns them. The small catalog tables (``app_catalog``,
+    ``cap_catalog``) are decoded once per snapshot and kept; the mapping
+    tables are decoded on each access, so the mapping stays their only
+    copy.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            header = _read_header(f)
+            if header is None:
+                raise ValueError(f"Not a catalog snapshot file: {path}")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.header = header
+        self.version = header["version"]
+        self.loaded_at = time.time()
+        self.modified_at = modified_at_for(header["source"])
+        self._buffer = memoryview(self._mmap)
+
+        self.strings = _StringTable(self._section("strings.offsets", "Q"), self._section("strings.data"))
+        self._columns = {
+            table: [(column, self._section(f"{table}.{column}", "I"), _DECODE[kind])
+                    for column, kind in zip(meta["columns"], meta["types"])]
+            for table, meta in header["tables"].items()
+        }
+        self._indexes = {
+            index: (self._section(f"{index}.keys", "I"), self._section(f"{index}.rows", "I"))
+            for index, _, _ in INDEXES
+        }
+
+    def _section(self, name: str, typecode: Optional[str] = None) -> memoryview:
+        offset, length = self.header["sections"][name]
+        view = self._buffer[offset:offset + length]
+        if typecode is None:
+            return view
+        if sys.byteorder != "little":
+            # Big-endian hosts pay for one swapped copy
+            values = array.array(typecode, view.tobytes())
+            values.byteswap()
+            return memoryview(values)
+        return view.cast(typecode)
+
+    def _value(self, string_id: int, decode: Callable):
+        # Empty cells are NaN, as pandas reads them
+        return math.nan if string_id == NULL_ID else decode(self.strings[string_id])
+
+    def _row(self, table: str, row: int) -> Dict:
+        return {column: self._value(ids[row], decode) for column, ids, decode in self._columns[table]}
+
+    def _rows_for(self, index: str, key: str) -> List[int]:
+        string_id = self.strings.lookup(key)
+        if string_id is None:
+            return []
+        keys, rows = self._indexes[index]
+        return list(rows[bisect_left(keys, string_id):bisect_right(keys, string_id)])
+
+    def row_count(self, table: str) -> int:
+        return self.header["tables"][table]["rows"]
+
+    def iter_rows(self, table: str) -> Iterator[Dict]:
+        """Decode the rows of a table one at a time"""
+        for row in range(self.row_count(table)):
+            yield self._row(table, row)
+
+    def _table(self, table: str) -> List[Dict]:
+        return list(self.iter_rows(table))
+
+    @property
+    def app_catalog(self) -> List[Dict]:
+        return derived(self, "app_catalog", lambda snapshot: snapshot._table("applications"))
+
+    @property
+    def cap_catalog(self) -> List[Dict]:
+        return derived(self, "cap_catalog", lambda snapshot: snapshot._table("capabilities"))
+
+    @property
+    def consumes_mapping(self) -> List[Dict]:
+        return self._table("consumes")
+
+    @property
+    def provides_mapping(self) -> List[Dict]:
+        return self._table("provides")
+
+    def as_tuple(self) -> Tuple[List[Dict], List[Dict], List[Dict], List[Dict]]:
+        """Return the raw datasets in the same order as DataProcessor.load_data()"""
+        return self.app_catalog, self.cap_catalog, self.consumes_mapping, self.provides_mapping
+
+    def _lookup_one(self, index: str, table: str, key: str) -> Dict:
+        rows = self._rows_for(index, key)
+        return self._row(table, rows[0]) if rows else {}
+
+    def _lookup_many(self, index: str, table: str, key: str) -> List[Dict]:
+        return [self._row(table, row) for row in self._rows_for(index, key)]
+
+    def get_application_details(self, application_id: str) -> Dict:
+        """Get details for a specific application"""
+        return self._lookup_one("applications.by_application_id", "applications", application_id)
+
+    def get_capability_details(self, capability_id: str) -> Dict:
+        """Get details for a specific capability"""
+        return self._lookup_one("capabilities.by_capability_id", "capabilities", capability_id)
+
+    def get_consumed_capabilities(self, application_id: str) -> List[Dict]:
+        """Get all capabilities consumed by an application"""
+        return self._lookup_many("consumes.by_application_id", "consumes", application_id)
+
+    def get_provided_capabilities(self, application_id: str) -> List[Dict]:
+        """Get all capabilities provided by an application"""
+        return self._lookup_many("provides.by_application_id", "provides", application_id)
+
+    def get_consuming_applications(self, capability_id: str) -> List[Dict]:
+        """Get all applications that consume a specific capability"""
+        return self._lookup_many("consumes.by_capability_id", "consumes", capability_id)
+
+    def get_providing_applications(self, capability_id: str) -> List[Dict]:
+        """Get all applications that provide a specific capability"""
+        return self._lookup_many("provides.by_capability_id", "provides", capability_id)
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.snapshot_file [data_dir] [output_path]
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(project_root, "data")
+    output_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(data_dir, "catalog.snap")
+    started = time.perf_counter()
+    version = compile_snapshot(data_dir, output_path)
+    print(f"Compiled {output_path} (version {version}) in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,329 @@
+"""
+SQLite storage backend for the catalog.
+
+The four CSVs are imported once into a local database file with indexes on
+the id columns and on both directions of each mapping. Every worker then
+answers lookups with small indexed queries instead of holding the whole
+catalog as Python dictionaries, so per-worker memory stays flat as the
+catalog grows; the database pages live in the OS page cache, shared by all
+workers on the host.
+
+The database runs in WAL mode: a reload rewrites the tables in a single
+write transaction while readers keep reading the previous commit, so they
+are never blocked. Each snapshot holds one connection with an open read
+transaction, so all of its queries see the import its ``version`` names.
+The source fingerprint is stored in the ``meta`` table, and the import
+re-checks it once it holds the write lock, so when several workers notice
+the same CSV change only the first one imports.
+"""
+import csv
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import weakref
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils.catalog_store import CATALOG_FILES, modified_at_for, source_fingerprint, version_for
+
+SCHEMA_VERSION = 1
+
+# Table name for each source file, in CATALOG_FILES order
+TABLES = ("applications", "capabilities", "consumes", "provides")
+
+# (table, indexed column) pairs created at import time
+INDEXES = (
+    ("applications", "application_id"),
+    ("capabilities", "capability_id"),
+    ("consumes", "application_id"),
+    ("consumes", "capability_id"),
+    ("provides", "application_id"),
+    ("provides", "capability_id"),
+)
+
+# Page cache per connection in KiB and memory-mapped I/O size in bytes
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "8192"))
+SQLITE_MMAP_BYTES = int(os.getenv("SQLITE_MMAP_BYTES", str(256 * 1024 * 1024)))
+# How long a writer waits for another worker's import to finish
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "60000"))
+# Rows fetched per query when listing a table in id order, and per fetch when reading one in file order
+LIST_BATCH_SIZE = 500
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _read_csv(path: str) -> Tuple[List[str], List[List[Optional[str]]]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        columns = next(reader, [])
+        rows = []
+        for row in reader:
+            if not row:
+                continue
+            row = row[:len(columns)] + [""] * (len(columns) - len(row))
+            rows.append([value if value != "" else None for value in row])
+        return columns, rows
+
+
+def connect(path: str, readonly: bool = False, shared: bool = False) -> sqlite3.Connection:
+    """
+    Open a connection to the catalog database with the backend's pragmas
+
+    Args:
+        path (str): Database file
+        readonly (bool): Reject writes on this connection
+        shared (bool): Allow use from several threads; callers serialize access
+
+    Returns:
+        sqlite3.Connection: Connection in autocommit mode
+    """
+    conn = sqlite3.connect(path, isolation_level=None, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+                           cached_statements=64, check_same_thread=not shared)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")
+    conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_BYTES}")
+    if readonly:
+        conn.execute("PRAGMA query_only=1")
+    return conn
+
+
+def _read_meta(conn: sqlite3.Connection) -> Optional[Dict]:
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'catalog'").fetchone()
+    except sqlite3.OperationalError:
+        # No meta table yet: nothing has been imported
+        return None
+    if row is None:
+        return None
+    meta = json.loads(row[0])
+    if meta.get("schema") != SCHEMA_VERSION:
+        return None
+    return meta
+
+
+def read_source_fingerprint(path: str) -> Optional[Tuple]:
+    """Return the source fingerprint the database was imported from, or None"""
+    if not os.path.exists(path):
+        return None
+    try:
+        conn = connect(path, readonly=True)
+        try:
+            meta = _read_meta(conn)
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError:
+        return None
+    if meta is None:
+        return None
+    return tuple(tuple(entry) for entry in meta["source"])
+
+
+def import_catalog(data_dir: str, db_path: str) -> str:
+    """
+    Import the four catalog CSVs into the SQLite database
+
+    All tables are replaced in one transaction. If another process has
+    already imported the same source files by the time the write lock is
+    acquired, nothing is written.
+
+    Args:
+        data_dir (str): Directory containing the catalog CSV files
+        db_path (str): Database file, created if missing
+
+    Returns:
+        str: The data version now stored in the database
+    """
+    fingerprint = source_fingerprint(data_dir)
+    version = version_for(fingerprint)
+    tables = {table: _read_csv(os.path.join(data_dir, filename)) for table, filename in zip(TABLES, CATALOG_FILES)}
+
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            meta = _read_meta(conn)
+            if meta is not None and tuple(tuple(entry) for entry in meta["source"]) == fingerprint:
+                conn.execute("ROLLBACK")
+                return meta["version"]
+
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            table_meta = {}
+            for table, (columns, rows) in tables.items():
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+                conn.execute(f"CREATE TABLE {table} ({', '.join(_quote(column) + ' TEXT' for column in columns)})")
+                placeholders = ", ".join("?" for _ in columns)
+                conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+                table_meta[table] = {"rows": len(rows), "columns": columns}
+            # Built after the bulk insert, which is much faster than maintaining them row by row
+            for table, column in INDEXES:
+                if column in table_meta[table]["columns"]:
+                    conn.execute(f"CREATE INDEX {table}_by_{column} ON {table} ({_quote(column)})")
+
+            meta = {
+                "schema": SCHEMA_VERSION,
+                "version": version,
+                "source": fingerprint,
+                "imported_at": time.time(),
+                "tables": table_meta,
+            }
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('catalog', ?)", (json.dumps(meta),))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    return version
+
+
+class SqliteCatalogSnapshot:
+    """
+    Catalog snapshot answered by indexed queries against the SQLite backend.
+
+    Offers the same lookup interface as ``CatalogSnapshot``. Whole-table
+    attributes such as ``app_catalog`` are read on demand and not kept, so
+    structures built from them (search index, analytics, dependency graph)
+    are the only catalog data a worker holds in memory.
+
+    Every query runs on one connection whose read transaction is opened
+    before ``meta`` is read and kept open for the life of the snapshot. In
+    WAL mode that pins the import the snapshot was opened on: a later
+    import does not show through, so ``version`` (and the ETags and cache
+    keys built from it) always describes the rows returned. The connection
+    is shared by all threads, one query at a time, and closed once the
+    store has moved on and the snapshot is no longer referenced.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        conn = connect(path, readonly=True, shared=True)
+        conn.execute("BEGIN")
+        meta = _read_meta(conn)
+        if meta is None:
+            conn.close()
+            raise ValueError(f"Catalog database has not been imported: {path}")
+        self._conn = conn
+        self._lock = threading.Lock()
+        self._closer = weakref.finalize(self, conn.close)
+        self.meta = meta
+        self.version = meta["version"]
+        self.loaded_at = time.time()
+        self.modified_at = modified_at_for(meta["source"])
+        self._columns = {table: info["columns"] for table, info in meta["tables"].items()}
+        self._select = {
+            table: f"SELECT {', '.join(_quote(column) for column in columns)} FROM {table}"
+            for table, columns in self._columns.items()
+        }
+
+    def close(self) -> None:
+        """End the read transaction and close the connection"""
+        self._closer()
+
+    def _query(self, table: str, where: str, params: Tuple) -> List[Dict]:
+        columns = self._columns[table]
+        with self._lock:
+            rows = self._conn.execute(f"{self._select[table]} {where}", params).fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def row_count(self, table: str) -> int:
+        return self.meta["tables"][table]["rows"]
+
+    def iter_rows(self, table: str) -> Iterator[Dict]:
+        """Yield the rows of a table in file order, LIST_BATCH_SIZE rows per fetch"""
+        columns = self._columns[table]
+        with self._lock:
+            cursor = self._conn.execute(f"{self._select[table]} ORDER BY rowid")
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(LIST_BATCH_SIZE)
+            if not rows:
+                return
+            for row in rows:
+                yield dict(zip(columns, row))
+
+    def iter_ordered(self, table: str, id_column: str, after: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Yield the first row for each id of a table in id order, after ``after``
+
+        Rows are fetched in batches of LIST_BATCH_SIZE by keyset queries on
+        the id index, so a long listing holds no cursor between batches and
+        can be resumed from any thread or snapshot.
+        """
+        column = _quote(id_column)
+        where = (f"WHERE rowid IN (SELECT min(rowid) FROM {table} WHERE {column} > ? "
+                 f"GROUP BY {column} ORDER BY {column} LIMIT ?) ORDER BY {column}")
+        last = after if after is not None else ""
+        while True:
+            rows = self._query(table, where, (last, LIST_BATCH_SIZE))
+            yield from rows
+            if len(rows) < LIST_BATCH_SIZE:
+                return
+            last = rows[-1][id_column]
+
+    @property
+    def app_catalog(self) -> List[Dict]:
+        return list(self.iter_rows("applications"))
+
+    @property
+    def cap_catalog(self) -> List[Dict]:
+        return list(self.iter_rows("capabilities"))
+
+    @property
+    def consumes_mapping(self) -> List[Dict]:
+        return list(self.iter_rows("consumes"))
+
+    @property
+    def provides_mapping(self) -> List[Dict]:
+        return list(self.iter_rows("provides"))
+
+    def as_tuple(self) -> Tuple[List[Dict], List[Dict], List[Dict], List[Dict]]:
+        """Return the raw datasets in the same order as DataProcessor.load_data()"""
+        return self.app_catalog, self.cap_catalog, self.consumes_mapping, self.provides_mapping
+
+    def _lookup_one(self, table: str, column: str, key: str) -> Dict:
+        rows = self._query(table, f"WHERE {_quote(column)} = ? ORDER BY rowid LIMIT 1", (key,))
+        return rows[0] if rows else {}
+
+    def _lookup_many(self, table: str, column: str, key: str) -> List[Dict]:
+        return self._query(table, f"WHERE {_quote(column)} = ? ORDER BY rowid", (key,))
+
+    def get_application_details(self, application_id: str) -> Dict:
+        """Get details for a specific application"""
+        return self._lookup_one("applications", "application_id", application_id)
+
+    def get_capability_details(self, capability_id: str) -> Dict:
+        """Get details for a specific capability"""
+        return self._lookup_one("capabilities", "capability_id", capability_id)
+
+    def get_consumed_capabilities(self, application_id: str) -> List[Dict]:
+        """Get all capabilities consumed by an application"""
+        return self._lookup_many("consumes", "application_id", application_id)
+
+    def get_provided_capabilities(self, application_id: str) -> List[Dict]:
+        """Get all capabilities provided by an application"""
+        return self._lookup_many("provides", "application_id", application_id)
+
+    def get_consuming_applications(self, capability_id: str) -> List[Dict]:
+        """Get all applications that consume a specific capability"""
+        return self._lookup_many("consumes", "capability_id", capability_id)
+
+    def get_providing_applications(self, capability_id: str) -> List[Dict]:
+        """Get all applications that provide a specific capability"""
+        return self._lookup_many("provides", "capability_id", capability_id)
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.sqlite_store [data_dir] [db_path]
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(project_root, "data")
+    db_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(data_dir, "catalog.db")
+    started = time.perf_counter()
+    version = import_catalog(data_dir, db_path)
+    print(f"Imported {db_path} (version {version}) in {time.perf_counter() - started:.2f}s")